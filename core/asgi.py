@@ -2,4 +2,21 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
-application = get_asgi_application()
+_django_app = get_asgi_application()
+
+HEALTH_PATH = '/health/'
+_HEALTH_START = {
+    'type': 'http.response.start',
+    'status': 200,
+    'headers': [(b'content-type', b'text/plain'), (b'content-length', b'2')],
+}
+_HEALTH_BODY = {'type': 'http.response.body', 'body': b'OK'}
+
+
+async def application(scope, receive, send):
+    # Same health short-circuit as core/wsgi.py
+    if scope['type'] == 'http' and scope.get('path') == HEALTH_PATH:
+        await send(_HEALTH_START)
+        await send(_HEALTH_BODY)
+        return
+    await _django_app(scope, receive, send)
@@ -0,0 +1,27 @@
+"""
+Process-wide environment lookup.
+The `.env` file is only read when DJANGO_LOAD_DOTENV=1 (local development); deployed
+processes get their configuration from the real environment. Parsed at most once per process.
+"""
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+# python-dotenv is optional; without it only the real environment is used
+try:
+    from dotenv import dotenv_values  # type: ignore
+except Exception:
+    dotenv_values = None
+
+ENV_FILE = Path(__file__).resolve().parent.parent / '.env'
+
+
+@lru_cache(maxsize=None)
+def get_env() -> Dict[str, Optional[str]]:
+    """Return `.env` values overlaid by the process environment (real env vars win)."""
+    values: Dict[str, Optional[str]] = {}
+    if dotenv_values and os.environ.get('DJANGO_LOAD_DOTENV', '0') == '1' and ENV_FILE.is_file():
+        values.update(dotenv_values(ENV_FILE))
+    values.update(os.environ)
+    return values
@@ -0,0 +1,47 @@
+"""
+Gemini model / API key resolved once at import.
+Read `CONFIG.model` / `CONFIG.api_key` directly instead of going through django.conf.settings.
+The SDK's process-global API key is set once via `configure_genai()` (called from AppConfig.ready).
+"""
+import threading
+from dataclasses import dataclass
+
+from core.environment import get_env
+
+
+@dataclass(frozen=True, slots=True)
+class GeminiConfig:
+    model: str
+    api_key: str | None
+    # Gemini extractions allowed in flight at once per process (batch page workers)
+    max_concurrency: int
+
+
+def _load() -> GeminiConfig:
+    env = get_env()
+    return GeminiConfig(
+        model=env.get('GEMINI_MODEL') or 'gemini-2.5-pro',
+        api_key=env.get('GOOGLE_API_KEY') or env.get('GEMINI_API_KEY'),
+        max_concurrency=max(1, int(env.get('GEMINI_MAX_CONCURRENCY') or 5)),
+    )
+
+
+CONFIG = _load()
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def configure_genai() -> bool:
+    """Configure google.generativeai with CONFIG.api_key once per process. Returns True when configured."""
+    global _configured
+    if _configured:
+        return True
+    if not CONFIG.api_key:
+        return False
+    with _configure_lock:
+        if not _configured:
+            import google.generativeai as genai
+            genai.configure(api_key=CONFIG.api_key)
+            _configured = True
+    return True
@@ -0,0 +1,22 @@
+"""
+Logging handlers that keep log I/O off request threads.
+Records are queued by the calling thread and written to stderr by a single listener thread.
+"""
+import atexit
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+
+class QueueStreamHandler(QueueHandler):
+    """QueueHandler whose listener writes to stderr; started on first construction."""
+
+    def __init__(self, stream=None):
+        super().__init__(queue.SimpleQueue())
+        self._listener = QueueListener(
+            self.queue, logging.StreamHandler(stream or sys.stderr), respect_handler_level=False
+        )
+        self._listener.start()
+        # Flush whatever is still queued when the worker exits
+        atexit.register(self._listener.stop)
@@ -0,0 +1,27 @@
+"""
+Project middleware.
+"""
+from django.http import HttpResponse
+
+# The API allows every origin, so the CORS headers are a fixed set
+CORS_PREFLIGHT_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET,POST,PUT,PATCH,DELETE,OPTIONS',
+    'Access-Control-Allow-Headers': '*',
+    'Access-Control-Max-Age': '86400',
+}
+
+
+class SimpleCorsMiddleware:
+    """Allow-all CORS: answer preflights directly and stamp `Access-Control-Allow-Origin: *`."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method == 'OPTIONS' and 'HTTP_ACCESS_CONTROL_REQUEST_METHOD' in request.META:
+            return HttpResponse(status=204, headers=CORS_PREFLIGHT_HEADERS)
+        response = self.get_response(request)
+        # Views such as MediaServeView may already set their own CORS headers
+        response.headers.setdefault('Access-Control-Allow-Origin', '*')
+        return response
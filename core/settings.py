@@ -1,43 +1,43 @@
 import os
 from pathlib import Path
 
-# Load environment variables from .env if python-dotenv is available
-try:
-    from dotenv import load_dotenv  # type: ignore
-except Exception:
-    load_dotenv = None
+from core.environment import get_env
+from core.gemini_config import CONFIG as GEMINI_CONFIG
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-if load_dotenv:
-    # Only attempt to load .env when the package is present
-    load_dotenv(BASE_DIR / '.env')
-SECRET_KEY = os.getenv('DJANGO_SECRET_KEY', 'dev-secret-key')
-DEBUG = os.getenv('DEBUG', 'false').lower() == 'true'
-ALLOWED_HOSTS = ['*']
-
-INSTALLED_APPS = [
-    'django.contrib.admin',
-    'django.contrib.auth',
-    'django.contrib.contenttypes',
-    'django.contrib.sessions',
-    'django.contrib.messages',
+# Plain-string form for the filesystem settings below (no Path -> str conversion on each use)
+_BASE = str(BASE_DIR)
+
+# .env + os.environ, parsed once per process (see core/environment.py)
+_ENV = get_env()
+
+SECRET_KEY = _ENV.get('DJANGO_SECRET_KEY', 'dev-secret-key')
+DEBUG = _ENV.get('DEBUG', 'false').lower() == 'true'
+# Comma-separated hostnames, e.g. "api.example.com,localhost"; defaults to any host
+ALLOWED_HOSTS = tuple(h.strip() for h in _ENV.get('ALLOWED_HOSTS', '*').split(',') if h.strip())
+USE_X_FORWARDED_HOST = False
+
+# JSON API only: no admin, sessions, auth, messages or CSRF (nothing routes to them)
+INSTALLED_APPS = (
     'django.contrib.staticfiles',
-    'corsheaders',
     'rest_framework',
-    'extraction'
-]
+    'extraction',
+)
 
-MIDDLEWARE = [
-    'corsheaders.middleware.CorsMiddleware',
+MIDDLEWARE = (
+    'core.middleware.SimpleCorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
-]
+)
+
+# TLS terminates at the platform proxy; trust its scheme header and skip browser-only policy headers
+SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+SECURE_HSTS_SECONDS = 0
+SECURE_REFERRER_POLICY = None
+SECURE_CROSS_ORIGIN_OPENER_POLICY = None
+# Kept on: uploaded page images are served back from /media/
+SECURE_CONTENT_TYPE_NOSNIFF = True
 
 ROOT_URLCONF = 'core.urls'
 
@@ -45,14 +45,16 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
+        # No templates are rendered by the API; skip the per-app directory scan and cache parsed templates
+        'APP_DIRS': False,
         'OPTIONS': {
-            'context_processors': [
+            'loaders': [
+                ('django.template.loaders.cached.Loader', ['django.template.loaders.filesystem.Loader']),
+            ],
+            'context_processors': (
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
-                'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages',
-            ],
+            ),
         },
     },
 ]
@@ -63,44 +65,94 @@ ASGI_APPLICATION = 'core.asgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.path.join(_BASE, 'db.sqlite3'),
+        'OPTIONS': {
+            'timeout': 20,  # busy_timeout (seconds) while another connection holds the write lock
+        },
+        # Keep connections open across requests; WAL/cache PRAGMAs are set in extraction/apps.py
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        # No view runs inside a request-wide transaction; SQLite statements autocommit
+        'ATOMIC_REQUESTS': False,
+        'AUTOCOMMIT': True,
     }
 }
 
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
-USE_I18N = True
-USE_TZ = True
+# English-only, UTC-only API: no translation machinery; timestamps are naive UTC (datetime.utcnow)
+USE_I18N = False
+USE_TZ = False
 
 STATIC_URL = 'static/'
-STATIC_ROOT = BASE_DIR / 'staticfiles'
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+STATIC_ROOT = os.path.join(_BASE, 'staticfiles')
+# No {% static %} hashing is needed for a JSON API; .gz/.br siblings are still built by collectstatic
+STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
+# Serve from the index built at startup; no per-request stat or finder lookups in production.
+# Filenames are not content-hashed, so cache for a day rather than marking files immutable.
+WHITENOISE_AUTOREFRESH = DEBUG
+WHITENOISE_USE_FINDERS = DEBUG
+WHITENOISE_MAX_AGE = 0 if DEBUG else 24 * 60 * 60
 
 # Media files configuration
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
+MEDIA_ROOT = os.path.join(_BASE, 'media')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
-    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
-    'DEFAULT_PARSER_CLASSES': ['rest_framework.parsers.JSONParser','rest_framework.parsers.MultiPartParser'],
+    'DEFAULT_RENDERER_CLASSES': ('rest_framework.renderers.JSONRenderer',),
+    'DEFAULT_PARSER_CLASSES': ('rest_framework.parsers.JSONParser',),
     'URL_FORMAT_OVERRIDE': 'response_format',
+    # django.contrib.auth is not installed, so DRF must not build an AnonymousUser or authenticate
+    'DEFAULT_AUTHENTICATION_CLASSES': (),
+    'DEFAULT_PERMISSION_CLASSES': (),
+    'UNAUTHENTICATED_USER': None,
 }
 
-# CORS configuration
-CORS_ALLOW_ALL_ORIGINS = True
-CORS_ALLOW_CREDENTIALS = True
+# CORS: every origin is allowed; headers are set by core.middleware.SimpleCorsMiddleware
 
-# File upload settings - Optimized for large PDFs
-FILE_UPLOAD_MAX_MEMORY_SIZE = 100 * 1024 * 1024  # 100MB (increased from 50MB)
-DATA_UPLOAD_MAX_MEMORY_SIZE = 100 * 1024 * 1024  # 100MB (increased from 50MB)
-FILE_UPLOAD_TEMP_DIR = None  # Use system temp directory for large files
+# File upload settings - every uploaded file is streamed to a temp file chunk by chunk
+# (there is no in-memory upload handler, so no memory-size threshold applies)
+FILE_UPLOAD_HANDLERS = ('django.core.files.uploadhandler.TemporaryFileUploadHandler',)
+# Non-file request bodies (e.g. process-page JSON carrying a base64 data URL) are still read into memory
+DATA_UPLOAD_MAX_MEMORY_SIZE = 100 * 1024 * 1024  # 100MB
+# Disk-backed system temp directory by default; only point this at a tmpfs (e.g. /dev/shm) that is
+# sized for the largest concurrent uploads, since tmpfs contents count against memory
+FILE_UPLOAD_TEMP_DIR = _ENV.get('FILE_UPLOAD_TEMP_DIR') or None
 FILE_UPLOAD_PERMISSIONS = 0o644
 
-GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-2.5-pro')
-GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
+# Kept for compatibility; application code reads core.gemini_config.CONFIG directly
+GEMINI_MODEL = GEMINI_CONFIG.model
+GOOGLE_API_KEY = GEMINI_CONFIG.api_key
 
 # MongoDB configuration
-MONGODB_URI = os.getenv('MONGODB_URI')
-MONGODB_DB_NAME = os.getenv('MONGODB_DB_NAME', 'onetech')
+MONGODB_URI = _ENV.get('MONGODB_URI')
+MONGODB_DB_NAME = _ENV.get('MONGODB_DB_NAME', 'onetech')
+# Connection pool per process and wire compression (zstd needs the zstandard package;
+# PyMongo skips compressors the server or client does not support)
+MONGODB_MAX_POOL_SIZE = int(_ENV.get('MONGODB_MAX_POOL_SIZE', '50'))
+MONGODB_MIN_POOL_SIZE = int(_ENV.get('MONGODB_MIN_POOL_SIZE', '5'))
+MONGODB_MAX_IDLE_TIME_MS = int(_ENV.get('MONGODB_MAX_IDLE_TIME_MS', '30000'))
+MONGODB_COMPRESSORS = _ENV.get('MONGODB_COMPRESSORS', 'zstd,zlib')
+
+# Application logs go through a queue; a listener thread does the stderr writes
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'standard': {
+            'format': '[%(levelname)s] %(asctime)s %(name)s: %(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            '()': 'core.log_handlers.QueueStreamHandler',
+            'formatter': 'standard',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': _ENV.get('LOG_LEVEL', 'WARNING'),
+    },
+}
@@ -1,16 +1,12 @@
 from django.urls import path, include
-from django.http import HttpResponse
 from django.conf import settings
 from django.conf.urls.static import static
 
-def health_check(request):
-    return HttpResponse("OK", content_type="text/plain")
+# django.conf.urls.static.static() only serves files when DEBUG is on; in production
+# media goes through extraction's MediaServeView, so skip it entirely there.
+_media_patterns = static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT) if settings.DEBUG else []
 
 urlpatterns = [
-    path('health/', health_check, name='health_check'),
+    # /health/ is answered directly by the WSGI/ASGI entry points (core/wsgi.py, core/asgi.py)
     path('', include('extraction.urls')),
-]
-
-# Serve media files in development and production
-# In production, you might want to use a proper web server like Nginx for better performance
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+] + _media_patterns
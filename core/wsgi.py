@@ -2,4 +2,16 @@ import os
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
-application = get_wsgi_application()
+_django_app = get_wsgi_application()
+
+HEALTH_PATH = '/health/'
+_HEALTH_BODY = b'OK'
+_HEALTH_HEADERS = [('Content-Type', 'text/plain'), ('Content-Length', str(len(_HEALTH_BODY)))]
+
+
+def application(environ, start_response):
+    # Load balancer health probes skip the URL resolver, middleware and view dispatch
+    if environ.get('PATH_INFO') == HEALTH_PATH:
+        start_response('200 OK', list(_HEALTH_HEADERS))
+        return [_HEALTH_BODY]
+    return _django_app(environ, start_response)
@@ -0,0 +1,35 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+# Applied to every new SQLite connection (Django 5.0 has no sqlite `init_command` option)
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL;',
+    'PRAGMA synchronous=NORMAL;',
+    'PRAGMA cache_size=-64000;',
+    'PRAGMA temp_store=MEMORY;',
+    'PRAGMA mmap_size=268435456;',
+)
+
+
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """Enable WAL and a larger page cache on freshly opened SQLite connections."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+
+
+class ExtractionConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'extraction'
+
+    def ready(self):
+        connection_created.connect(configure_sqlite_connection, dispatch_uid='extraction.sqlite_pragmas')
+
+        # Set the Gemini API key once; views only check that it succeeded
+        from core.gemini_config import configure_genai
+        try:
+            configure_genai()
+        except Exception as e:
+            print(f"[WARNING] Failed to configure Google AI at startup: {e}")
@@ -2,15 +2,17 @@
 Comprehensive backend batch processing system for PDF documents.
 Handles: PDF upload → Split → Extract → Real-time tracking → Database storage
 """
+import logging
 import os
 import uuid
-import json
 import time
+import queue
 import threading
-from datetime import datetime
+from collections import OrderedDict
+from datetime import datetime, timedelta
 from io import BytesIO
 from typing import Dict, Any, List, Optional
-from django.http import JsonResponse
+from django.http import StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.core.files.storage import default_storage
@@ -20,15 +22,20 @@ from rest_framework.response import Response
 from rest_framework import status
 from PIL import Image, UnidentifiedImageError
 
+from core.gemini_config import CONFIG, configure_genai
 from .pdf_utils import (
     is_pdf_file, 
-    split_pdf_to_images, 
-    convert_single_page_pdf_to_image,
-    get_pdf_page_count
+    read_upload_header,
+    detach_pdf_source,
+    iter_pdf_pages,
+    get_pdf_page_count,
+    cleanup_temp_file,
+    encode_jpeg,
 )
 from .document_models import get_model_by_type
 from .document_views import serialize_document
-from .image_storage import save_image_from_bytes
+from .image_storage import save_image_from_bytes, open_saved_image
+from .responses import json_response, dumps_json
 
 # Import extraction function
 try:
@@ -39,17 +46,154 @@ except Exception:
 # MongoDB connection for session storage (production-ready)
 from .mongodb import get_database
 
-# In-memory session storage DEPRECATED - keeping for backward compatibility only
-BATCH_SESSIONS = {}
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# In-memory session cache, least recently used first. MongoDB is the source of truth;
+# sessions running in this process are never evicted (see _cache_session).
+BATCH_SESSIONS: 'OrderedDict[str, BatchProcessingSession]' = OrderedDict()
+MAX_CACHED_SESSIONS = 128
+_sessions_lock = threading.Lock()
+
+# Finished sessions are removed by a MongoDB TTL index on `last_activity_at` (a BSON date;
+# `updated_at` is stored as an ISO string for the frontend)
+SESSION_TTL_SECONDS = 24 * 3600
+
+# list_batch_sessions returns summaries only (no per-page payloads)
+SESSION_SUMMARY_PROJECTION = {'_id': 0, 'documents': 0, 'pages_info': 0, 'errors': 0}
+SESSION_LIST_LIMIT = 50
+SESSION_LIST_MAX = 500
+_session_indexes_ready = False
+
+# Debounced session persistence: save_to_db() marks a session dirty and a daemon thread
+# writes every dirty session with a single bulk_write each interval (partial $set/$push
+# updates, see BatchProcessingSession.to_db_operation). Terminal statuses are flushed
+# immediately so other workers see the final state without delay.
+SESSION_FLUSH_INTERVAL = 0.5  # seconds
+TERMINAL_STATUSES = ('completed', 'failed', 'cancelled')
+
+_pending_sessions: Dict[str, 'BatchProcessingSession'] = {}
+_pending_lock = threading.Lock()
+_flush_lock = threading.Lock()  # serializes flushes so an older snapshot never overwrites a newer one
+_flusher_thread: Optional[threading.Thread] = None
+_flusher_start_lock = threading.Lock()
 
 def get_sessions_collection():
     """Get MongoDB collection for batch sessions"""
     try:
         db = get_database()
-        return db['batch_sessions']
+        collection = db['batch_sessions']
     except Exception as e:
         print(f"[ERROR] Failed to connect to MongoDB for sessions: {e}")
         return None
+    _ensure_session_indexes(collection)
+    return collection
+
+
+def _ensure_session_indexes(collection):
+    """Create the TTL index that expires finished sessions and the listing index (once per process)."""
+    global _session_indexes_ready
+    if _session_indexes_ready:
+        return
+    try:
+        collection.create_index(
+            'last_activity_at',
+            name='batch_sessions_ttl',
+            expireAfterSeconds=SESSION_TTL_SECONDS,
+            partialFilterExpression={'status': {'$in': list(TERMINAL_STATUSES)}},
+        )
+        collection.create_index([('started_at', -1)], name='batch_sessions_started_at')
+        _session_indexes_ready = True
+    except Exception as e:
+        print(f"[WARNING] Failed to create batch session TTL index: {e}")
+
+
+def _cache_session(session: 'BatchProcessingSession'):
+    """Put a session in the in-memory cache, evicting the least recently used idle ones."""
+    with _sessions_lock:
+        BATCH_SESSIONS[session.session_id] = session
+        BATCH_SESSIONS.move_to_end(session.session_id)
+        excess = len(BATCH_SESSIONS) - MAX_CACHED_SESSIONS
+        if excess > 0:
+            evictable = [
+                session_id for session_id, cached in BATCH_SESSIONS.items()
+                if not _is_processed_here(cached)
+            ][:excess]
+            for session_id in evictable:
+                del BATCH_SESSIONS[session_id]
+
+
+def _enqueue_session(session: 'BatchProcessingSession'):
+    """Mark a session as dirty; the latest state is written on the next flush."""
+    with _pending_lock:
+        _pending_sessions[session.session_id] = session
+    _ensure_flusher_running()
+
+
+def flush_pending_sessions() -> int:
+    """Write all dirty sessions to MongoDB in one unordered bulk upsert. Returns the number written."""
+    with _flush_lock:
+        with _pending_lock:
+            if not _pending_sessions:
+                return 0
+            batch = list(_pending_sessions.values())
+            _pending_sessions.clear()
+
+        collection = get_sessions_collection()
+        if collection is None:
+            print(f"[WARNING] MongoDB not available, {len(batch)} session(s) only in memory")
+            return 0
+
+        try:
+            operations = [session.to_db_operation() for session in batch]
+            result = collection.bulk_write(operations, ordered=False)
+            for session in batch:
+                session._persisted = True
+            print(f"[DEBUG] Flushed {len(operations)} session(s) to MongoDB")
+            # A guarded write only misses when another process cancelled the session in MongoDB
+            if result.matched_count + result.upserted_count < len(operations):
+                _adopt_remote_cancels(collection, batch)
+            return len(operations)
+        except Exception as e:
+            print(f"[ERROR] Failed to flush sessions to MongoDB: {e}")
+            # Retry on the next tick; the partial changes were consumed, so rewrite in full
+            with _pending_lock:
+                for session in batch:
+                    session._needs_full_save = True
+                    _pending_sessions.setdefault(session.session_id, session)
+            return 0
+
+
+def _adopt_remote_cancels(collection, batch):
+    """Stop the sessions in `batch` whose stored status another process set to 'cancelled'."""
+    live = {session.session_id: session for session in batch if not session.is_cancelled}
+    if not live:
+        return
+    for doc in collection.find({'_id': {'$in': list(live)}, 'status': 'cancelled'}, {'_id': 1}):
+        print(f"[DEBUG] Session {doc['_id']} was cancelled by another process, stopping")
+        live[doc['_id']].adopt_cancel()
+
+
+def _flush_loop():
+    while True:
+        time.sleep(SESSION_FLUSH_INTERVAL)
+        try:
+            flush_pending_sessions()
+        except Exception as e:
+            print(f"[ERROR] Session flusher error: {e}")
+
+
+def _ensure_flusher_running():
+    """Start the flusher thread on first use (not at import, so forked workers each get their own)."""
+    global _flusher_thread
+    if _flusher_thread is not None and _flusher_thread.is_alive():
+        return
+    with _flusher_start_lock:
+        if _flusher_thread is None or not _flusher_thread.is_alive():
+            _flusher_thread = threading.Thread(target=_flush_loop, name='batch-session-flusher', daemon=True)
+            _flusher_thread.start()
 
 
 class BatchProcessingSession:
@@ -68,123 +212,212 @@ class BatchProcessingSession:
         self.started_at = datetime.utcnow()
         self.updated_at = datetime.utcnow()
         self.status = 'initializing'  # initializing, processing, completed, failed
-        self.pages_info = {}  # Detailed info about each page
+        self.pages_info = {}  # Detailed info about each page, keyed by str(page_num) as stored in MongoDB
         self.processing_thread = None
+        # Guards every mutation and snapshot; worker threads update the session concurrently
+        self._lock = threading.RLock()
+        # Notified after every mutation; status streams wait on it (see wait_for_change)
+        self._changed = threading.Condition(self._lock)
+        # Memoized to_dict() output, rebuilt only after a mutation
+        self._dict_cache = None
+        self._dirty = True
+        # Live index of pages currently being extracted (avoids scanning pages_info)
+        self._processing_pages = set()
+        # Changes not yet written to MongoDB (see to_db_operation)
+        self._needs_full_save = True
+        self._dirty_pages = set()
+        self._unsaved_documents = []
+        self._unsaved_errors = []
+        self._persisted = False  # the document exists in MongoDB, so later writes need no upsert
+        # Set by cancel(); the pipeline checks it before each expensive step
+        self._cancel_event = threading.Event()
         
     def update_status(self, status: str):
         """Update session status"""
-        self.status = status
-        self.updated_at = datetime.utcnow()
+        with self._lock:
+            self.status = status
+            self.updated_at = datetime.utcnow()
+            self._mark_changed()
+        
+        self.save_to_db()
+        
+    def cancel(self):
+        """Mark the session cancelled and stop rendering/extracting further pages."""
+        self._cancel_event.set()
+        self.update_status('cancelled')
+        
+    def adopt_cancel(self):
+        """
+        Take over a cancel that another process wrote to MongoDB.
+        The writes it skipped are not lost: the next flush rewrites the whole document.
+        """
+        self._cancel_event.set()
+        with self._lock:
+            self.status = 'cancelled'
+            self.updated_at = datetime.utcnow()
+            self._needs_full_save = True
+            self._mark_changed()
+        _enqueue_session(self)
+        
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
         
     def set_processing_page(self, page_num: int):
         """Set currently processing page - now supports multiple concurrent pages"""
-        # Don't update self.processing_page anymore since we have multiple pages
-        # Instead, track individual page status
-        self.updated_at = datetime.utcnow()
-        if page_num not in self.pages_info:
-            self.pages_info[page_num] = {
-                'page_number': page_num,
-                'status': 'processing',
-                'started_at': datetime.utcnow().isoformat(),
-                'document_id': None,
-                'error': None,
-                'image_url': None
-            }
-        else:
-            # Update existing page info
-            self.pages_info[page_num].update({
-                'status': 'processing',
-                'started_at': datetime.utcnow().isoformat()
-            })
+        with self._lock:
+            # Don't update self.processing_page anymore since we have multiple pages
+            # Instead, track individual page status
+            self.updated_at = datetime.utcnow()
+            self._dirty_pages.add(page_num)
+            self._processing_pages.add(page_num)
+            if str(page_num) not in self.pages_info:
+                self.pages_info[str(page_num)] = {
+                    'page_number': page_num,
+                    'status': 'processing',
+                    'started_at': datetime.utcnow().isoformat(),
+                    'document_id': None,
+                    'error': None,
+                    'image_url': None
+                }
+            else:
+                # Update existing page info
+                self.pages_info[str(page_num)].update({
+                    'status': 'processing',
+                    'started_at': datetime.utcnow().isoformat()
+                })
+            self._mark_changed()
+        
+    def set_page_image(self, page_num: int, image_url: str):
+        """Record where a rendered page image was stored"""
+        with self._lock:
+            page_info = self.pages_info.get(str(page_num))
+            if page_info is not None:
+                page_info['image_url'] = image_url
+                self._dirty_pages.add(page_num)
+                self.updated_at = datetime.utcnow()
+                self._mark_changed()
         
     def add_success(self, page_num: int, document_id: str, extraction_data: Dict[str, Any], document_data: Dict[str, Any] = None):
         """Add successful page processing"""
-        self.completed_pages += 1
-        self.processing_page = None
-        
-        # Store comprehensive document info for frontend
-        doc_info = {
-            'page': page_num,
-            'id': document_id,
-            'extraction_confidence': extraction_data.get('extraction_confidence'),
-            'final_confidence': extraction_data.get('final_confidence')
-        }
+        with self._lock:
+            self.completed_pages += 1
+            self.processing_page = None
+            self._processing_pages.discard(page_num)
         
-        # Include full document data if provided
-        if document_data:
-            doc_info.update({
-                'data': extraction_data,
-                'metadata': document_data.get('metadata', {}),
-                'remark': document_data.get('remark', ''),
-                'imageUrl': document_data.get('imageUrl', ''),
-                'json_url': document_data.get('json_url', ''),
-                'excel_url': document_data.get('excel_url', ''),
-                'filename': document_data.get('metadata', {}).get('filename', ''),
-                'document_type': self.document_type,
-                'created_at': document_data.get('metadata', {}).get('processed_at', ''),
-            })
-        
-        self.documents.append(doc_info)
-        
-        # Update page info
-        if page_num in self.pages_info:
-            self.pages_info[page_num].update({
-                'status': 'completed',
-                'completed_at': datetime.utcnow().isoformat(),
-                'document_id': document_id,
+            # Store comprehensive document info for frontend
+            doc_info = {
+                'page': page_num,
+                'id': document_id,
                 'extraction_confidence': extraction_data.get('extraction_confidence'),
                 'final_confidence': extraction_data.get('final_confidence')
-            })
+            }
         
-        self.updated_at = datetime.utcnow()
+            # Include full document data if provided
+            if document_data:
+                doc_info.update({
+                    'data': extraction_data,
+                    'metadata': document_data.get('metadata', {}),
+                    'remark': document_data.get('remark', ''),
+                    'imageUrl': document_data.get('imageUrl', ''),
+                    'json_url': document_data.get('json_url', ''),
+                    'excel_url': document_data.get('excel_url', ''),
+                    'filename': document_data.get('metadata', {}).get('filename', ''),
+                    'document_type': self.document_type,
+                    'created_at': document_data.get('metadata', {}).get('processed_at', ''),
+                })
+        
+            self.documents.append(doc_info)
+            self._unsaved_documents.append(doc_info)
+            self._dirty_pages.add(page_num)
+        
+            # Update page info
+            if str(page_num) in self.pages_info:
+                self.pages_info[str(page_num)].update({
+                    'status': 'completed',
+                    'completed_at': datetime.utcnow().isoformat(),
+                    'document_id': document_id,
+                    'extraction_confidence': extraction_data.get('extraction_confidence'),
+                    'final_confidence': extraction_data.get('final_confidence')
+                })
         
-        # Update overall status
-        if (self.completed_pages + self.failed_pages) >= self.total_pages:
-            self.status = 'completed' if self.completed_pages > 0 else 'failed'
-            print(f"[DEBUG] Session {self.session_id} marked as {self.status}: {self.completed_pages}/{self.total_pages} completed")
+            self.updated_at = datetime.utcnow()
         
-        # Save to MongoDB after each update
+            # Update overall status
+            if (self.completed_pages + self.failed_pages) >= self.total_pages and not self.is_cancelled:
+                self.status = 'completed' if self.completed_pages > 0 else 'failed'
+                print(f"[DEBUG] Session {self.session_id} marked as {self.status}: {self.completed_pages}/{self.total_pages} completed")
+            self._mark_changed()
+        
+        # Queue for the next batched MongoDB write
         self.save_to_db()
         
     def add_error(self, page_num: int, error: str):
         """Add failed page processing"""
-        self.failed_pages += 1
-        self.processing_page = None
-        self.errors.append({
-            'page': page_num,
-            'error': str(error),
-            'timestamp': datetime.utcnow().isoformat()
-        })
+        with self._lock:
+            self.failed_pages += 1
+            self.processing_page = None
+            self._processing_pages.discard(page_num)
+            error_info = {
+                'page': page_num,
+                'error': str(error),
+                'timestamp': datetime.utcnow().isoformat()
+            }
+            self.errors.append(error_info)
+            self._unsaved_errors.append(error_info)
+            self._dirty_pages.add(page_num)
         
-        # Update page info
-        if page_num in self.pages_info:
-            self.pages_info[page_num].update({
-                'status': 'failed',
-                'completed_at': datetime.utcnow().isoformat(),
-                'error': str(error)
-            })
+            # Update page info
+            if str(page_num) in self.pages_info:
+                self.pages_info[str(page_num)].update({
+                    'status': 'failed',
+                    'completed_at': datetime.utcnow().isoformat(),
+                    'error': str(error)
+                })
         
-        self.updated_at = datetime.utcnow()
+            self.updated_at = datetime.utcnow()
         
-        # Update overall status
-        if (self.completed_pages + self.failed_pages) >= self.total_pages:
-            self.status = 'completed' if self.completed_pages > 0 else 'failed'
+            # Update overall status
+            if (self.completed_pages + self.failed_pages) >= self.total_pages and not self.is_cancelled:
+                self.status = 'completed' if self.completed_pages > 0 else 'failed'
+            self._mark_changed()
         
-        # Save to MongoDB after each update
+        # Queue for the next batched MongoDB write
         self.save_to_db()
         
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert session to dictionary for JSON response"""
+    def add_cancelled(self, page_num: int):
+        """Record that a page started extracting was abandoned because the session was cancelled"""
+        with self._lock:
+            self._processing_pages.discard(page_num)
+            self._dirty_pages.add(page_num)
+            if str(page_num) in self.pages_info:
+                self.pages_info[str(page_num)].update({
+                    'status': 'cancelled',
+                    'completed_at': datetime.utcnow().isoformat()
+                })
+            self.updated_at = datetime.utcnow()
+            self._mark_changed()
+        
+        self.save_to_db()
+        
+    def _mark_changed(self):
+        """Invalidate the to_dict() cache and wake status streams. Call with the lock held."""
+        self._dirty = True
+        self._changed.notify_all()
+        
+    def wait_for_change(self, since: Optional[datetime], timeout: float) -> bool:
+        """Block until `updated_at` differs from `since` or the timeout expires. Returns True on change."""
+        with self._changed:
+            return self._changed.wait_for(lambda: self.updated_at != since, timeout=timeout)
+        
+    def _summary_fields(self) -> Dict[str, Any]:
+        """Scalar progress fields (everything except the growing documents/errors/pages_info)."""
         progress_percentage = ((self.completed_pages + self.failed_pages) / self.total_pages * 100) if self.total_pages > 0 else 0
         
         # Get currently processing pages (multiple pages can be processing in parallel)
-        processing_pages = [
-            page_num for page_num, info in self.pages_info.items() 
-            if info.get('status') == 'processing'
-        ]
+        processing_pages = sorted(self._processing_pages)
         
         return {
-            'session_id': self.session_id,
             'status': self.status,
             'total_pages': self.total_pages,
             'completed_pages': self.completed_pages,
@@ -192,40 +425,82 @@ class BatchProcessingSession:
             'processing_page': self.processing_page,  # Keep for backward compatibility
             'processing_pages': processing_pages,  # New: list of currently processing pages
             'progress_percentage': round(progress_percentage, 1),
-            'document_type': self.document_type,
-            'filename': self.filename,
-            'documents': self.documents,
-            'errors': self.errors,
-            'pages_info': self.pages_info,
-            'started_at': self.started_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
             'elapsed_seconds': (datetime.utcnow() - self.started_at).total_seconds(),
         }
+        
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert session to dictionary for JSON response (a consistent snapshot)"""
+        with self._lock:
+            if self._dirty or self._dict_cache is None:
+                self._dict_cache = {
+                    'session_id': self.session_id,
+                    'document_type': self.document_type,
+                    'filename': self.filename,
+                    'documents': list(self.documents),
+                    'errors': list(self.errors),
+                    'pages_info': {key: dict(info) for key, info in self.pages_info.items()},
+                    'started_at': self.started_at.isoformat(),
+                    **self._summary_fields(),
+                }
+                self._dirty = False
+            # Shallow copy so callers can add keys; only the elapsed time moves between mutations
+            return {**self._dict_cache, 'elapsed_seconds': (datetime.utcnow() - self.started_at).total_seconds()}
     
-    def save_to_db(self):
-        """Save session to MongoDB"""
+    def to_db_document(self) -> Dict[str, Any]:
+        """Session state as stored in MongoDB (keyed by session_id)."""
+        session_data = self.to_dict()
+        session_data['_id'] = self.session_id  # Use session_id as MongoDB _id
+        session_data['last_activity_at'] = self.updated_at  # TTL index field
+        
+        return session_data
+    
+    def to_db_operation(self):
+        """
+        Build the MongoDB write for the changes since the last one and reset the change tracking.
+        
+        The first write and terminal states replace the whole document; in between only the
+        summary fields and changed pages are `$set` and new documents/errors are `$push`ed.
+        """
+        with self._lock:
+            # Once stored, a session that isn't cancelled here must not overwrite a cancel
+            # written by another process (see cancel_batch_processing)
+            guarded = self._persisted and self.status != 'cancelled'
+            target = {'_id': self.session_id, 'status': {'$ne': 'cancelled'}} if guarded else {'_id': self.session_id}
+            if self._needs_full_save or self.status in TERMINAL_STATUSES:
+                operation = ReplaceOne(target, self.to_db_document(), upsert=not guarded)
+                self._needs_full_save = False
+            else:
+                fields = self._summary_fields()
+                fields['last_activity_at'] = self.updated_at
+                for page_num in self._dirty_pages:
+                    page_info = self.pages_info.get(str(page_num))
+                    if page_info is not None:
+                        fields[f'pages_info.{page_num}'] = dict(page_info)
+                update: Dict[str, Any] = {'$set': fields}
+                pushes = {}
+                if self._unsaved_documents:
+                    pushes['documents'] = {'$each': list(self._unsaved_documents)}
+                if self._unsaved_errors:
+                    pushes['errors'] = {'$each': list(self._unsaved_errors)}
+                if pushes:
+                    update['$push'] = pushes
+                operation = UpdateOne(target, update, upsert=not guarded)
+            self._dirty_pages.clear()
+            self._unsaved_documents.clear()
+            self._unsaved_errors.clear()
+            return operation
+        
+    def save_to_db(self, immediate: bool = False):
+        """
+        Queue the session for persistence to MongoDB.
+        Writes are batched by the flusher thread; `immediate=True` or a terminal
+        status flushes right away.
+        """
         try:
-            collection = get_sessions_collection()
-            if collection is None:
-                print(f"[WARNING] MongoDB not available, session {self.session_id} only in memory")
-                return
-            
-            session_data = self.to_dict()
-            session_data['_id'] = self.session_id  # Use session_id as MongoDB _id
-            
-            # MongoDB requires string keys - convert pages_info integer keys to strings
-            if 'pages_info' in session_data and session_data['pages_info']:
-                session_data['pages_info'] = {
-                    str(k): v for k, v in session_data['pages_info'].items()
-                }
-            
-            # Upsert (update or insert)
-            collection.replace_one(
-                {'_id': self.session_id},
-                session_data,
-                upsert=True
-            )
-            print(f"[DEBUG] Session {self.session_id} saved to MongoDB")
+            _enqueue_session(self)
+            if immediate or self.status in TERMINAL_STATUSES:
+                flush_pending_sessions()
         except Exception as e:
             print(f"[ERROR] Failed to save session to MongoDB: {e}")
     
@@ -261,15 +536,15 @@ class BatchProcessingSession:
             session.documents = session_data.get('documents', [])
             session.errors = session_data.get('errors', [])
             
-            # Convert string keys back to integers for pages_info
-            pages_info = session_data.get('pages_info', {})
-            if pages_info:
-                session.pages_info = {
-                    int(k) if k.isdigit() else k: v 
-                    for k, v in pages_info.items()
-                }
-            else:
-                session.pages_info = {}
+            session.pages_info = session_data.get('pages_info') or {}
+            session._processing_pages = {
+                int(key) for key, info in session.pages_info.items()
+                if info.get('status') == 'processing' and key.isdigit()
+            }
+            
+            session._persisted = True
+            if session.status == 'cancelled':
+                session._cancel_event.set()
             
             session.started_at = datetime.fromisoformat(session_data['started_at'])
             session.updated_at = datetime.fromisoformat(session_data['updated_at'])
@@ -278,14 +553,42 @@ class BatchProcessingSession:
             return session
             
         except Exception as e:
-            print(f"[ERROR] Failed to load session from MongoDB: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Failed to load session from MongoDB")
             return None
 
 
-def process_pdf_pages_background(session_id: str):
-    """Background thread function to process PDF pages in parallel"""
+# Rendered pages waiting for an extraction worker (storage references, not image bytes)
+PAGE_QUEUE_SIZE = 16
+
+# Page images written to media storage concurrently while the producer keeps rendering
+PAGE_SAVE_WORKERS = 16
+
+# Process-wide cap on concurrent Gemini extractions, shared by all running sessions
+_GEMINI_SLOTS = threading.BoundedSemaphore(CONFIG.max_concurrency)
+
+# Extracted documents are inserted in batches of up to DOC_WRITE_BATCH, or whatever
+# arrived within DOC_WRITE_WAIT seconds of the first one
+DOC_WRITE_BATCH = 500
+DOC_WRITE_WAIT = 0.25  # seconds
+
+
+def process_pdf_pages_background(session_id: str, page_source: Any):
+    """
+    Background thread function to render and process pages in parallel.
+    
+    `page_source` is a detached PDF temp-file path (see `detach_pdf_source`)
+    or a ready list of (page_num, image_bytes) tuples for image uploads. A producer
+    thread renders and stores pages into a bounded queue while the extraction workers
+    consume it, so rendering overlaps with the AI calls.
+    """
+    try:
+        _process_pages(session_id, page_source)
+    finally:
+        if isinstance(page_source, str):
+            cleanup_temp_file(page_source)
+
+
+def _process_pages(session_id: str, page_source: Any):
     session = BATCH_SESSIONS.get(session_id)
     if not session:
         print(f"[ERROR] Session {session_id} not found in background processing")
@@ -294,130 +597,231 @@ def process_pdf_pages_background(session_id: str):
     print(f"[DEBUG] Starting parallel background processing for session {session_id}")
     session.update_status('processing')
     
-    # Configure Google AI
-    import google.generativeai as genai
-    api_key = os.getenv('GOOGLE_API_KEY') or os.getenv('GEMINI_API_KEY')
-    if not api_key:
-        session.add_error(0, "Google API key not configured")
-        session.update_status('failed')
-        return
-    
+    # Google AI is configured once per process (see configure_genai)
     try:
-        genai.configure(api_key=api_key)
-        print(f"[DEBUG] Google AI configured for session {session_id}")
+        if not configure_genai():
+            session.add_error(0, "Google API key not configured")
+            session.update_status('failed')
+            return
     except Exception as e:
         session.add_error(0, f"Failed to configure Google AI: {str(e)}")
         session.update_status('failed')
         return
     
-    # Get page images from session metadata
-    pages_data = session.__dict__.get('pages_data', [])
-    if not pages_data:
+    if not session.total_pages:
         session.add_error(0, "No page data available for processing")
         session.update_status('failed')
         return
     
     # Process pages in parallel using ThreadPoolExecutor
-    from concurrent.futures import ThreadPoolExecutor, as_completed
-    import threading
+    from concurrent.futures import ThreadPoolExecutor
     
-    # Use a reasonable number of workers (e.g., 3-5 to avoid API rate limits)
-    max_workers = min(5, len(pages_data))
-    print(f"[DEBUG] Processing {len(pages_data)} pages with {max_workers} parallel workers")
+    # Workers mostly wait on the Gemini API; GEMINI_MAX_CONCURRENCY (default 5) sets the rate-limit budget
+    max_workers = min(CONFIG.max_concurrency, session.total_pages)
+    print(f"[DEBUG] Processing {session.total_pages} pages with {max_workers} parallel workers")
+    
+    Model = get_model_by_type(session.document_type)
+    page_queue: queue.Queue = queue.Queue(maxsize=PAGE_QUEUE_SIZE)
+    pending_docs: queue.Queue = queue.Queue()
+    save_slots = threading.BoundedSemaphore(PAGE_SAVE_WORKERS)
+    filename_root = session.filename.rsplit('.', 1)[0] if '.' in session.filename else session.filename
+    
+    def store_page(page_num: int, image_bytes: bytes):
+        """Save one rendered page and queue it for extraction (runs on the save pool)."""
+        try:
+            # Save image to media storage; workers read it back from there, so the
+            # queue only carries the bytes when saving failed
+            image_url = save_image_from_bytes(image_bytes, f"{filename_root}_page_{page_num}")
+            if image_url:
+                print(f"[DEBUG] Saved page {page_num} to {image_url}")
+                unsaved_bytes = None
+            else:
+                print(f"[WARNING] Failed to save image for page {page_num}")
+                image_url = f"/media/images/page_{page_num}.jpg"  # fallback
+                unsaved_bytes = image_bytes
+            
+            session.set_page_image(page_num, image_url)
+            page_queue.put((page_num, image_url, unsaved_bytes))
+        except Exception as e:
+            print(f"[ERROR] Failed to store page {page_num}: {str(e)}")
+            session.add_error(page_num, f"Failed to store page image: {str(e)}")
+        finally:
+            save_slots.release()
+    
+    def produce_pages():
+        """Render pages and store them concurrently; stored pages go to the workers."""
+        produced = 0
+        try:
+            pages = page_source if isinstance(page_source, list) else iter_pdf_pages(page_source)
+            with ThreadPoolExecutor(max_workers=PAGE_SAVE_WORKERS, thread_name_prefix='batch-save') as save_pool:
+                for page_num, image_bytes in pages:
+                    if session.is_cancelled:
+                        print(f"[DEBUG] Session {session_id} cancelled, stopped rendering after page {produced}")
+                        break
+                    # Bounds rendered-but-unsaved pages held in memory
+                    save_slots.acquire()
+                    save_pool.submit(store_page, page_num, image_bytes)
+                    produced = page_num
+        except Exception as e:
+            print(f"[ERROR] Page rendering failed after page {produced}: {str(e)}")
+            for page_num in range(produced + 1, session.total_pages + 1):
+                session.add_error(page_num, f"Failed to render page: {str(e)}")
+        finally:
+            # One stop marker per worker, after every submitted save has queued its page
+            for _ in range(max_workers):
+                page_queue.put(None)
     
     def process_single_page(page_data):
         """Process a single page - this will run in parallel"""
-        page_num, image_bytes, image_url = page_data
+        page_num, image_url, unsaved_bytes = page_data
         thread_id = threading.current_thread().ident
         
+        if session.is_cancelled:
+            return {'success': False, 'page': page_num, 'error': 'cancelled'}
+        
         try:
             print(f"[DEBUG] Thread {thread_id}: Processing page {page_num}/{session.total_pages}")
             session.set_processing_page(page_num)
             
-            # Save image to temporary file for extraction
-            import tempfile
-            tmp_path = None
+            # Decode straight from storage (or the in-memory bytes if saving failed); no temp file
+            if unsaved_bytes is None:
+                with open_saved_image(image_url) as image_file:
+                    img = Image.open(image_file)
+                    img.load()
+            else:
+                img = Image.open(BytesIO(unsaved_bytes))
+                img.load()
+            
+            # Perform AI extraction
+            print(f"[DEBUG] Thread {thread_id}: Starting extraction for page {page_num}, doc type: {session.document_type}")
+            with _GEMINI_SLOTS:
+                if session.is_cancelled:
+                    session.add_cancelled(page_num)
+                    return {'success': False, 'page': page_num, 'error': 'cancelled'}
+                wrapper = extract_data_from_image(img, doc_type=session.document_type)
+            
+            if session.is_cancelled:
+                session.add_cancelled(page_num)
+                return {'success': False, 'page': page_num, 'error': 'cancelled'}
+            
+            if not wrapper:
+                raise Exception("Empty extraction result from AI")
+            
+            # Process extraction result
+            inner = wrapper.get('data') if isinstance(wrapper, dict) else wrapper
+            remark = wrapper.get('remark') if isinstance(wrapper, dict) else None
+            
+            doc_id = str(uuid.uuid4())
+            
+            document_data = {
+                'id': doc_id,
+                'data': inner,
+                'metadata': {
+                    'filename': f'{session.filename}_page_{page_num}',
+                    'document_type': session.document_type,
+                    'processed_at': datetime.utcnow().isoformat(),
+                    'page_number': page_num,
+                    'total_pages': session.total_pages,
+                    'session_id': session_id,
+                    'is_multi_page': session.total_pages > 1,
+                    'original_filename': session.filename
+                },
+                'remark': remark or f'{session.document_type} extraction complete - Page {page_num}',
+                'imageUrl': image_url,
+                'json_url': f'/api/documents/{doc_id}/export?format=json',
+                'excel_url': f'/api/documents/{doc_id}/export?format=excel',
+                'retry_used': 'no',
+            }
+            
+            # The writer thread inserts it and records the page once the batch is stored
+            pending_docs.put((page_num, doc_id, inner, document_data))
+            
+            print(f"[DEBUG] Thread {thread_id}: Successfully extracted page {page_num}")
+            return {'success': True, 'page': page_num, 'doc_id': doc_id}
             
-            try:
-                with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp:
-                    tmp.write(image_bytes)
-                    tmp_path = tmp.name
-                
-                # Perform AI extraction
-                print(f"[DEBUG] Thread {thread_id}: Starting extraction for page {page_num}, doc type: {session.document_type}")
-                wrapper = extract_data_from_image(tmp_path, doc_type=session.document_type)
-                
-                if not wrapper:
-                    raise Exception("Empty extraction result from AI")
-                
-                # Process extraction result
-                inner = wrapper.get('data') if isinstance(wrapper, dict) else wrapper
-                remark = wrapper.get('remark') if isinstance(wrapper, dict) else None
-                
-                # Create document in database
-                Model = get_model_by_type(session.document_type)
-                doc_id = str(uuid.uuid4())
-                
-                document_data = {
-                    'id': doc_id,
-                    'data': inner,
-                    'metadata': {
-                        'filename': f'{session.filename}_page_{page_num}',
-                        'document_type': session.document_type,
-                        'processed_at': datetime.utcnow().isoformat(),
-                        'page_number': page_num,
-                        'total_pages': session.total_pages,
-                        'session_id': session_id,
-                        'is_multi_page': session.total_pages > 1,
-                        'original_filename': session.filename
-                    },
-                    'remark': remark or f'{session.document_type} extraction complete - Page {page_num}',
-                    'imageUrl': image_url,
-                    'json_url': f'/api/documents/{doc_id}/export?format=json',
-                    'excel_url': f'/api/documents/{doc_id}/export?format=excel',
-                    'retry_used': 'no',
-                }
-                
-                document = Model.create(document_data)
-                session.add_success(page_num, doc_id, inner, document_data)
-                
-                print(f"[DEBUG] Thread {thread_id}: Successfully processed page {page_num}")
-                return {'success': True, 'page': page_num, 'doc_id': doc_id}
-                
-            finally:
-                # Cleanup temp file
-                if tmp_path and os.path.exists(tmp_path):
-                    try:
-                        os.remove(tmp_path)
-                    except OSError:
-                        pass
-                        
         except Exception as e:
             print(f"[ERROR] Thread {thread_id}: Failed to process page {page_num}: {str(e)}")
             session.add_error(page_num, str(e))
             return {'success': False, 'page': page_num, 'error': str(e)}
     
-    # Execute pages in parallel
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all pages for processing
-        future_to_page = {executor.submit(process_single_page, page_data): page_data[0] 
-                         for page_data in pages_data}
+    def consume_pages():
+        while True:
+            page_data = page_queue.get()
+            if page_data is None:
+                return
+            result = process_single_page(page_data)
+            if result['success']:
+                print(f"[DEBUG] Page {result['page']} completed successfully")
+            elif result['error'] == 'cancelled':
+                print(f"[DEBUG] Page {result['page']} skipped: session cancelled")
+            else:
+                print(f"[ERROR] Page {result['page']} failed: {result['error']}")
+    
+    def write_batch(batch):
+        """Insert one batch of documents, then record each page as completed or failed."""
+        failed = {}
+        try:
+            Model.create_many([document_data for _, _, _, document_data in batch])
+            print(f"[DEBUG] Inserted {len(batch)} documents for session {session_id}")
+        except BulkWriteError as e:
+            for write_error in e.details.get('writeErrors', []):
+                failed[write_error['index']] = write_error.get('errmsg', 'write error')
+            print(f"[ERROR] {len(failed)}/{len(batch)} document inserts failed for session {session_id}")
+        except Exception as e:
+            print(f"[ERROR] Failed to insert {len(batch)} documents for session {session_id}: {str(e)}")
+            failed = {index: str(e) for index in range(len(batch))}
         
-        # Process completed futures as they finish
-        for future in as_completed(future_to_page):
-            page_num = future_to_page[future]
+        for index, (page_num, doc_id, inner, document_data) in enumerate(batch):
+            if index in failed:
+                session.add_error(page_num, f"Failed to save document: {failed[index]}")
+            else:
+                session.add_success(page_num, doc_id, inner, document_data)
+    
+    def write_documents():
+        """Drain extracted documents into batched inserts until the stop marker arrives."""
+        stopping = False
+        while not stopping:
+            item = pending_docs.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + DOC_WRITE_WAIT
+            while len(batch) < DOC_WRITE_BATCH:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = pending_docs.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            write_batch(batch)
+    
+    writer = threading.Thread(target=write_documents, name=f'batch-write-{session_id[:8]}', daemon=True)
+    writer.start()
+    
+    producer = threading.Thread(target=produce_pages, name=f'batch-render-{session_id[:8]}', daemon=True)
+    producer.start()
+    
+    # Execute pages in parallel as the producer makes them available
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        workers = [executor.submit(consume_pages) for _ in range(max_workers)]
+        for worker in workers:
             try:
-                result = future.result()
-                if result['success']:
-                    print(f"[DEBUG] Page {result['page']} completed successfully")
-                else:
-                    print(f"[ERROR] Page {result['page']} failed: {result['error']}")
+                worker.result()
             except Exception as e:
-                print(f"[ERROR] Exception getting result for page {page_num}: {str(e)}")
-                session.add_error(page_num, f"Future exception: {str(e)}")
+                print(f"[ERROR] Extraction worker crashed: {str(e)}")
+    producer.join()
+    pending_docs.put(None)
+    writer.join()
     
     # Final status update
-    if session.completed_pages > 0:
+    if session.is_cancelled:
+        print(f"[DEBUG] Session {session_id} cancelled: {session.completed_pages}/{session.total_pages} pages processed before cancel")
+    elif session.completed_pages > 0:
         session.update_status('completed')
         print(f"[DEBUG] Session {session_id} completed: {session.completed_pages}/{session.total_pages} pages processed in parallel")
     else:
@@ -425,9 +829,6 @@ def process_pdf_pages_background(session_id: str):
         print(f"[ERROR] Session {session_id} failed: no pages processed successfully")
 
 
-
-
-
 @csrf_exempt
 @require_http_methods(["POST"])
 def start_batch_processing(request):
@@ -442,108 +843,81 @@ def start_batch_processing(request):
         
         # Validate request
         if 'file' not in request.FILES:
-            return JsonResponse({'error': 'No file uploaded'}, status=400)
+            return json_response({'error': 'No file uploaded'}, status=400)
         
         document_type = request.POST.get('document_type')
         if not document_type:
-            return JsonResponse({'error': 'document_type is required'}, status=400)
+            return json_response({'error': 'document_type is required'}, status=400)
         
         if document_type not in ['Rebut', 'NPT', 'Kosu']:
-            return JsonResponse({'error': 'Invalid document_type. Must be Rebut, NPT, or Kosu'}, status=400)
+            return json_response({'error': 'Invalid document_type. Must be Rebut, NPT, or Kosu'}, status=400)
         
         uploaded_file = request.FILES['file']
         
         print(f"[DEBUG] Processing file: {uploaded_file.name}, size: {uploaded_file.size}, type: {uploaded_file.content_type}")
         
-        # Read uploaded content once
-        file_content = uploaded_file.read()
-        
-        pages_data: List[Any] = []
+        page_source: Any = None
         page_count = 0
         original_filename = uploaded_file.name or 'uploaded_file'
         
-        if is_pdf_file(file_content):
-            # Handle PDF uploads
+        if is_pdf_file(read_upload_header(uploaded_file)):
+            # Handle PDF uploads: only the page count is read here, rendering happens in the background
             try:
-                page_count = get_pdf_page_count(file_content)
+                page_source = detach_pdf_source(uploaded_file)
+                page_count = get_pdf_page_count(page_source)
                 print(f"[DEBUG] PDF has {page_count} pages")
                 
-                if page_count == 1:
-                    image_bytes = convert_single_page_pdf_to_image(file_content)
-                    pages_data = [(1, image_bytes)]
-                else:
-                    pages_data = split_pdf_to_images(file_content)
-                    
             except Exception as e:
                 print(f"[ERROR] PDF processing failed: {str(e)}")
-                return JsonResponse({'error': f'Failed to process PDF: {str(e)}'}, status=400)
+                if isinstance(page_source, str):
+                    cleanup_temp_file(page_source)
+                return json_response({'error': f'Failed to process PDF: {str(e)}'}, status=400)
         else:
             # Attempt to treat the upload as an image
             try:
-                with Image.open(BytesIO(file_content)) as img:
+                with Image.open(uploaded_file) as img:
                     # Normalize to RGB JPEG to align with downstream expectations
-                    converted = img.convert('RGB')
-                    buffer = BytesIO()
-                    converted.save(buffer, format='JPEG', quality=95)
-                    image_bytes = buffer.getvalue()
+                    image_bytes = encode_jpeg(img.convert('RGB'), quality=95)
             except UnidentifiedImageError:
                 print("[ERROR] Uploaded file is neither a valid PDF nor an image")
-                return JsonResponse({'error': 'File must be a valid PDF or image'}, status=400)
+                return json_response({'error': 'File must be a valid PDF or image'}, status=400)
             except Exception as e:
                 print(f"[ERROR] Image normalization failed: {str(e)}")
-                return JsonResponse({'error': f'Failed to process image: {str(e)}'}, status=400)
+                return json_response({'error': f'Failed to process image: {str(e)}'}, status=400)
             
             page_count = 1
-            pages_data = [(1, image_bytes)]
+            page_source = [(1, image_bytes)]
             print(f"[DEBUG] Image upload detected, normalized to single page batch")
         
         # Create session
         session_id = str(uuid.uuid4())
         session = BatchProcessingSession(
             session_id=session_id,
-            total_pages=len(pages_data),
+            total_pages=page_count,
             document_type=document_type,
             filename=original_filename
         )
         
-        # Save images and prepare data for background processing
-        pages_with_urls = []
-        filename_root = original_filename.rsplit('.', 1)[0] if '.' in original_filename else original_filename
-        for page_num, image_bytes in pages_data:
-            # Save image to media storage
-            image_url = save_image_from_bytes(
-                image_bytes, 
-                f"{filename_root}_page_{page_num}"
-            )
-            
-            if not image_url:
-                print(f"[WARNING] Failed to save image for page {page_num}")
-                image_url = f"/media/images/page_{page_num}.jpg"  # fallback
-            
-            pages_with_urls.append((page_num, image_bytes, image_url))
-            print(f"[DEBUG] Saved page {page_num} to {image_url}")
-            
-            # Initialize page info with image URL
-            session.pages_info[page_num] = {
+        # Page images are rendered and stored by the background producer; URLs fill in as they land
+        for page_num in range(1, page_count + 1):
+            session.pages_info[str(page_num)] = {
                 'page_number': page_num,
                 'status': 'pending',
-                'image_url': image_url,
+                'image_url': None,
                 'document_id': None,
                 'error': None
             }
         
-        # Store page data in session for background processing
-        session.__dict__['pages_data'] = pages_with_urls
-        BATCH_SESSIONS[session_id] = session
+        _cache_session(session)
         
-        # Save session to MongoDB for multi-worker access
-        session.save_to_db()
+        # Save session to MongoDB for multi-worker access (written now so any worker can serve status)
+        session.save_to_db(immediate=True)
         print(f"[DEBUG] Session {session_id} saved to MongoDB and in-memory cache")
         
         # Start background processing
         processing_thread = threading.Thread(
             target=process_pdf_pages_background,
-            args=(session_id,),
+            args=(session_id, page_source),
             daemon=True
         )
         processing_thread.start()
@@ -551,7 +925,7 @@ def start_batch_processing(request):
         
         print(f"[DEBUG] Started background processing for session {session_id}")
         
-        return JsonResponse({
+        return json_response({
             'success': True,
             'session_id': session_id,
             'message': f'Started processing {page_count} pages in background',
@@ -559,73 +933,140 @@ def start_batch_processing(request):
         })
         
     except Exception as e:
-        print(f"[ERROR] Batch processing start failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return JsonResponse({
+        logger.exception("Batch processing start failed")
+        return json_response({
             'error': f'Failed to start batch processing: {str(e)}'
         }, status=500)
 
 
+def _is_processed_here(session: BatchProcessingSession) -> bool:
+    """True when this process runs the session's background thread (its in-memory state is live)."""
+    thread = session.processing_thread
+    return thread is not None and thread.is_alive()
+
+
+def _resolve_session(session_id: str) -> Optional[BatchProcessingSession]:
+    """Return the session from the in-memory cache, refreshed from MongoDB when stale."""
+    # First check in-memory cache (fastest)
+    session = BATCH_SESSIONS.get(session_id)
+    
+    # CRITICAL FIX: If cached session is stale (initializing or old update), refresh from MongoDB.
+    # Sessions processed by this process are always current and must not be replaced.
+    should_refresh = False
+    if session and not _is_processed_here(session):
+        # Refresh if status is still "initializing" (means worker has old cached version)
+        if session.status == 'initializing':
+            should_refresh = True
+            print(f"[DEBUG] Session {session_id} in memory has status='initializing', refreshing from MongoDB")
+        # Also refresh if last update was more than 10 seconds ago (stale cache)
+        elif (datetime.utcnow() - session.updated_at).total_seconds() > 10:
+            should_refresh = True
+            print(f"[DEBUG] Session {session_id} cache is stale, refreshing from MongoDB")
+    
+    # Load from MongoDB if not in memory OR if cached version is stale
+    if not session or should_refresh:
+        session = BatchProcessingSession.load_from_db(session_id)
+        if session:
+            # Cache in memory for faster subsequent access
+            _cache_session(session)
+            print(f"[DEBUG] Session {session_id} loaded from MongoDB and cached")
+    return session
+
+
+def _status_payload(session: BatchProcessingSession) -> Dict[str, Any]:
+    """Session snapshot plus the computed fields the frontend uses."""
+    status_data = session.to_dict()
+    status = status_data['status']
+    
+    # Add some helpful computed fields
+    status_data['is_processing'] = status == 'processing'
+    status_data['is_completed'] = status == 'completed'
+    status_data['is_failed'] = status == 'failed'
+    
+    # Calculate estimated time remaining
+    done_pages = status_data['completed_pages'] + status_data['failed_pages']
+    if status == 'processing' and status_data['completed_pages'] > 0:
+        avg_time_per_page = status_data['elapsed_seconds'] / done_pages
+        remaining_pages = status_data['total_pages'] - done_pages
+        status_data['estimated_remaining_seconds'] = round(avg_time_per_page * remaining_pages)
+    else:
+        status_data['estimated_remaining_seconds'] = None
+    return status_data
+
+
 @csrf_exempt
 @require_http_methods(["GET"])
 def get_batch_status(request, session_id):
     """
     Get real-time status of batch processing session.
-    Frontend polls this endpoint for progress updates.
+    Frontend polls this endpoint for progress updates (see stream_batch_status for push updates).
     """
     try:
-        # First check in-memory cache (fastest)
-        session = BATCH_SESSIONS.get(session_id)
-        
-        # CRITICAL FIX: If cached session is stale (initializing or old update), refresh from MongoDB
-        should_refresh = False
-        if session:
-            # Refresh if status is still "initializing" (means worker has old cached version)
-            if session.status == 'initializing':
-                should_refresh = True
-                print(f"[DEBUG] Session {session_id} in memory has status='initializing', refreshing from MongoDB")
-            # Also refresh if last update was more than 10 seconds ago (stale cache)
-            elif (datetime.utcnow() - session.updated_at).total_seconds() > 10:
-                should_refresh = True
-                print(f"[DEBUG] Session {session_id} cache is stale, refreshing from MongoDB")
-        
-        # Load from MongoDB if not in memory OR if cached version is stale
-        if not session or should_refresh:
-            session = BatchProcessingSession.load_from_db(session_id)
-            if session:
-                # Cache in memory for faster subsequent access
-                BATCH_SESSIONS[session_id] = session
-                print(f"[DEBUG] Session {session_id} loaded from MongoDB and cached")
-            else:
-                return JsonResponse({'error': 'Session not found'}, status=404)
-        
-        status_data = session.to_dict()
-        
-        # Add some helpful computed fields
-        status_data['is_processing'] = session.status == 'processing'
-        status_data['is_completed'] = session.status == 'completed'
-        status_data['is_failed'] = session.status == 'failed'
-        
-        # Calculate estimated time remaining
-        if session.status == 'processing' and session.completed_pages > 0:
-            elapsed = (datetime.utcnow() - session.started_at).total_seconds()
-            avg_time_per_page = elapsed / (session.completed_pages + session.failed_pages)
-            remaining_pages = session.total_pages - session.completed_pages - session.failed_pages
-            estimated_remaining = avg_time_per_page * remaining_pages
-            status_data['estimated_remaining_seconds'] = round(estimated_remaining)
-        else:
-            status_data['estimated_remaining_seconds'] = None
+        session = _resolve_session(session_id)
+        if not session:
+            return json_response({'error': 'Session not found'}, status=404)
         
-        return JsonResponse(status_data)
+        return json_response(_status_payload(session))
         
     except Exception as e:
         print(f"[ERROR] Failed to get batch status: {str(e)}")
-        return JsonResponse({
+        return json_response({
             'error': f'Failed to get status: {str(e)}'
         }, status=500)
 
 
+# Server-Sent Events: how long to wait for a change before a keep-alive, and how often
+# to re-read MongoDB when another worker process owns the session
+STATUS_STREAM_WAIT = 15  # seconds
+STATUS_STREAM_POLL = 2  # seconds
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+def stream_batch_status(request, session_id):
+    """
+    Stream batch status as Server-Sent Events (`text/event-stream`).
+    One event (same payload as get_batch_status) is sent per state change; the stream ends
+    after a terminal status. Holds one server thread per connected client.
+    """
+    if not _resolve_session(session_id):
+        return json_response({'error': 'Session not found'}, status=404)
+    
+    def event_stream():
+        last_sent = None
+        while True:
+            session = BATCH_SESSIONS.get(session_id)
+            if session is not None and _is_processed_here(session):
+                # Woken directly by the worker threads
+                session.wait_for_change(last_sent, timeout=STATUS_STREAM_WAIT)
+            else:
+                # Another process owns the session; re-read it from MongoDB on every poll
+                # (_resolve_session's staleness window would only refresh it every 10s)
+                if last_sent is not None:
+                    time.sleep(STATUS_STREAM_POLL)
+                session = BatchProcessingSession.load_from_db(session_id)
+                if session is not None:
+                    _cache_session(session)
+                if session is None:
+                    yield 'event: error\ndata: {"error": "Session not found"}\n\n'
+                    return
+            
+            if session.updated_at == last_sent:
+                yield ': keep-alive\n\n'
+                continue
+            
+            last_sent = session.updated_at
+            payload = _status_payload(session)
+            yield b'data: ' + dumps_json(payload) + b'\n\n'
+            if payload['status'] in TERMINAL_STATUSES:
+                return
+    
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let a reverse proxy buffer the stream
+    return response
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def cancel_batch_processing(request, session_id):
@@ -633,24 +1074,36 @@ def cancel_batch_processing(request, session_id):
     Cancel an active batch processing session.
     """
     try:
-        if session_id not in BATCH_SESSIONS:
-            return JsonResponse({'error': 'Session not found'}, status=404)
-        
-        session = BATCH_SESSIONS[session_id]
-        
-        if session.status in ['completed', 'failed']:
-            return JsonResponse({
-                'message': f'Session already {session.status}',
-                'status': session.to_dict()
-            })
-        
-        # Update status to cancelled
-        session.update_status('cancelled')
-        
-        # Note: We can't easily stop the background thread, but we can mark it as cancelled
-        # The thread will continue but results won't be used
+        session = BATCH_SESSIONS.get(session_id)
+        if session is not None and _is_processed_here(session):
+            if session.status in TERMINAL_STATUSES:
+                return json_response({
+                    'message': f'Session already {session.status}',
+                    'status': session.to_dict()
+                })
+            # Workers finish the page they are on (or the Gemini call in flight) and then stop
+            session.cancel()
+        else:
+            # Another process owns the session: flip the stored status atomically and let the
+            # owner pick it up on its next flush (a cached copy here may be stale)
+            collection = get_sessions_collection()
+            if collection is None:
+                return json_response({'error': 'Session storage unavailable'}, status=503)
+            result = collection.update_one(
+                {'_id': session_id, 'status': {'$nin': list(TERMINAL_STATUSES)}},
+                {'$set': {'status': 'cancelled', 'updated_at': datetime.utcnow().isoformat()}},
+            )
+            session = BatchProcessingSession.load_from_db(session_id)
+            if session is None:
+                return json_response({'error': 'Session not found'}, status=404)
+            _cache_session(session)
+            if result.modified_count == 0:
+                return json_response({
+                    'message': f'Session already {session.status}',
+                    'status': session.to_dict()
+                })
         
-        return JsonResponse({
+        return json_response({
             'success': True,
             'message': 'Batch processing cancelled',
             'status': session.to_dict()
@@ -658,7 +1111,7 @@ def cancel_batch_processing(request, session_id):
         
     except Exception as e:
         print(f"[ERROR] Failed to cancel batch processing: {str(e)}")
-        return JsonResponse({
+        return json_response({
             'error': f'Failed to cancel: {str(e)}'
         }, status=500)
 
@@ -667,24 +1120,34 @@ def cancel_batch_processing(request, session_id):
 @require_http_methods(["GET"])
 def list_batch_sessions(request):
     """
-    List all batch processing sessions (for debugging/monitoring).
+    List recent batch processing sessions (for debugging/monitoring).
+    Reads summaries straight from MongoDB; ?limit= caps the count (default 50).
     """
     try:
-        sessions_data = []
-        for session_id, session in BATCH_SESSIONS.items():
-            sessions_data.append(session.to_dict())
+        collection = get_sessions_collection()
+        if collection is None:
+            return json_response({'error': 'Session storage unavailable'}, status=503)
+        
+        try:
+            limit = min(max(int(request.GET.get('limit', SESSION_LIST_LIMIT)), 1), SESSION_LIST_MAX)
+        except ValueError:
+            return json_response({'error': 'limit must be an integer'}, status=400)
         
-        # Sort by most recent first
-        sessions_data.sort(key=lambda x: x['started_at'], reverse=True)
+        cursor = collection.find({}, SESSION_SUMMARY_PROJECTION).sort('started_at', -1).limit(limit)
+        sessions_data = []
+        for doc in cursor:
+            if isinstance(doc.get('last_activity_at'), datetime):
+                doc['last_activity_at'] = doc['last_activity_at'].isoformat()
+            sessions_data.append(doc)
         
-        return JsonResponse({
+        return json_response({
             'sessions': sessions_data,
             'total': len(sessions_data)
         })
         
     except Exception as e:
         print(f"[ERROR] Failed to list sessions: {str(e)}")
-        return JsonResponse({
+        return json_response({
             'error': f'Failed to list sessions: {str(e)}'
         }, status=500)
 
@@ -693,29 +1156,28 @@ def list_batch_sessions(request):
 @require_http_methods(["DELETE"])
 def cleanup_batch_sessions(request):
     """
-    Clean up old completed/failed sessions (for memory management).
+    Delete finished sessions older than SESSION_TTL_SECONDS right away.
+    The TTL index removes them on its own; this only skips the wait for MongoDB's sweep.
     """
     try:
-        # Keep only sessions from last 24 hours or still processing
-        cutoff_time = datetime.utcnow().timestamp() - 24 * 3600  # 24 hours ago
-        
-        sessions_to_remove = []
-        for session_id, session in BATCH_SESSIONS.items():
-            if (session.status in ['completed', 'failed', 'cancelled'] and 
-                session.updated_at.timestamp() < cutoff_time):
-                sessions_to_remove.append(session_id)
+        collection = get_sessions_collection()
+        if collection is None:
+            return json_response({'error': 'Session storage unavailable'}, status=503)
         
-        for session_id in sessions_to_remove:
-            del BATCH_SESSIONS[session_id]
+        cutoff = datetime.utcnow() - timedelta(seconds=SESSION_TTL_SECONDS)
+        result = collection.delete_many({
+            'status': {'$in': list(TERMINAL_STATUSES)},
+            'last_activity_at': {'$lt': cutoff},
+        })
         
-        return JsonResponse({
+        return json_response({
             'success': True,
-            'cleaned_up': len(sessions_to_remove),
+            'cleaned_up': result.deleted_count,
             'remaining': len(BATCH_SESSIONS)
         })
         
     except Exception as e:
         print(f"[ERROR] Failed to cleanup sessions: {str(e)}")
-        return JsonResponse({
+        return json_response({
             'error': f'Failed to cleanup: {str(e)}'
         }, status=500)
@@ -2,29 +2,68 @@
 Document models for MongoDB operations.
 These replace the frontend Mongoose models.
 """
+import threading
 import uuid
 from datetime import datetime
-from typing import Any, Dict, List, Optional
-from .mongodb import get_collection
+from typing import Any, Dict, Iterator, List, Optional
+from pymongo.errors import OperationFailure
+from .mongodb import get_collection, get_raw_collection
+
+# Documents per round trip when iterating large result sets
+CURSOR_BATCH_SIZE = 500
 
 
 class DocumentModel:
     """Base class for document operations with MongoDB."""
     
     collection_name: str = None  # Override in subclasses
+    doc_type: str = None  # Canonical document type ('Rebut', 'NPT', 'Kosu'), stored as `type`
+    
+    # Tracking fields set on create unless the caller provides them; callables are
+    # factories so every document gets its own list. Subclasses may extend this.
+    _DEFAULTS: Dict[str, Any] = {
+        'updated_by_user': False,
+        'history': list,
+        'verification_status': 'original',
+        'verification_history': list,
+    }
+    
+    # Collections whose indexes were ensured by this process (see ensure_indexes)
+    _indexed_collections: set = set()
+    _index_lock = threading.Lock()
     
     @classmethod
     def get_collection(cls):
-        """Get the MongoDB collection for this model."""
+        """Get the MongoDB collection for this model (its indexes are ensured on first use)."""
         if not cls.collection_name:
             raise NotImplementedError("collection_name must be defined")
-        return get_collection(cls.collection_name)
+        collection = get_collection(cls.collection_name)
+        if cls.collection_name not in DocumentModel._indexed_collections:
+            cls.ensure_indexes(collection)
+        return collection
     
     @classmethod
-    def create(cls, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Create a new document."""
-        collection = cls.get_collection()
-        
+    def ensure_indexes(cls, collection=None):
+        """
+        Create the unique `id` index used by every lookup and the `created_at` index
+        used by find_all's default sort. create_index is idempotent; this runs once per process.
+        """
+        with DocumentModel._index_lock:
+            if cls.collection_name in DocumentModel._indexed_collections:
+                return
+            if collection is None:
+                collection = get_collection(cls.collection_name)
+            try:
+                collection.create_index([('id', 1)], unique=True, name='id_unique')
+                collection.create_index([('created_at', -1)], name='created_at_desc')
+            except OperationFailure as e:
+                # e.g. duplicate ids already stored; queries still work without the index
+                print(f"[WARNING] Failed to create indexes on {cls.collection_name}: {e}")
+            DocumentModel._indexed_collections.add(cls.collection_name)
+    
+    @classmethod
+    def prepare(cls, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill in the ID, timestamps and tracking fields of a new document (in place)."""
         # Generate ID if not provided
         if 'id' not in data:
             data['id'] = str(uuid.uuid4())
@@ -34,129 +73,157 @@ class DocumentModel:
         data['created_at'] = now
         data['updated_at'] = now
         
+        # Record the type on the document itself, not only through its collection
+        if cls.doc_type:
+            data.setdefault('type', cls.doc_type)
+        
         # Initialize tracking fields
-        if 'updated_by_user' not in data:
-            data['updated_by_user'] = False
-        if 'history' not in data:
-            data['history'] = []
-        if 'verification_status' not in data:
-            data['verification_status'] = 'original'
-        if 'verification_history' not in data:
-            data['verification_history'] = []
+        for key, default in cls._DEFAULTS.items():
+            if key not in data:
+                data[key] = default() if callable(default) else default
+        
+        return data
+    
+    @classmethod
+    def create(cls, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a new document."""
+        collection = cls.get_collection()
+        cls.prepare(data)
         
         # Insert the document
         collection.insert_one(data)
         
-        # Remove MongoDB's _id before returning
-        if '_id' in data:
-            del data['_id']
+        # Remove the _id insert_one added to the dict before returning
+        data.pop('_id', None)
         
         return data
     
+    @classmethod
+    def create_many(cls, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Create several documents with a single unordered insert command.
+        On partial failure pymongo raises BulkWriteError; its `writeErrors` carry
+        the index of each document that was not inserted.
+        """
+        if not docs:
+            return docs
+        collection = cls.get_collection()
+        for data in docs:
+            cls.prepare(data)
+        
+        try:
+            collection.insert_many(docs, ordered=False)
+        finally:
+            # Remove MongoDB's _id before returning
+            for data in docs:
+                data.pop('_id', None)
+        
+        return docs
+    
     @classmethod
     def find_by_id(cls, doc_id: str) -> Optional[Dict[str, Any]]:
         """Find a document by its ID."""
         collection = cls.get_collection()
-        doc = collection.find_one({'id': doc_id})
-        if doc and '_id' in doc:
-            del doc['_id']
-        return doc
+        return collection.find_one({'id': doc_id}, projection={'_id': 0})
     
     @classmethod
-    def find_all(cls, limit: Optional[int] = None, sort_field: str = 'created_at', sort_order: int = -1) -> List[Dict[str, Any]]:
+    def find_by_ids(cls, doc_ids: List[str], projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Find several documents with one `$in` query, in the order of `doc_ids` (missing IDs are skipped).
+        `projection` limits the returned fields; `id` is always included.
+        """
+        collection = cls.get_collection()
+        fields = {**projection, 'id': 1, '_id': 0} if projection else {'_id': 0}
+        docs_by_id = {
+            doc['id']: doc
+            for doc in collection.find({'id': {'$in': list(dict.fromkeys(doc_ids))}}, fields)
+        }
+        return [docs_by_id[doc_id] for doc_id in doc_ids if doc_id in docs_by_id]
+    
+    @classmethod
+    def find_all(cls, limit: Optional[int] = None, sort_field: str = 'created_at', sort_order: int = -1,
+                 projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Find all documents with optional limit and sorting."""
+        return list(cls.iter_all(limit=limit, sort_field=sort_field, sort_order=sort_order, projection=projection))
+    
+    @classmethod
+    def iter_all(cls, limit: Optional[int] = None, sort_field: str = 'created_at', sort_order: int = -1,
+                 projection: Optional[Dict[str, Any]] = None, raw: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Yield all documents, fetched from the server in batches of CURSOR_BATCH_SIZE.
+        `projection` limits the returned fields; MongoDB's `_id` is always excluded.
+        `raw=True` yields read-only RawBSONDocuments that decode fields on access (for exports).
+        """
         collection = cls.get_collection()
-        cursor = collection.find().sort(sort_field, sort_order)
+        if raw:
+            collection = get_raw_collection(cls.collection_name)
+        fields = {**(projection or {}), '_id': 0}
+        cursor = collection.find({}, fields).sort(sort_field, sort_order).batch_size(CURSOR_BATCH_SIZE)
         
         if limit:
             cursor = cursor.limit(limit)
         
-        docs = list(cursor)
-        # Remove MongoDB's _id from all documents
-        for doc in docs:
-            if '_id' in doc:
-                del doc['_id']
-        
-        return docs
+        yield from cursor
+    
+    @classmethod
+    def aggregate(cls, pipeline: List[Dict[str, Any]], raw: bool = False) -> Iterator[Dict[str, Any]]:
+        """Yield the results of an aggregation pipeline in batches of CURSOR_BATCH_SIZE (`raw` as in iter_all)."""
+        collection = cls.get_collection()
+        if raw:
+            collection = get_raw_collection(cls.collection_name)
+        yield from collection.aggregate(pipeline, allowDiskUse=True, batchSize=CURSOR_BATCH_SIZE)
+    
+    @classmethod
+    def count_all(cls) -> int:
+        """Number of documents in the collection."""
+        return cls.get_collection().count_documents({})
     
     @classmethod
     def update_field(cls, doc_id: str, field: str, old_value: Any, new_value: Any) -> Optional[Dict[str, Any]]:
         """Update a specific field and track the change in history."""
         collection = cls.get_collection()
+        now = datetime.utcnow()
         
-        # Handle nested field paths (e.g., "data.header.ligne" -> {"data.header.ligne": new_value})
-        # Convert dot notation to nested dictionary structure
-        field_parts = field.split('.')
-        if len(field_parts) > 1:
-            # Create nested update structure
-            nested_update = {}
-            current = nested_update
-            for part in field_parts[:-1]:
-                current[part] = {}
-                current = current[part]
-            current[field_parts[-1]] = new_value
-            
-            # Use dot notation for MongoDB update
-            update_data = {
-                '$set': {
-                    field: new_value,
-                    'updated_at': datetime.utcnow(),
-                    'updated_by_user': True
-                },
-                '$push': {
-                    'history': {
-                        'field': field,
-                        'old_value': old_value,
-                        'new_value': new_value,
-                        'updated_at': datetime.utcnow(),
-                        'updated_by': 'user'
-                    }
-                }
-            }
-        else:
-            # Simple field update
-            update_data = {
-                '$set': {
-                    field: new_value,
-                    'updated_at': datetime.utcnow(),
-                    'updated_by_user': True
-                },
-                '$push': {
-                    'history': {
-                        'field': field,
-                        'old_value': old_value,
-                        'new_value': new_value,
-                        'updated_at': datetime.utcnow(),
-                        'updated_by': 'user'
-                    }
+        # Nested fields are given in dot notation (e.g. "data.header.ligne"), which $set applies directly
+        update_data = {
+            '$set': {
+                field: new_value,
+                'updated_at': now,
+                'updated_by_user': True
+            },
+            '$push': {
+                'history': {
+                    'field': field,
+                    'old_value': old_value,
+                    'new_value': new_value,
+                    'updated_at': now,
+                    'updated_by': 'user'
                 }
             }
+        }
         
-        result = collection.find_one_and_update(
+        return collection.find_one_and_update(
             {'id': doc_id},
             update_data,
+            projection={'_id': 0},
             return_document=True
         )
-        
-        if result and '_id' in result:
-            del result['_id']
-        
-        return result
     
     @classmethod
     def update_verification(cls, doc_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update verification status and related fields."""
         collection = cls.get_collection()
+        now = datetime.utcnow()
         
         update_data = {
             '$set': {
-                'updated_at': datetime.utcnow(),
+                'updated_at': now,
                 'verification_status': updates['verification_status']
             },
             '$push': {
                 'verification_history': {
                     'status': updates['verification_status'],
-                    'timestamp': datetime.utcnow(),
+                    'timestamp': now,
                     'user': updates.get('verified_by', 'user'),
                     'notes': updates.get('verification_notes')
                 }
@@ -177,16 +244,12 @@ class DocumentModel:
         if 'verified_at' in updates:
             update_data['$set']['verified_at'] = updates['verified_at']
         
-        result = collection.find_one_and_update(
+        return collection.find_one_and_update(
             {'id': doc_id},
             update_data,
+            projection={'_id': 0},
             return_document=True
         )
-        
-        if result and '_id' in result:
-            del result['_id']
-        
-        return result
     
     @classmethod
     def delete(cls, doc_id: str) -> int:
@@ -199,26 +262,27 @@ class DocumentModel:
 class RebutModel(DocumentModel):
     """Model for Rebut documents."""
     collection_name = 'rebuts'
+    doc_type = 'Rebut'
 
 
 class NPTModel(DocumentModel):
     """Model for NPT documents."""
     collection_name = 'npts'
+    doc_type = 'NPT'
 
 
 class KosuModel(DocumentModel):
     """Model for Kosu documents."""
     collection_name = 'kosus'
+    doc_type = 'Kosu'
+
+
+_MODEL_MAP = {Model.doc_type.lower(): Model for Model in (RebutModel, NPTModel, KosuModel)}
 
 
 def get_model_by_type(doc_type: str) -> type[DocumentModel]:
     """Get the appropriate model class based on document type."""
-    doc_type_lower = doc_type.lower()
-    if doc_type_lower == 'rebut':
-        return RebutModel
-    elif doc_type_lower == 'npt':
-        return NPTModel
-    elif doc_type_lower == 'kosu':
-        return KosuModel
-    else:
-        raise ValueError(f"Unknown document type: {doc_type}")
+    try:
+        return _MODEL_MAP[doc_type.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown document type: {doc_type}") from None
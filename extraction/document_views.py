@@ -4,10 +4,21 @@ All database operations happen here in the backend.
 """
 import csv
 import io
-import json
-from datetime import datetime
+import logging
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Callable, List, NamedTuple
 from bson import ObjectId
-from django.http import HttpResponse
+from pymongo.errors import BulkWriteError
+from django.core import signing
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -15,6 +26,119 @@ from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 
 from .document_models import get_model_by_type
+from .responses import dumps_json, gzip_response, json_response
+
+logger = logging.getLogger(__name__)
+
+
+def _field_extractor(keys):
+    """Build a function returning the values of `keys` from a dict as a tuple ('' when missing)."""
+    def extract(obj):
+        get = obj.get
+        return tuple([get(key, '') for key in keys])
+    return extract
+
+
+class _CsvLayout(NamedTuple):
+    """CSV export shape of one document type."""
+    columns: List[str]
+    header_fields: Callable  # extractor over data.header
+    rows_field: str  # data.<rows_field> yields the row values
+    row_fields: Callable  # extractor over each entry of rows_field
+    indexed: bool  # rows_field is an array (one row per entry, with its index) rather than a sub-document
+
+
+CSV_LAYOUTS = {
+    'rebut': _CsvLayout(
+        ['Document ID', 'Date', 'Ligne', 'OF Number', 'Item Index',
+         'Reference', 'Designation', 'Quantity', 'Unit', 'Type', 'Total Scrapped'],
+        _field_extractor(('date', 'ligne', 'of_number')),
+        'items',
+        _field_extractor(('reference', 'designation', 'quantity', 'unit', 'type', 'total_scrapped')),
+        True,
+    ),
+    'npt': _CsvLayout(
+        ['Document ID', 'Date', 'UAP', 'Equipe', 'Event Index',
+         'Codes Ligne', 'Ref PF', 'Designation', 'NPT Minutes',
+         'Heure Debut', 'Heure Fin', 'Cause NPT'],
+        _field_extractor(('date', 'uap', 'equipe')),
+        'downtime_events',
+        _field_extractor(('codes_ligne', 'ref_pf', 'designation', 'npt_minutes',
+                          'heure_debut_d_arret', 'heure_fin_d_arret', 'cause_npt')),
+        True,
+    ),
+    'kosu': _CsvLayout(
+        ['Document ID', 'Date', 'Nom Ligne', 'Code Ligne', 'Numero OF',
+         'Ref PF', 'Heures Deposees', 'Objectif Qte EQ', 'Qte Realisee'],
+        _field_extractor(('date', 'nom_ligne', 'code_ligne', 'numero_of', 'ref_pf')),
+        'team_summary',
+        _field_extractor(('heures_deposees', 'objectif_qte_eq', 'qte_realisee')),
+        False,
+    ),
+}
+
+# Background CSV exports (?async=1): written under MEDIA_ROOT/exports by a small thread pool
+# (the work is MongoDB I/O and C-level csv formatting) and fetched through a signed, expiring token
+EXPORT_DIR = 'exports'
+EXPORT_JOB_SALT = 'extraction.export-job'
+EXPORT_JOB_MAX_AGE = 24 * 3600  # seconds
+_export_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='export')
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Documents (or unwound rows) formatted per streamed CSV chunk
+CSV_STREAM_DOCS = 200
+
+# Fields read by DocumentExportView._iter_csv for each document type
+CSV_PROJECTIONS = {
+    doc_type_key: {'id': 1, 'data.header': 1, f'data.{layout.rows_field}': 1}
+    for doc_type_key, layout in CSV_LAYOUTS.items()
+}
+
+
+def _csv_unwind_pipeline(layout):
+    """
+    Aggregation emitting one result per array entry of an indexed layout, newest documents first:
+    {id, header, row, idx}. MongoDB does the flattening instead of the Python loop in _csv_rows.
+    """
+    return [
+        {'$sort': {'created_at': -1}},
+        {'$project': {'_id': 0, 'id': 1, 'header': '$data.header', 'row': f'$data.{layout.rows_field}'}},
+        {'$unwind': {'path': '$row', 'includeArrayIndex': 'idx'}},
+    ]
+
+
+def _csv_rows(layout, documents, unwound=False):
+    """
+    Row tuples for documents following `layout` (document IDs only when it is None).
+    With `unwound=True` the documents are _csv_unwind_pipeline results, one per row.
+    """
+    if unwound:
+        for entry in documents:
+            yield ((entry.get('id', ''),) + layout.header_fields(entry.get('header', {}))
+                   + (entry['idx'],) + layout.row_fields(entry['row']))
+        return
+    if layout is None:
+        for doc in documents:
+            yield (doc.get('id', ''),)
+        return
+    for doc in documents:
+        data = doc.get('data', {})
+        doc_fields = (doc.get('id', ''),) + layout.header_fields(data.get('header', {}))
+        if layout.indexed:
+            for idx, entry in enumerate(data.get(layout.rows_field, [])):
+                yield doc_fields + (idx,) + layout.row_fields(entry)
+        else:
+            yield doc_fields + layout.row_fields(data.get(layout.rows_field, {}))
+
+
+def _document_type_of(data):
+    """Document type declared in a create payload's metadata or data (None if missing)."""
+    if 'metadata' in data and 'document_type' in data['metadata']:
+        return data['metadata']['document_type']
+    if 'data' in data and 'document_type' in data['data']:
+        return data['data']['document_type']
+    return None
 
 
 def serialize_document(doc):
@@ -59,28 +183,22 @@ class DocumentListCreateView(APIView):
         try:
             Model = get_model_by_type(doc_type)
             documents = Model.find_all()
-            # Serialize datetime objects to strings
-            serialized_docs = [serialize_document(doc) for doc in documents]
-            return Response(serialized_docs, status=status.HTTP_200_OK)
+            # Datetimes/ObjectIds are converted by the encoder, no per-document walk
+            return json_response(documents)
         except Exception as e:
-            print(f"[ERROR] Failed to fetch documents: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Failed to fetch documents")
             return Response(
                 {'error': f'Failed to fetch documents: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
     def post(self, request):
-        """Create a new document."""
+        """Create a new document, or several when the body is a JSON array."""
         data = request.data
+        if isinstance(data, list):
+            return self._create_many(data)
         
-        # Extract document type from metadata or data
-        doc_type = None
-        if 'metadata' in data and 'document_type' in data['metadata']:
-            doc_type = data['metadata']['document_type']
-        elif 'data' in data and 'document_type' in data['data']:
-            doc_type = data['data']['document_type']
+        doc_type = _document_type_of(data)
         
         if not doc_type or doc_type not in ['Rebut', 'NPT', 'Kosu']:
             return Response(
@@ -95,14 +213,69 @@ class DocumentListCreateView(APIView):
             serialized_doc = serialize_document(document)
             return Response(serialized_doc, status=status.HTTP_201_CREATED)
         except Exception as e:
-            print(f"[ERROR] Failed to create document: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Failed to create document")
             return Response(
                 {'error': f'Failed to create document: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def _create_many(self, items):
+        """
+        Insert a batch of documents with one unordered insert_many per document type.
+        Not atomic: when some items fail, the response is 207 (or 400/500 when none were
+        stored) with one result per item in request order, including the assigned `id`.
+        """
+        if not items:
+            return Response({'error': 'Empty document list'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        by_type = {}
+        for index, item in enumerate(items):
+            doc_type = _document_type_of(item) if isinstance(item, dict) else None
+            if not doc_type or doc_type not in ['Rebut', 'NPT', 'Kosu']:
+                return Response(
+                    {'error': f'Invalid or missing document type in metadata or data (item {index})'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            by_type.setdefault(doc_type, []).append(index)
+        
+        # Request index -> error message, for items that were not stored
+        failed = {}
+        server_error = False
+        for doc_type, indexes in by_type.items():
+            try:
+                get_model_by_type(doc_type).create_many([items[index] for index in indexes])
+            except BulkWriteError as e:
+                # writeErrors indexes are positions in this type's batch
+                for write_error in e.details.get('writeErrors', []):
+                    failed[indexes[write_error['index']]] = write_error.get('errmsg', 'Write error')
+            except Exception as e:
+                logger.exception("Failed to create %s documents", doc_type)
+                server_error = True
+                for index in indexes:
+                    failed[index] = str(e)
+        
+        # Items were filled in place, so the response keeps the request order
+        if not failed:
+            return Response([serialize_document(item) for item in items], status=status.HTTP_201_CREATED)
+        
+        results = [
+            {'index': index, 'id': item.get('id'), 'status': 'failed', 'error': failed[index]}
+            if index in failed else
+            {'index': index, 'id': item.get('id'), 'status': 'created', 'document': serialize_document(item)}
+            for index, item in enumerate(items)
+        ]
+        created = len(items) - len(failed)
+        if created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        elif server_error:
+            response_status = status.HTTP_500_INTERNAL_SERVER_ERROR
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(
+            {'created': created, 'failed': len(failed), 'results': results},
+            status=response_status
+        )
+
 
 @method_decorator(csrf_exempt, name='dispatch')
 class DocumentDetailView(APIView):
@@ -138,9 +311,7 @@ class DocumentDetailView(APIView):
             serialized_doc = serialize_document(document)
             return Response(serialized_doc, status=status.HTTP_200_OK)
         except Exception as e:
-            print(f"[ERROR] Failed to fetch document: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Failed to fetch document")
             return Response(
                 {'error': f'Failed to fetch document: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -195,9 +366,7 @@ class DocumentDetailView(APIView):
             serialized_doc = serialize_document(document)
             return Response(serialized_doc, status=status.HTTP_200_OK)
         except Exception as e:
-            print(f"[ERROR] Failed to update document: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Failed to update document")
             return Response(
                 {'error': f'Failed to update document: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -268,10 +437,18 @@ class DocumentExportView(APIView):
             )
 
         canonical_doc_type = allowed_types[doc_type_key]
+        timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+
+        if export_format == 'csv' and request.query_params.get('async') in ('1', 'true'):
+            return self._start_export_job(request, canonical_doc_type, timestamp)
 
         try:
             Model = get_model_by_type(canonical_doc_type)
-            documents = Model.find_all()
+            if export_format == 'json':
+                documents = Model.find_all()
+            else:
+                csv_rows = self._export_csv_rows(Model, canonical_doc_type)
+                export_count = Model.count_all()
         except ValueError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
@@ -281,118 +458,146 @@ class DocumentExportView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-        timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-
         if export_format == 'json':
-            serialized_docs = [serialize_document(doc) for doc in documents]
             response = HttpResponse(
-                json.dumps(serialized_docs, indent=2),
+                dumps_json(documents, indent=True),
                 content_type='application/json'
             )
             response['Content-Disposition'] = (
                 f'attachment; filename="{canonical_doc_type.lower()}_export_{timestamp}.json"'
             )
-            response['X-Export-Count'] = str(len(serialized_docs))
-            return response
+            response['X-Export-Count'] = str(len(documents))
+            return gzip_response(request, response)
 
-        csv_content = self._generate_csv(documents, canonical_doc_type)
-        response = HttpResponse(csv_content, content_type='text/csv')
+        response = StreamingHttpResponse(csv_rows, content_type='text/csv')
         response['Content-Disposition'] = (
             f'attachment; filename="{canonical_doc_type.lower()}_export_{timestamp}.csv"'
         )
-        response['X-Export-Count'] = str(len(documents))
-        return response
-
-    def _generate_csv(self, documents, doc_type):
-        """Generate CSV content from documents."""
-        documents = documents or []
-        doc_type_key = (doc_type or '').lower()
-        output = io.StringIO()
-        writer = csv.writer(output)
-
-        # Generate CSV based on document type
-        if doc_type_key == 'rebut':
-            writer.writerow([
-                'Document ID', 'Date', 'Ligne', 'OF Number', 'Item Index',
-                'Reference', 'Designation', 'Quantity', 'Unit', 'Type', 'Total Scrapped'
-            ])
-            
-            for doc in documents:
-                data = doc.get('data', {})
-                header = data.get('header', {})
-                items = data.get('items', [])
-                
-                for idx, item in enumerate(items):
-                    writer.writerow([
-                        doc.get('id', ''),
-                        header.get('date', ''),
-                        header.get('ligne', ''),
-                        header.get('of_number', ''),
-                        idx,
-                        item.get('reference', ''),
-                        item.get('designation', ''),
-                        item.get('quantity', ''),
-                        item.get('unit', ''),
-                        item.get('type', ''),
-                        item.get('total_scrapped', '')
-                    ])
-        
-        elif doc_type_key == 'npt':
-            writer.writerow([
-                'Document ID', 'Date', 'UAP', 'Equipe', 'Event Index',
-                'Codes Ligne', 'Ref PF', 'Designation', 'NPT Minutes',
-                'Heure Debut', 'Heure Fin', 'Cause NPT'
-            ])
-            
-            for doc in documents:
-                data = doc.get('data', {})
-                header = data.get('header', {})
-                events = data.get('downtime_events', [])
-                
-                for idx, event in enumerate(events):
-                    writer.writerow([
-                        doc.get('id', ''),
-                        header.get('date', ''),
-                        header.get('uap', ''),
-                        header.get('equipe', ''),
-                        idx,
-                        event.get('codes_ligne', ''),
-                        event.get('ref_pf', ''),
-                        event.get('designation', ''),
-                        event.get('npt_minutes', ''),
-                        event.get('heure_debut_d_arret', ''),
-                        event.get('heure_fin_d_arret', ''),
-                        event.get('cause_npt', '')
-                    ])
-        
-        elif doc_type_key == 'kosu':
-            writer.writerow([
-                'Document ID', 'Date', 'Nom Ligne', 'Code Ligne', 'Numero OF',
-                'Ref PF', 'Heures Deposees', 'Objectif Qte EQ', 'Qte Realisee'
-            ])
-            
-            for doc in documents:
-                data = doc.get('data', {})
-                header = data.get('header', {})
-                team_summary = data.get('team_summary', {})
-                
-                writer.writerow([
-                    doc.get('id', ''),
-                    header.get('date', ''),
-                    header.get('nom_ligne', ''),
-                    header.get('code_ligne', ''),
-                    header.get('numero_of', ''),
-                    header.get('ref_pf', ''),
-                    team_summary.get('heures_deposees', ''),
-                    team_summary.get('objectif_qte_eq', ''),
-                    team_summary.get('qte_realisee', '')
-                ])
-        else:
-            writer.writerow(['Document ID'])
-            for doc in documents:
-                writer.writerow([doc.get('id', '')])
+        response['X-Export-Count'] = str(export_count)
+        return gzip_response(request, response)
+
+    def _export_csv_rows(self, Model, doc_type):
+        """CSV text chunks for every document of a type (see _iter_csv)."""
+        # Only the fields the CSV reads are fetched, left as raw BSON until a row reads them;
+        # rows are streamed as the cursor is consumed. Array layouts are unwound by MongoDB.
+        doc_type_key = doc_type.lower()
+        layout = CSV_LAYOUTS[doc_type_key]
+        if layout.indexed:
+            return self._iter_csv(
+                Model.aggregate(_csv_unwind_pipeline(layout), raw=True), doc_type, unwound=True
+            )
+        return self._iter_csv(
+            Model.iter_all(projection=CSV_PROJECTIONS[doc_type_key], raw=True), doc_type
+        )
+
+    def _start_export_job(self, request, doc_type, timestamp):
+        """Queue a CSV export on the export pool and return the signed URL it will be served from."""
+        job_id = uuid.uuid4().hex
+        filename = f'{doc_type.lower()}_export_{timestamp}.csv'
+        _export_executor.submit(_run_export_job, job_id, doc_type)
+        token = signing.dumps({'id': job_id, 'filename': filename}, salt=EXPORT_JOB_SALT)
+        return Response({
+            'job_id': job_id,
+            'status': 'pending',
+            'download_url': request.build_absolute_uri(reverse('export-job', args=[token])),
+        }, status=status.HTTP_202_ACCEPTED)
+
+    def _iter_csv(self, documents, doc_type, unwound=False):
+        """
+        Yield CSV text for documents (any iterable, consumed lazily as the response streams).
+        Rows of CSV_STREAM_DOCS documents at a time are formatted with one writerows() call.
+        `unwound` is passed on to _csv_rows.
+        """
+        documents = iter(documents or [])
+        layout = CSV_LAYOUTS.get((doc_type or '').lower())
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        writer.writerow(layout.columns if layout else ['Document ID'])
+        while True:
+            chunk = list(islice(documents, CSV_STREAM_DOCS))
+            if not chunk:
+                break
+            writer.writerows(_csv_rows(layout, chunk, unwound))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            # Header only (no documents)
+            yield buffer.getvalue()
+
+
+def _export_path(job_id, suffix):
+    return f'{EXPORT_DIR}/{job_id}{suffix}'
+
+
+def _prune_old_exports():
+    """Delete export files whose download links have expired."""
+    try:
+        _, files = default_storage.listdir(EXPORT_DIR)
+    except (FileNotFoundError, NotImplementedError):
+        return
+    cutoff = datetime.now() - timedelta(seconds=EXPORT_JOB_MAX_AGE)
+    for name in files:
+        path = f'{EXPORT_DIR}/{name}'
+        try:
+            if default_storage.get_modified_time(path) < cutoff:
+                default_storage.delete(path)
+        except Exception:
+            pass
+
+
+def _run_export_job(job_id, doc_type):
+    """Write a full CSV export to media storage (runs on the export pool, not a request thread)."""
+    _prune_old_exports()
+    try:
+        Model = get_model_by_type(doc_type)
+        with tempfile.TemporaryFile(mode='w+b') as tmp:
+            for chunk in DocumentExportView()._export_csv_rows(Model, doc_type):
+                tmp.write(chunk.encode('utf-8'))
+            tmp.seek(0)
+            default_storage.save(_export_path(job_id, '.csv'), File(tmp))
+        # Written last: storages write the CSV in place, so its existence alone does not mean complete
+        default_storage.save(_export_path(job_id, '.done'), ContentFile(b''))
+        print(f"[DEBUG] Export job {job_id} finished")
+    except Exception as e:
+        print(f"[ERROR] Export job {job_id} failed: {str(e)}")
+        default_storage.save(_export_path(job_id, '.error'), ContentFile(str(e).encode('utf-8')))
+
+
+class ExportJobView(APIView):
+    """Status / download of a background CSV export, addressed by its signed token."""
+    authentication_classes: list = []
+    permission_classes: list = []
 
-        return output.getvalue()
+    def get(self, request, token):
+        try:
+            job = signing.loads(token, salt=EXPORT_JOB_SALT, max_age=EXPORT_JOB_MAX_AGE)
+        except signing.SignatureExpired:
+            return Response({'error': 'Export link expired'}, status=status.HTTP_410_GONE)
+        except signing.BadSignature:
+            return Response({'error': 'Export not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        csv_path = _export_path(job['id'], '.csv')
+        if default_storage.exists(_export_path(job['id'], '.done')):
+            response = FileResponse(
+                default_storage.open(csv_path, 'rb'),
+                as_attachment=True,
+                filename=job['filename'],
+                content_type='text/csv',
+            )
+            return gzip_response(request, response)
+
+        error_path = _export_path(job['id'], '.error')
+        if default_storage.exists(error_path):
+            with default_storage.open(error_path, 'rb') as error_file:
+                message = error_file.read().decode('utf-8', 'replace')
+            return Response(
+                {'job_id': job['id'], 'status': 'failed', 'error': message},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        return Response({'job_id': job['id'], 'status': 'pending'}, status=status.HTTP_202_ACCEPTED)
 
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -413,7 +618,7 @@ class BulkDocumentExportView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        if not doc_ids or not isinstance(doc_ids, list):
+        if not doc_ids or not isinstance(doc_ids, list) or not all(isinstance(doc_id, str) for doc_id in doc_ids):
             return Response(
                 {'error': 'Invalid or missing document IDs'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -421,26 +626,25 @@ class BulkDocumentExportView(APIView):
         
         try:
             Model = get_model_by_type(doc_type)
-            documents = [Model.find_by_id(doc_id) for doc_id in doc_ids]
-            documents = [doc for doc in documents if doc is not None]
+            projection = None if export_format == 'json' else CSV_PROJECTIONS[doc_type.lower()]
+            documents = Model.find_by_ids(doc_ids, projection=projection)
             
             if export_format == 'json':
-                serialized_docs = [serialize_document(doc) for doc in documents]
                 response = HttpResponse(
-                    json.dumps(serialized_docs, indent=2),
+                    dumps_json(documents, indent=True),
                     content_type='application/json'
                 )
                 response['Content-Disposition'] = f'attachment; filename="{doc_type.lower()}_bulk_export.json"'
-                response['X-Export-Count'] = str(len(serialized_docs))
-                return response
+                response['X-Export-Count'] = str(len(documents))
+                return gzip_response(request, response)
 
             # Use the same CSV generation as single export
             export_view = DocumentExportView()
-            csv_content = export_view._generate_csv(documents, doc_type)
-            response = HttpResponse(csv_content, content_type='text/csv')
+            csv_rows = export_view._iter_csv(documents, doc_type)
+            response = StreamingHttpResponse(csv_rows, content_type='text/csv')
             response['Content-Disposition'] = f'attachment; filename="{doc_type.lower()}_bulk_export.csv"'
             response['X-Export-Count'] = str(len(documents))
-            return response
+            return gzip_response(request, response)
                 
         except Exception as e:
             print(f"[ERROR] Failed to export documents: {str(e)}")
@@ -489,25 +693,19 @@ class EnhancedExcelExportView(APIView):
             # Serialize the document
             serialized_doc = serialize_document(document)
             
-            # Generate Excel file
-            excel_file = export_document_to_excel(serialized_doc, doc_type)
+            # Generate the Excel file straight into the response
+            response = HttpResponse(content_type=XLSX_CONTENT_TYPE)
+            export_document_to_excel(serialized_doc, doc_type, sink=response)
             
-            # Create response
             filename = serialized_doc.get('metadata', {}).get('filename', 'document')
             timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-            response = HttpResponse(
-                excel_file.getvalue(),
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
             response['Content-Disposition'] = f'attachment; filename="{filename}_{doc_type.lower()}_{timestamp}.xlsx"'
             response['X-Export-Count'] = '1'
             
             return response
             
         except Exception as e:
-            print(f"[ERROR] Failed to export document to Excel: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Failed to export document to Excel")
             return Response(
                 {'error': f'Failed to export document: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -531,11 +729,16 @@ class EnhancedExcelExportView(APIView):
             # Fetch documents
             Model = get_model_by_type(doc_type)
             
+            if not export_all and isinstance(doc_ids, list) and not all(isinstance(doc_id, str) for doc_id in doc_ids):
+                return Response(
+                    {'error': 'Document IDs must be strings'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
             if export_all:
                 documents = Model.find_all()
             elif doc_ids and isinstance(doc_ids, list):
-                documents = [Model.find_by_id(doc_id) for doc_id in doc_ids]
-                documents = [doc for doc in documents if doc is not None]
+                documents = Model.find_by_ids(doc_ids)
             else:
                 return Response(
                     {'error': 'Either provide document IDs or set export_all to true'},
@@ -551,24 +754,18 @@ class EnhancedExcelExportView(APIView):
             # Serialize documents
             serialized_docs = [serialize_document(doc) for doc in documents]
             
-            # Generate Excel file
-            excel_file = export_documents_to_excel(serialized_docs, doc_type)
+            # Generate the Excel file straight into the response
+            response = HttpResponse(content_type=XLSX_CONTENT_TYPE)
+            export_documents_to_excel(serialized_docs, doc_type, sink=response)
             
-            # Create response
             timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-            response = HttpResponse(
-                excel_file.getvalue(),
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
             response['Content-Disposition'] = f'attachment; filename="{doc_type.lower()}_export_{timestamp}.xlsx"'
             response['X-Export-Count'] = str(len(documents))
             
             return response
             
         except Exception as e:
-            print(f"[ERROR] Failed to export documents to Excel: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Failed to export documents to Excel")
             return Response(
                 {'error': f'Failed to export documents: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
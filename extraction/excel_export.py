@@ -5,14 +5,39 @@ similar to how the frontend displays different document types.
 """
 
 import io
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from copy import copy
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, Any, List
+from functools import lru_cache, partial
+from itertools import zip_longest
+from operator import itemgetter
+from typing import BinaryIO, Callable, Dict, Any, List, Optional, Tuple
 import re
-from openpyxl import Workbook
+from openpyxl import LXML, Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import (
     Font, PatternFill, Alignment, Border, Side
 )
 from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.cell_range import CellRange
+
+from .xlsx_fast import (
+    FastXlsxWriter, render_sheet_xml, STYLE_DEFAULT, STYLE_REBUT_TITLE, STYLE_NPT_TITLE, STYLE_KOSU_TITLE,
+    STYLE_KOSU_SECTION, STYLE_TABLE_HEADER, STYLE_DATA, STYLE_DATA_INT, STYLE_DATA_DECIMAL,
+)
+
+logger = logging.getLogger(__name__)
+
+# Write-only sheets stream through lxml's incremental xmlfile; without lxml openpyxl falls back
+# to a much slower pure-Python writer
+if not LXML:
+    logger.warning("lxml is not installed; openpyxl Excel exports use the slower pure-Python XML writer")
 
 
 class ExcelStyler:
@@ -39,6 +64,34 @@ class ExcelStyler:
     KOSU_HEADER_BG = "F59E0B"  # Amber-500
     KOSU_TABLE_BG = "FBBF24"  # Amber-400
     
+    @staticmethod
+    def solid(color):
+        """Create a solid fill of one color."""
+        return PatternFill(start_color=color, end_color=color, fill_type="solid")
+    
+    # Shared style objects, built once and reused for every cell
+    _THIN_SIDE = Side(style='thin', color=BORDER_COLOR)
+    BORDER = Border(left=_THIN_SIDE, right=_THIN_SIDE, top=_THIN_SIDE, bottom=_THIN_SIDE)
+    TITLE_FONT = Font(name='Arial', size=16, bold=True, color="FFFFFF")
+    KOSU_TITLE_FONT = Font(name='Arial', size=16, bold=True, color="1F2937")
+    COMPANY_FONT = Font(name='Arial', size=12, bold=True)
+    SUBHEADER_FONT = Font(name='Arial', size=12, bold=True, color="FFFFFF")
+    TABLE_HEADER_FONT = Font(name='Arial', size=10, bold=True, color="1E40AF")
+    LABEL_FONT = Font(name='Arial', size=10, bold=True)
+    DATA_FONT = Font(name='Arial', size=10, color="1F2937")
+    CENTER_ALIGN = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    LEFT_ALIGN = Alignment(horizontal='left', vertical='center', wrap_text=True)
+    SUBHEADER_FILL = solid(SUBHEADER_BG)
+    TABLE_HEADER_FILL = solid(TABLE_HEADER_BG)
+    ALT_ROW_FILL = solid(ALT_ROW_BG)
+    LABEL_FILL = ALT_ROW_FILL
+    REBUT_HEADER_FILL = solid(REBUT_HEADER_BG)
+    REBUT_TABLE_FILL = solid(REBUT_TABLE_BG)
+    NPT_HEADER_FILL = solid(NPT_HEADER_BG)
+    NPT_TABLE_FILL = solid(NPT_TABLE_BG)
+    KOSU_HEADER_FILL = solid(KOSU_HEADER_BG)
+    KOSU_TABLE_FILL = solid(KOSU_TABLE_BG)
+    
     @staticmethod
     def get_border(color="D1D5DB"):
         """Create border style."""
@@ -118,776 +171,606 @@ def _set_cell_value(cell, value: Any):
         cell.value = '' if value is None else value
 
 
-class RebutExcelExporter:
-    """Export Rebut documents to styled Excel format."""
+def _styled_cell(ws, value=None, font=None, fill=None, alignment=None, border=None) -> WriteOnlyCell:
+    """Build a write-only cell carrying its value and styles (only the given styles are set)."""
+    cell = WriteOnlyCell(ws, value=value)
+    if font is not None:
+        cell.font = font
+    if fill is not None:
+        cell.fill = fill
+    if alignment is not None:
+        cell.alignment = alignment
+    if border is not None:
+        cell.border = border
+    return cell
+
+
+def _data_cell(ws, value: Any, font=None, fill=None, alignment=None, border=None) -> WriteOnlyCell:
+    """Like _styled_cell, with numeric strings written as numbers (see _set_cell_value)."""
+    cell = _styled_cell(ws, None, font, fill, alignment, border)
+    _set_cell_value(cell, value)
+    return cell
+
+
+def _cell_like(ws, template: WriteOnlyCell, value: Any, numeric: bool = True) -> WriteOnlyCell:
+    """
+    Cell styled like `template` (see _styled_cell): the template's registered style ids are
+    copied in one assignment instead of setting and re-hashing font/fill/alignment/border per cell.
+    With `numeric`, numeric strings are written as numbers (see _set_cell_value).
+    """
+    cell = WriteOnlyCell(ws)
+    cell._style = copy(template._style)
+    if numeric:
+        _set_cell_value(cell, value)
+    else:
+        cell.value = value
+    return cell
+
+
+def _append_header_info(ws, styler: 'ExcelStyler', header_info: List[tuple], row: int, last_col: str) -> int:
+    """
+    Write label/value pairs two per row (A | B:E | F | G:last_col) and return the next free row.
+    Each sheet row is appended as one list; merged-over columns are left empty.
+    """
+    width = ord(last_col) - ord('A') + 1
+    label_style = _styled_cell(ws, None, styler.LABEL_FONT, styler.LABEL_FILL, styler.LEFT_ALIGN, styler.BORDER)
+    value_style = _styled_cell(ws, None, styler.DATA_FONT, None, styler.LEFT_ALIGN, styler.BORDER)
+    # Row layout by index: label A, value B (B:E merged), label F, value G (G:last_col merged)
+    padding = [None] * (width - 7)
+    for (label1, value1), second in zip_longest(header_info[::2], header_info[1::2]):
+        cells = [
+            _cell_like(ws, label_style, label1, numeric=False),
+            _cell_like(ws, value_style, value1),
+            None, None, None,
+        ]
+        _merge(ws, row, 2, 5)
+
+        # Second column pair (if exists)
+        if second is not None:
+            label2, value2 = second
+            cells.append(_cell_like(ws, label_style, label2, numeric=False))
+            cells.append(_cell_like(ws, value_style, value2))
+            cells.extend(padding)
+            _merge(ws, row, 7, width)
+
+        ws.append(cells)
+        row += 1
+    return row
+
+
+@lru_cache(maxsize=256)
+def _pretty(name: str) -> str:
+    """Display title of a data key ('downtime_events' -> 'Downtime Events'); keys repeat across documents."""
+    return name.replace('_', ' ').title()
+
+
+def _fast_data_cell(value: Any) -> tuple:
+    """(value, style) for a bordered data cell in the FastXlsxWriter path (see _set_cell_value)."""
+    numeric_value = _try_convert_to_number(value)
+    if numeric_value is not None:
+        if isinstance(numeric_value, float) and not numeric_value.is_integer():
+            return numeric_value, STYLE_DATA_DECIMAL
+        return numeric_value, STYLE_DATA_INT
+    return ('' if value is None else value), STYLE_DATA
+
+
+def _table_columns(rows: List[Dict[str, Any]]) -> List[tuple]:
+    """Per-column metadata for a table, computed once: (key, header text) from the first row's keys."""
+    return [(key, _pretty(key)) for key in rows[0].keys()]
+
+
+def _row_getter(keys: List[str]) -> Callable[[Dict[str, Any]], tuple]:
+    """
+    Function returning a row dict's values for `keys` as a tuple ('' for missing keys).
+    Complete rows take one itemgetter call; only rows missing a key fall back to per-key get().
+    """
+    if not keys:
+        return lambda item: ()
+    fetch = itemgetter(*keys)
+    if len(keys) == 1:
+        single = fetch
+        fetch = lambda item: (single(item),)
+
+    def values(item):
+        try:
+            return fetch(item)
+        except KeyError:
+            get = item.get
+            return tuple([get(key, '') for key in keys])
+    return values
+
+
+def _append_table(ws, styler: 'ExcelStyler', rows: List[Dict[str, Any]]) -> int:
+    """
+    Append a header row and one row per dict (keys from the first dict) and return the row count.
+    Data rows alternate between a plain and a shaded style bundle.
+    """
+    columns = _table_columns(rows)
+    keys = [key for key, _ in columns]
+    ws.append([
+        _styled_cell(ws, title, styler.TABLE_HEADER_FONT, styler.TABLE_HEADER_FILL,
+                     styler.CENTER_ALIGN, styler.BORDER)
+        for _, title in columns
+    ])
+
+    # Style bundles registered once per table, picked by row parity
+    row_styles = (
+        _styled_cell(ws, None, styler.DATA_FONT, None, styler.LEFT_ALIGN, styler.BORDER),
+        _styled_cell(ws, None, styler.DATA_FONT, styler.ALT_ROW_FILL, styler.LEFT_ALIGN, styler.BORDER),
+    )
+    values = _row_getter(keys)
+    append = ws.append
+    for row_idx, item in enumerate(rows):
+        style = row_styles[row_idx & 1]
+        append([_cell_like(ws, style, value) for value in values(item)])
+    return len(rows) + 1
+
+
+def _is_numeric_table(rows: List[Dict[str, Any]], values: Callable[[Dict[str, Any]], tuple]) -> bool:
+    """True when every cell of the table is a plain int or float (no strings to parse, no bools)."""
+    return all(type(value) in (int, float) for item in rows for value in values(item))
+
+
+def _fast_table_rows(rows: List[Dict[str, Any]], keys: List[str]):
+    """FastXlsxWriter rows for a table: header row, then one bordered data row per dict."""
+    yield [(_pretty(key), STYLE_TABLE_HEADER) for key in keys]
+    values = _row_getter(keys)
+    if _is_numeric_table(rows, values):
+        # Plain int/float values only: pick the number format directly (see _fast_data_cell)
+        for item in rows:
+            yield [
+                (value, STYLE_DATA_DECIMAL if type(value) is float and not value.is_integer() else STYLE_DATA_INT)
+                for value in values(item)
+            ]
+        return
+    for item in rows:
+        yield [_fast_data_cell(value) for value in values(item)]
+
+
+def _merge(ws, row: int, first_col: int, last_col: int):
+    """
+    Record a one-row merged range from integer bounds (no coordinate string to build and parse);
+    write-only sheets emit merges when the workbook is saved.
+    """
+    ws.merged_cells.add(CellRange(min_col=first_col, min_row=row, max_col=last_col, max_row=row))
+
+
+def _finish_output(output: io.BytesIO, sink: Optional[BinaryIO]) -> Optional[io.BytesIO]:
+    """
+    Exports write into the caller's `sink` (e.g. an HttpResponse) when one is given and return None;
+    otherwise they return their own BytesIO, rewound.
+    """
+    if sink is not None:
+        return None
+    output.seek(0)
+    return output
+
+
+def _new_workbook(sheet_title: Optional[str] = None):
+    """
+    Create a write-only workbook (rows are streamed to the XML writer instead of kept as Cell objects).
+    Column widths and row heights must be set before a sheet's first row is appended.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_title) if sheet_title else None
+    return wb, ws
+
+
+# Column letters A.. by zero-based index, computed once
+_COL_LETTERS = tuple(get_column_letter(i) for i in range(1, 60))
+
+
+def _set_column_widths(ws, count: int, width: int = 15):
+    """Set the first `count` column widths; on write-only sheets this must precede the first append."""
+    dimensions = ws.column_dimensions
+    for letter in _COL_LETTERS[:count]:
+        dimensions[letter].width = width
+
+
+def _rebut_header_info(metadata: Dict[str, Any], header: Dict[str, Any]) -> List[tuple]:
+    """Rebut header fields in a 2-column layout (ligne/code_ligne and JAP are conditional)."""
+    header_info = []
+    
+    # Add fields conditionally to avoid duplicates
+    header_info.append(("Filename:", metadata.get('filename', 'N/A')))
+    header_info.append(("Document Type:", metadata.get('document_type', 'Rebut')))
+    header_info.append(("Date:", header.get('date', 'N/A')))
+    
+    # Add Ligne or Code Ligne (but not both if they have the same value)
+    ligne_value = header.get('ligne')
+    code_ligne_value = header.get('code_ligne')
+    
+    if code_ligne_value and code_ligne_value != ligne_value:
+        # Both exist and are different - include both
+        header_info.append(("Ligne:", ligne_value or 'N/A'))
+        header_info.append(("Code Ligne:", code_ligne_value or 'N/A'))
+    elif code_ligne_value:
+        # Only code_ligne exists
+        header_info.append(("Code Ligne:", code_ligne_value or 'N/A'))
+    else:
+        # Only ligne exists (most common case for Rebut)
+        header_info.append(("Code Ligne:", ligne_value or 'N/A'))  # Display as "Code Ligne" as requested
+    
+    header_info.append(("OF Number:", header.get('of_number', 'N/A')))
+    header_info.append(("Mat:", header.get('mat_number', header.get('mat', 'N/A'))))
+    header_info.append(("Equipe:", header.get('equipe', 'N/A')))
+    
+    # Add JAP if it exists
+    if header.get('jap'):
+        header_info.append(("JAP:", header.get('jap', 'N/A')))
     
-    def __init__(self):
+    header_info.append(("Visa:", header.get('visa', 'N/A')))
+    header_info.append(("Processed:", metadata.get('processed_at', 'N/A')))
+    return header_info
+
+
+def _rebut_quick_header(header: Dict[str, Any]) -> List[Optional[str]]:
+    """Row 3 of a multi-document sheet; avoids a duplicate ligne/code_ligne."""
+    ligne_value = header.get('ligne')
+    code_ligne_value = header.get('code_ligne')
+    
+    quick_header = [f"Date: {header.get('date', 'N/A')}", None, None]
+    
+    # Only show Code Ligne (avoid duplicate if both have same value)
+    if code_ligne_value and code_ligne_value != ligne_value:
+        quick_header += [f"Ligne: {ligne_value or 'N/A'}", None, f"Code Ligne: {code_ligne_value or 'N/A'}"]
+    elif code_ligne_value:
+        quick_header += [f"Code Ligne: {code_ligne_value or 'N/A'}", None, None]
+    else:
+        quick_header += [f"Code Ligne: {ligne_value or 'N/A'}", None, None]
+    
+    quick_header.append(f"OF: {header.get('of_number', 'N/A')}")
+    return quick_header
+
+
+def _header_info_from_spec(spec: Tuple[Tuple[str, bool, str, str], ...],
+                           metadata: Dict[str, Any], header: Dict[str, Any]) -> List[tuple]:
+    """Header fields from a constant (label, from_metadata, key, default) spec."""
+    return [
+        (label, (metadata if from_metadata else header).get(key, default))
+        for label, from_metadata, key, default in spec
+    ]
+
+
+# (label, read from metadata (else header), key, default)
+_NPT_HEADER_SPEC = (
+    ("Filename:", True, 'filename', 'N/A'),
+    ("Document Type:", True, 'document_type', 'NPT'),
+    ("Date:", False, 'date', 'N/A'),
+    ("UAP:", False, 'uap', 'N/A'),
+    ("Equipe:", False, 'equipe', 'N/A'),
+    ("Processed:", True, 'processed_at', 'N/A'),
+)
+
+
+def _npt_quick_header(header: Dict[str, Any]) -> List[Optional[str]]:
+    return [f"Date: {header.get('date', 'N/A')}", None, None, None, f"UAP: {header.get('uap', 'N/A')}"]
+
+
+_KOSU_HEADER_SPEC = (
+    ("Filename:", True, 'filename', 'N/A'),
+    ("Document Type:", True, 'document_type', 'Kosu'),
+    ("Date:", False, 'date', 'N/A'),
+    ("Nom Ligne:", False, 'nom_ligne', 'N/A'),
+    ("Code Ligne:", False, 'code_ligne', 'N/A'),
+    ("Numero OF:", False, 'numero_of', 'N/A'),
+    ("Ref PF:", False, 'ref_pf', 'N/A'),
+    ("Processed:", True, 'processed_at', 'N/A'),
+)
+
+
+def _kosu_quick_header(header: Dict[str, Any]) -> List[Optional[str]]:
+    return [f"Date: {header.get('date', 'N/A')}", None, None, None, f"Ligne: {header.get('nom_ligne', 'N/A')}"]
+
+
+@dataclass(frozen=True)
+class DocumentSchema:
+    """Layout of one document type's Excel export."""
+    name: str                   # 'Rebut' -> sheets "Rebut Document" / "Rebut_1"
+    title: str
+    title_font: Font
+    header_fill: PatternFill    # title bar
+    table_fill: PatternFill     # section title bars
+    last_col: str               # title bars and header info span A..last_col
+    header_info: Callable[[Dict[str, Any], Dict[str, Any]], List[tuple]]   # (metadata, header)
+    quick_header: Callable[[Dict[str, Any]], List[Optional[str]]]         # header -> row 3 of multi sheets
+    # (section title, key under data); None exports every list/dict under data as its own section
+    tables: Optional[Tuple[Tuple[str, str], ...]]
+    fast_title_style: int
+    fast_section_style: int = STYLE_DEFAULT
+    show_company: bool = False
+
+    @property
+    def width(self) -> int:
+        return ord(self.last_col) - ord('A') + 1
+
+
+REBUT_SCHEMA = DocumentSchema(
+    name='Rebut',
+    title="Formulaire de déclaration Rebuts",
+    title_font=ExcelStyler.TITLE_FONT,
+    header_fill=ExcelStyler.REBUT_HEADER_FILL,
+    table_fill=ExcelStyler.REBUT_TABLE_FILL,
+    last_col='K',
+    header_info=_rebut_header_info,
+    quick_header=_rebut_quick_header,
+    tables=(("Items Data", 'items'),),
+    fast_title_style=STYLE_REBUT_TITLE,
+    show_company=True,
+)
+
+NPT_SCHEMA = DocumentSchema(
+    name='NPT',
+    title="Non-Productive Time (NPT) Report",
+    title_font=ExcelStyler.TITLE_FONT,
+    header_fill=ExcelStyler.NPT_HEADER_FILL,
+    table_fill=ExcelStyler.NPT_TABLE_FILL,
+    last_col='L',
+    header_info=partial(_header_info_from_spec, _NPT_HEADER_SPEC),
+    quick_header=_npt_quick_header,
+    tables=(("Downtime Events", 'downtime_events'),),
+    fast_title_style=STYLE_NPT_TITLE,
+)
+
+KOSU_SCHEMA = DocumentSchema(
+    name='Kosu',
+    title="Kosu Production Report",
+    title_font=ExcelStyler.KOSU_TITLE_FONT,
+    header_fill=ExcelStyler.KOSU_HEADER_FILL,
+    table_fill=ExcelStyler.KOSU_TABLE_FILL,
+    last_col='L',
+    header_info=partial(_header_info_from_spec, _KOSU_HEADER_SPEC),
+    quick_header=_kosu_quick_header,
+    tables=None,
+    fast_title_style=STYLE_KOSU_TITLE,
+    fast_section_style=STYLE_KOSU_SECTION,
+)
+
+# Keys under `data` that are never exported as sections
+_NON_SECTION_KEYS = frozenset(('header', 'document_type'))
+
+
+class SectionedExcelExporter:
+    """Export documents of one type, laid out by its DocumentSchema, to styled Excel files."""
+    
+    def __init__(self, schema: DocumentSchema):
+        self.schema = schema
         self.styler = ExcelStyler()
     
-    def export_single(self, document: Dict[str, Any]) -> io.BytesIO:
-        """Export a single Rebut document to Excel."""
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Rebut Document"
+    def _banner(self, ws, row: int, text: str, font, fill):
+        """Append a full-width title/section bar at `row`."""
+        _merge(ws, row, 1, self.schema.width)
+        ws.append([_styled_cell(ws, text, font, fill, self.styler.CENTER_ALIGN)])
+    
+    def export_single(self, document: Dict[str, Any], sink: Optional[BinaryIO] = None) -> Optional[io.BytesIO]:
+        """Export a single document to Excel (written into `sink` when given, see _finish_output)."""
+        schema = self.schema
+        wb, ws = _new_workbook(f"{schema.name} Document")
+        _set_column_widths(ws, schema.width)
+        ws.row_dimensions[1].height = 30
         
         # Document Title
-        ws.merge_cells('A1:K1')
-        title_cell = ws['A1']
-        title_cell.value = "Formulaire de déclaration Rebuts"
-        title_cell.font = Font(name='Arial', size=16, bold=True, color="FFFFFF")
-        title_cell.fill = PatternFill(start_color=self.styler.REBUT_HEADER_BG, 
-                                     end_color=self.styler.REBUT_HEADER_BG, 
-                                     fill_type="solid")
-        title_cell.alignment = self.styler.get_center_alignment()
-        ws.row_dimensions[1].height = 30
+        self._banner(ws, 1, schema.title, schema.title_font, schema.header_fill)
         
         # Document Metadata
         row = 2
-        metadata = document.get('metadata', {})
-        data = document.get('data', {})
-        header = data.get('header', {})
+        metadata = document.get('metadata') or {}
+        data = document.get('data') or {}
+        header = data.get('header') or {}
         
         # Company info (if available)
-        if header.get('company'):
-            ws.merge_cells(f'A{row}:K{row}')
-            company_cell = ws[f'A{row}']
-            company_cell.value = header.get('company', 'TTE International - A Onetech company')
-            company_cell.font = Font(name='Arial', size=12, bold=True)
-            company_cell.alignment = self.styler.get_center_alignment()
+        company = header.get('company')
+        if schema.show_company and company:
+            self._banner(ws, row, company, self.styler.COMPANY_FONT, None)
             row += 1
         
         # Add blank row
+        ws.append([])
         row += 1
         
         # Header Information Section
-        ws.merge_cells(f'A{row}:K{row}')
-        header_section_cell = ws[f'A{row}']
-        header_section_cell.value = "Document Information"
-        header_section_cell.font = self.styler.get_subheader_font()
-        header_section_cell.fill = PatternFill(start_color=self.styler.SUBHEADER_BG, 
-                                              end_color=self.styler.SUBHEADER_BG, 
-                                              fill_type="solid")
-        header_section_cell.alignment = self.styler.get_center_alignment()
+        self._banner(ws, row, "Document Information", self.styler.SUBHEADER_FONT, self.styler.SUBHEADER_FILL)
         row += 1
-        
-        # Header fields in a 2-column layout
-        header_info = []
-        
-        # Add fields conditionally to avoid duplicates
-        header_info.append(("Filename:", metadata.get('filename', 'N/A')))
-        header_info.append(("Document Type:", metadata.get('document_type', 'Rebut')))
-        header_info.append(("Date:", header.get('date', 'N/A')))
-        
-        # Add Ligne or Code Ligne (but not both if they have the same value)
-        ligne_value = header.get('ligne')
-        code_ligne_value = header.get('code_ligne')
-        
-        if code_ligne_value and code_ligne_value != ligne_value:
-            # Both exist and are different - include both
-            header_info.append(("Ligne:", ligne_value or 'N/A'))
-            header_info.append(("Code Ligne:", code_ligne_value or 'N/A'))
-        elif code_ligne_value:
-            # Only code_ligne exists
-            header_info.append(("Code Ligne:", code_ligne_value or 'N/A'))
-        else:
-            # Only ligne exists (most common case for Rebut)
-            header_info.append(("Code Ligne:", ligne_value or 'N/A'))  # Display as "Code Ligne" as requested
-        
-        header_info.append(("OF Number:", header.get('of_number', 'N/A')))
-        header_info.append(("Mat:", header.get('mat_number', header.get('mat', 'N/A'))))
-        header_info.append(("Equipe:", header.get('equipe', 'N/A')))
-        
-        # Add JAP if it exists
-        if header.get('jap'):
-            header_info.append(("JAP:", header.get('jap', 'N/A')))
-        
-        header_info.append(("Visa:", header.get('visa', 'N/A')))
-        header_info.append(("Processed:", metadata.get('processed_at', 'N/A')))
-        
-        for i in range(0, len(header_info), 2):
-            # First column pair
-            label1, value1 = header_info[i]
-            ws[f'A{row}'] = label1
-            ws[f'A{row}'].font = Font(name='Arial', size=10, bold=True)
-            ws[f'A{row}'].fill = PatternFill(start_color="F3F4F6", end_color="F3F4F6", fill_type="solid")
-            ws[f'A{row}'].alignment = self.styler.get_left_alignment()
-            ws[f'A{row}'].border = self.styler.get_border()
-            
-            ws.merge_cells(f'B{row}:E{row}')
-            value_cell = ws[f'B{row}']
-            _set_cell_value(value_cell, value1)
-            value_cell.font = self.styler.get_data_font()
-            value_cell.alignment = self.styler.get_left_alignment()
-            value_cell.border = self.styler.get_border()
-            
-            # Second column pair (if exists)
-            if i + 1 < len(header_info):
-                label2, value2 = header_info[i + 1]
-                ws[f'F{row}'] = label2
-                ws[f'F{row}'].font = Font(name='Arial', size=10, bold=True)
-                ws[f'F{row}'].fill = PatternFill(start_color="F3F4F6", end_color="F3F4F6", fill_type="solid")
-                ws[f'F{row}'].alignment = self.styler.get_left_alignment()
-                ws[f'F{row}'].border = self.styler.get_border()
-                
-                ws.merge_cells(f'G{row}:K{row}')
-                value_cell_2 = ws[f'G{row}']
-                _set_cell_value(value_cell_2, value2)
-                value_cell_2.font = self.styler.get_data_font()
-                value_cell_2.alignment = self.styler.get_left_alignment()
-                value_cell_2.border = self.styler.get_border()
-            
-            row += 1
+        row = _append_header_info(ws, self.styler, schema.header_info(metadata, header), row, schema.last_col)
         
         # Add blank row
+        ws.append([])
         row += 1
         
-        # Items Table Section
-        ws.merge_cells(f'A{row}:K{row}')
-        items_header_cell = ws[f'A{row}']
-        items_header_cell.value = "Items Data"
-        items_header_cell.font = self.styler.get_subheader_font()
-        items_header_cell.fill = PatternFill(start_color=self.styler.REBUT_TABLE_BG, 
-                                            end_color=self.styler.REBUT_TABLE_BG, 
-                                            fill_type="solid")
-        items_header_cell.alignment = self.styler.get_center_alignment()
-        row += 1
-        
-        # Table Headers
-        items = data.get('items', [])
-        if items:
-            # Determine columns from first item
-            columns = list(items[0].keys())
-            
-            # Column headers
-            for col_idx, col_name in enumerate(columns, start=1):
-                cell = ws.cell(row=row, column=col_idx)
-                cell.value = col_name.replace('_', ' ').title()
-                cell.font = self.styler.get_table_header_font()
-                cell.fill = PatternFill(start_color=self.styler.TABLE_HEADER_BG, 
-                                       end_color=self.styler.TABLE_HEADER_BG, 
-                                       fill_type="solid")
-                cell.alignment = self.styler.get_center_alignment()
-                cell.border = self.styler.get_border()
-            
-            row += 1
-            
-            # Data rows
-            for item_idx, item in enumerate(items):
-                for col_idx, col_name in enumerate(columns, start=1):
-                    cell = ws.cell(row=row, column=col_idx)
-                    _set_cell_value(cell, item.get(col_name, ''))
-                    cell.font = self.styler.get_data_font()
-                    cell.alignment = self.styler.get_left_alignment()
-                    cell.border = self.styler.get_border()
-                    
-                    # Alternate row colors
-                    if item_idx % 2 == 1:
-                        cell.fill = PatternFill(start_color=self.styler.ALT_ROW_BG, 
-                                               end_color=self.styler.ALT_ROW_BG, 
-                                               fill_type="solid")
-                
-                row += 1
-        
-        # Adjust column widths
-        for col in range(1, 12):
-            ws.column_dimensions[get_column_letter(col)].width = 15
-        
-        # Save to BytesIO
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-        return output
-    
-    def export_multiple(self, documents: List[Dict[str, Any]]) -> io.BytesIO:
-        """Export multiple Rebut documents to Excel with separate sheets."""
-        wb = Workbook()
-        wb.remove(wb.active)  # Remove default sheet
-        
-        for idx, doc in enumerate(documents):
-            ws = wb.create_sheet(title=f"Rebut_{idx+1}")
-            
-            # Similar structure as single export
-            # Document Title
-            ws.merge_cells('A1:K1')
-            title_cell = ws['A1']
-            title_cell.value = "Formulaire de déclaration Rebuts"
-            title_cell.font = Font(name='Arial', size=16, bold=True, color="FFFFFF")
-            title_cell.fill = PatternFill(start_color=self.styler.REBUT_HEADER_BG, 
-                                         end_color=self.styler.REBUT_HEADER_BG, 
-                                         fill_type="solid")
-            title_cell.alignment = self.styler.get_center_alignment()
-            ws.row_dimensions[1].height = 30
-            
-            row = 3
-            data = doc.get('data', {})
-            header = data.get('header', {})
-            items = data.get('items', [])
-            
-            # Quick header info - avoid duplicate ligne/code_ligne
-            ligne_value = header.get('ligne')
-            code_ligne_value = header.get('code_ligne')
-            
-            ws[f'A{row}'] = f"Date: {header.get('date', 'N/A')}"
-            
-            # Only show Code Ligne (avoid duplicate if both have same value)
-            if code_ligne_value and code_ligne_value != ligne_value:
-                ws[f'D{row}'] = f"Ligne: {ligne_value or 'N/A'}"
-                ws[f'F{row}'] = f"Code Ligne: {code_ligne_value or 'N/A'}"
-            elif code_ligne_value:
-                ws[f'D{row}'] = f"Code Ligne: {code_ligne_value or 'N/A'}"
-            else:
-                ws[f'D{row}'] = f"Code Ligne: {ligne_value or 'N/A'}"
-            
-            ws[f'G{row}'] = f"OF: {header.get('of_number', 'N/A')}"
-            row += 2
-            
-            # Items table
-            if items:
-                columns = list(items[0].keys())
-                
-                # Headers
-                for col_idx, col_name in enumerate(columns, start=1):
-                    cell = ws.cell(row=row, column=col_idx)
-                    cell.value = col_name.replace('_', ' ').title()
-                    cell.font = self.styler.get_table_header_font()
-                    cell.fill = PatternFill(start_color=self.styler.TABLE_HEADER_BG, 
-                                           end_color=self.styler.TABLE_HEADER_BG, 
-                                           fill_type="solid")
-                    cell.alignment = self.styler.get_center_alignment()
-                    cell.border = self.styler.get_border()
-                
+        if schema.tables is not None:
+            for section_title, key in schema.tables:
+                rows = data.get(key)
+                if not rows:
+                    continue  # no title bar for an empty table
+                self._banner(ws, row, section_title, self.styler.SUBHEADER_FONT, schema.table_fill)
                 row += 1
+                row += _append_table(ws, self.styler, rows)
+        else:
+            # Export all data sections dynamically
+            for section_key, section_data in data.items():
+                if section_key in _NON_SECTION_KEYS or not section_data:
+                    continue
                 
-                # Data
-                for item in items:
-                    for col_idx, col_name in enumerate(columns, start=1):
-                        cell = ws.cell(row=row, column=col_idx)
-                        _set_cell_value(cell, item.get(col_name, ''))
-                        cell.font = self.styler.get_data_font()
-                        cell.border = self.styler.get_border()
+                if isinstance(section_data, list):
+                    self._banner(ws, row, _pretty(section_key),
+                                 self.styler.SUBHEADER_FONT, schema.table_fill)
                     row += 1
-            
-            # Adjust column widths
-            for col in range(1, len(columns) + 1 if items else 12):
-                ws.column_dimensions[get_column_letter(col)].width = 15
-        
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-        return output
-
-
-class NPTExcelExporter:
-    """Export NPT documents to styled Excel format."""
-    
-    def __init__(self):
-        self.styler = ExcelStyler()
-    
-    def export_single(self, document: Dict[str, Any]) -> io.BytesIO:
-        """Export a single NPT document to Excel."""
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "NPT Document"
-        
-        # Document Title
-        ws.merge_cells('A1:L1')
-        title_cell = ws['A1']
-        title_cell.value = "Non-Productive Time (NPT) Report"
-        title_cell.font = Font(name='Arial', size=16, bold=True, color="FFFFFF")
-        title_cell.fill = PatternFill(start_color=self.styler.NPT_HEADER_BG, 
-                                     end_color=self.styler.NPT_HEADER_BG, 
-                                     fill_type="solid")
-        title_cell.alignment = self.styler.get_center_alignment()
-        ws.row_dimensions[1].height = 30
-        
-        # Document Metadata
-        row = 3
-        metadata = document.get('metadata', {})
-        data = document.get('data', {})
-        header = data.get('header', {})
-        
-        # Header Information Section
-        ws.merge_cells(f'A{row}:L{row}')
-        header_section_cell = ws[f'A{row}']
-        header_section_cell.value = "Document Information"
-        header_section_cell.font = self.styler.get_subheader_font()
-        header_section_cell.fill = PatternFill(start_color=self.styler.SUBHEADER_BG, 
-                                              end_color=self.styler.SUBHEADER_BG, 
-                                              fill_type="solid")
-        header_section_cell.alignment = self.styler.get_center_alignment()
-        row += 1
-        
-        # Header fields
-        header_info = [
-            ("Filename:", metadata.get('filename', 'N/A')),
-            ("Document Type:", metadata.get('document_type', 'NPT')),
-            ("Date:", header.get('date', 'N/A')),
-            ("UAP:", header.get('uap', 'N/A')),
-            ("Equipe:", header.get('equipe', 'N/A')),
-            ("Processed:", metadata.get('processed_at', 'N/A')),
-        ]
-        
-        for i in range(0, len(header_info), 2):
-            # First column pair
-            label1, value1 = header_info[i]
-            ws[f'A{row}'] = label1
-            ws[f'A{row}'].font = Font(name='Arial', size=10, bold=True)
-            ws[f'A{row}'].fill = PatternFill(start_color="F3F4F6", end_color="F3F4F6", fill_type="solid")
-            ws[f'A{row}'].alignment = self.styler.get_left_alignment()
-            ws[f'A{row}'].border = self.styler.get_border()
-            
-            ws.merge_cells(f'B{row}:E{row}')
-            npt_value_cell = ws[f'B{row}']
-            _set_cell_value(npt_value_cell, value1)
-            npt_value_cell.font = self.styler.get_data_font()
-            npt_value_cell.alignment = self.styler.get_left_alignment()
-            npt_value_cell.border = self.styler.get_border()
-            
-            # Second column pair (if exists)
-            if i + 1 < len(header_info):
-                label2, value2 = header_info[i + 1]
-                ws[f'F{row}'] = label2
-                ws[f'F{row}'].font = Font(name='Arial', size=10, bold=True)
-                ws[f'F{row}'].fill = PatternFill(start_color="F3F4F6", end_color="F3F4F6", fill_type="solid")
-                ws[f'F{row}'].alignment = self.styler.get_left_alignment()
-                ws[f'F{row}'].border = self.styler.get_border()
+                    row += _append_table(ws, self.styler, section_data)
                 
-                ws.merge_cells(f'G{row}:L{row}')
-                npt_value_cell_2 = ws[f'G{row}']
-                _set_cell_value(npt_value_cell_2, value2)
-                npt_value_cell_2.font = self.styler.get_data_font()
-                npt_value_cell_2.alignment = self.styler.get_left_alignment()
-                npt_value_cell_2.border = self.styler.get_border()
-            
-            row += 1
-        
-        # Add blank row
-        row += 1
-        
-        # Downtime Events Table
-        ws.merge_cells(f'A{row}:L{row}')
-        events_header_cell = ws[f'A{row}']
-        events_header_cell.value = "Downtime Events"
-        events_header_cell.font = self.styler.get_subheader_font()
-        events_header_cell.fill = PatternFill(start_color=self.styler.NPT_TABLE_BG, 
-                                             end_color=self.styler.NPT_TABLE_BG, 
-                                             fill_type="solid")
-        events_header_cell.alignment = self.styler.get_center_alignment()
-        row += 1
-        
-        # Table data
-        events = data.get('downtime_events', [])
-        if events:
-            columns = list(events[0].keys())
-            
-            # Column headers
-            for col_idx, col_name in enumerate(columns, start=1):
-                cell = ws.cell(row=row, column=col_idx)
-                cell.value = col_name.replace('_', ' ').title()
-                cell.font = self.styler.get_table_header_font()
-                cell.fill = PatternFill(start_color=self.styler.TABLE_HEADER_BG, 
-                                       end_color=self.styler.TABLE_HEADER_BG, 
-                                       fill_type="solid")
-                cell.alignment = self.styler.get_center_alignment()
-                cell.border = self.styler.get_border()
-            
-            row += 1
-            
-            # Data rows
-            for event_idx, event in enumerate(events):
-                for col_idx, col_name in enumerate(columns, start=1):
-                    cell = ws.cell(row=row, column=col_idx)
-                    _set_cell_value(cell, event.get(col_name, ''))
-                    cell.font = self.styler.get_data_font()
-                    cell.alignment = self.styler.get_left_alignment()
-                    cell.border = self.styler.get_border()
+                elif isinstance(section_data, dict):
+                    self._banner(ws, row, _pretty(section_key),
+                                 self.styler.SUBHEADER_FONT, schema.table_fill)
+                    row += 1
                     
-                    # Alternate row colors
-                    if event_idx % 2 == 1:
-                        cell.fill = PatternFill(start_color=self.styler.ALT_ROW_BG, 
-                                               end_color=self.styler.ALT_ROW_BG, 
-                                               fill_type="solid")
-                
-                row += 1
-        
-        # Adjust column widths
-        for col in range(1, 13):
-            ws.column_dimensions[get_column_letter(col)].width = 15
-        
-        # Save to BytesIO
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-        return output
-    
-    def export_multiple(self, documents: List[Dict[str, Any]]) -> io.BytesIO:
-        """Export multiple NPT documents to Excel with separate sheets."""
-        wb = Workbook()
-        wb.remove(wb.active)
-        
-        for idx, doc in enumerate(documents):
-            ws = wb.create_sheet(title=f"NPT_{idx+1}")
-            
-            # Document Title
-            ws.merge_cells('A1:L1')
-            title_cell = ws['A1']
-            title_cell.value = "Non-Productive Time (NPT) Report"
-            title_cell.font = Font(name='Arial', size=16, bold=True, color="FFFFFF")
-            title_cell.fill = PatternFill(start_color=self.styler.NPT_HEADER_BG, 
-                                         end_color=self.styler.NPT_HEADER_BG, 
-                                         fill_type="solid")
-            title_cell.alignment = self.styler.get_center_alignment()
-            ws.row_dimensions[1].height = 30
-            
-            row = 3
-            data = doc.get('data', {})
-            header = data.get('header', {})
-            events = data.get('downtime_events', [])
-            
-            # Quick header
-            ws[f'A{row}'] = f"Date: {header.get('date', 'N/A')}"
-            ws[f'E{row}'] = f"UAP: {header.get('uap', 'N/A')}"
-            row += 2
-            
-            # Events table
-            if events:
-                columns = list(events[0].keys())
-                
-                # Headers
-                for col_idx, col_name in enumerate(columns, start=1):
-                    cell = ws.cell(row=row, column=col_idx)
-                    cell.value = col_name.replace('_', ' ').title()
-                    cell.font = self.styler.get_table_header_font()
-                    cell.fill = PatternFill(start_color=self.styler.TABLE_HEADER_BG, 
-                                           end_color=self.styler.TABLE_HEADER_BG, 
-                                           fill_type="solid")
-                    cell.alignment = self.styler.get_center_alignment()
-                    cell.border = self.styler.get_border()
+                    # Display as key-value pairs
+                    for key, value in section_data.items():
+                        _merge(ws, row, 2, schema.width)
+                        ws.append([
+                            _styled_cell(ws, _pretty(key), self.styler.LABEL_FONT,
+                                         self.styler.LABEL_FILL, border=self.styler.BORDER),
+                            _styled_cell(ws, value, self.styler.DATA_FONT, border=self.styler.BORDER),
+                        ])
+                        row += 1
                 
-                row += 1
+                else:
+                    continue
                 
-                # Data
-                for event in events:
-                    for col_idx, col_name in enumerate(columns, start=1):
-                        cell = ws.cell(row=row, column=col_idx)
-                        _set_cell_value(cell, event.get(col_name, ''))
-                        cell.font = self.styler.get_data_font()
-                        cell.border = self.styler.get_border()
-                    row += 1
-            
-            # Adjust column widths
-            for col in range(1, len(columns) + 1 if events else 13):
-                ws.column_dimensions[get_column_letter(col)].width = 15
+                ws.append([])
+                row += 1  # Blank row between sections
         
-        output = io.BytesIO()
+        output = io.BytesIO() if sink is None else sink
         wb.save(output)
-        output.seek(0)
-        return output
-
-
-class KosuExcelExporter:
-    """Export Kosu documents to styled Excel format."""
+        return _finish_output(output, sink)
     
-    def __init__(self):
-        self.styler = ExcelStyler()
+    def export_multiple(self, documents: List[Dict[str, Any]],
+                        sink: Optional[BinaryIO] = None) -> Optional[io.BytesIO]:
+        """Export multiple documents to Excel with one sheet each (streamed, see xlsx_fast and _finish_output)."""
+        schema = self.schema
+        titles = [f"{schema.name}_{idx+1}" for idx in range(len(documents))]
+        output = io.BytesIO() if sink is None else sink
+        with FastXlsxWriter(output) as book:
+            sheets = _render_sheets_in_pool(schema.name, documents)
+            if sheets is not None:
+                for title, xml in zip(titles, sheets):
+                    book.add_sheet_xml(title, xml)
+            else:
+                for title, doc in zip(titles, documents):
+                    rows, layout = self._sheet(doc.get('data') or {})
+                    book.add_sheet(title, rows, **layout)
+        return _finish_output(output, sink)
+    
+    def _sheet(self, data: Dict[str, Any]):
+        """Row generator and layout keywords (widths, merges, heights) of one export_multiple sheet."""
+        schema = self.schema
+        merges = [f'A1:{schema.last_col}1']
+        
+        # Fixed-table sheets are as wide as their table
+        width = schema.width
+        if schema.tables is not None:
+            rows = data.get(schema.tables[0][1], [])
+            if rows:
+                width = len(rows[0])
+        
+        layout = {'column_widths': [15] * width, 'merges': merges, 'row_heights': {1: 30}}
+        return self._sheet_rows(data, merges), layout
     
-    def export_single(self, document: Dict[str, Any]) -> io.BytesIO:
-        """Export a single Kosu document to Excel."""
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Kosu Document"
+    def _sheet_rows(self, data: Dict[str, Any], merges: List[str]):
+        """
+        Rows of one export_multiple sheet: title, quick header, then the tables.
+        Dynamic (Kosu) sections get a title bar each, whose merge is added to `merges`.
+        """
+        schema = self.schema
         
         # Document Title
-        ws.merge_cells('A1:L1')
-        title_cell = ws['A1']
-        title_cell.value = "Kosu Production Report"
-        title_cell.font = Font(name='Arial', size=16, bold=True, color="1F2937")
-        title_cell.fill = PatternFill(start_color=self.styler.KOSU_HEADER_BG, 
-                                     end_color=self.styler.KOSU_HEADER_BG, 
-                                     fill_type="solid")
-        title_cell.alignment = self.styler.get_center_alignment()
-        ws.row_dimensions[1].height = 30
-        
-        row = 3
-        metadata = document.get('metadata', {})
-        data = document.get('data', {})
-        header = data.get('header', {})
-        
-        # Header Information
-        ws.merge_cells(f'A{row}:L{row}')
-        header_section_cell = ws[f'A{row}']
-        header_section_cell.value = "Document Information"
-        header_section_cell.font = self.styler.get_subheader_font()
-        header_section_cell.fill = PatternFill(start_color=self.styler.SUBHEADER_BG, 
-                                              end_color=self.styler.SUBHEADER_BG, 
-                                              fill_type="solid")
-        header_section_cell.alignment = self.styler.get_center_alignment()
-        row += 1
-        
-        # Header fields
-        header_info = [
-            ("Filename:", metadata.get('filename', 'N/A')),
-            ("Document Type:", metadata.get('document_type', 'Kosu')),
-            ("Date:", header.get('date', 'N/A')),
-            ("Nom Ligne:", header.get('nom_ligne', 'N/A')),
-            ("Code Ligne:", header.get('code_ligne', 'N/A')),
-            ("Numero OF:", header.get('numero_of', 'N/A')),
-            ("Ref PF:", header.get('ref_pf', 'N/A')),
-            ("Processed:", metadata.get('processed_at', 'N/A')),
-        ]
-        
-        for i in range(0, len(header_info), 2):
-            label1, value1 = header_info[i]
-            ws[f'A{row}'] = label1
-            ws[f'A{row}'].font = Font(name='Arial', size=10, bold=True)
-            ws[f'A{row}'].fill = PatternFill(start_color="F3F4F6", end_color="F3F4F6", fill_type="solid")
-            ws[f'A{row}'].alignment = self.styler.get_left_alignment()
-            ws[f'A{row}'].border = self.styler.get_border()
-            
-            ws.merge_cells(f'B{row}:E{row}')
-            header_value_cell = ws[f'B{row}']
-            _set_cell_value(header_value_cell, value1)
-            header_value_cell.font = self.styler.get_data_font()
-            header_value_cell.alignment = self.styler.get_left_alignment()
-            header_value_cell.border = self.styler.get_border()
-            
-            if i + 1 < len(header_info):
-                label2, value2 = header_info[i + 1]
-                ws[f'F{row}'] = label2
-                ws[f'F{row}'].font = Font(name='Arial', size=10, bold=True)
-                ws[f'F{row}'].fill = PatternFill(start_color="F3F4F6", end_color="F3F4F6", fill_type="solid")
-                ws[f'F{row}'].alignment = self.styler.get_left_alignment()
-                ws[f'F{row}'].border = self.styler.get_border()
-                
-                ws.merge_cells(f'G{row}:L{row}')
-                header_value_cell_2 = ws[f'G{row}']
-                _set_cell_value(header_value_cell_2, value2)
-                header_value_cell_2.font = self.styler.get_data_font()
-                header_value_cell_2.alignment = self.styler.get_left_alignment()
-                header_value_cell_2.border = self.styler.get_border()
-            
-            row += 1
-        
-        row += 1
-        
-        # Export all data sections dynamically
-        for section_key in data.keys():
-            if section_key in ['header', 'document_type']:
+        yield [(schema.title, schema.fast_title_style)]
+        yield None
+        
+        # Quick header (row 3)
+        yield [(text, STYLE_DEFAULT) if text else None for text in schema.quick_header(data.get('header') or {})]
+        yield None
+        row = 5
+        
+        if schema.tables is not None:
+            for _, key in schema.tables:
+                rows = data.get(key, [])
+                if rows:
+                    yield from _fast_table_rows(rows, list(rows[0].keys()))
+            return
+        
+        for section_key, section_data in data.items():
+            if section_key in _NON_SECTION_KEYS or not isinstance(section_data, list) or not section_data:
                 continue
-            
-            section_data = data.get(section_key)
-            
-            if isinstance(section_data, list) and section_data:
-                # Section Header
-                ws.merge_cells(f'A{row}:L{row}')
-                section_header_cell = ws[f'A{row}']
-                section_header_cell.value = section_key.replace('_', ' ').title()
-                section_header_cell.font = self.styler.get_subheader_font()
-                section_header_cell.fill = PatternFill(start_color=self.styler.KOSU_TABLE_BG, 
-                                                      end_color=self.styler.KOSU_TABLE_BG, 
-                                                      fill_type="solid")
-                section_header_cell.alignment = self.styler.get_center_alignment()
-                row += 1
-                
-                # Table
-                columns = list(section_data[0].keys())
-                
-                # Headers
-                for col_idx, col_name in enumerate(columns, start=1):
-                    cell = ws.cell(row=row, column=col_idx)
-                    cell.value = col_name.replace('_', ' ').title()
-                    cell.font = self.styler.get_table_header_font()
-                    cell.fill = PatternFill(start_color=self.styler.TABLE_HEADER_BG, 
-                                           end_color=self.styler.TABLE_HEADER_BG, 
-                                           fill_type="solid")
-                    cell.alignment = self.styler.get_center_alignment()
-                    cell.border = self.styler.get_border()
-                
-                row += 1
-                
-                # Data
-                for item_idx, item in enumerate(section_data):
-                    for col_idx, col_name in enumerate(columns, start=1):
-                        cell = ws.cell(row=row, column=col_idx)
-                        _set_cell_value(cell, item.get(col_name, ''))
-                        cell.font = self.styler.get_data_font()
-                        cell.alignment = self.styler.get_left_alignment()
-                        cell.border = self.styler.get_border()
-                        
-                        if item_idx % 2 == 1:
-                            cell.fill = PatternFill(start_color=self.styler.ALT_ROW_BG, 
-                                                   end_color=self.styler.ALT_ROW_BG, 
-                                                   fill_type="solid")
-                    
-                    row += 1
-                
-                row += 1  # Blank row between sections
-            
-            elif isinstance(section_data, dict):
-                # Section Header
-                ws.merge_cells(f'A{row}:L{row}')
-                section_header_cell = ws[f'A{row}']
-                section_header_cell.value = section_key.replace('_', ' ').title()
-                section_header_cell.font = self.styler.get_subheader_font()
-                section_header_cell.fill = PatternFill(start_color=self.styler.KOSU_TABLE_BG, 
-                                                      end_color=self.styler.KOSU_TABLE_BG, 
-                                                      fill_type="solid")
-                section_header_cell.alignment = self.styler.get_center_alignment()
-                row += 1
-                
-                # Display as key-value pairs
-                for key, value in section_data.items():
-                    ws[f'A{row}'] = key.replace('_', ' ').title()
-                    ws[f'A{row}'].font = Font(name='Arial', size=10, bold=True)
-                    ws[f'A{row}'].fill = PatternFill(start_color="F3F4F6", end_color="F3F4F6", fill_type="solid")
-                    ws[f'A{row}'].border = self.styler.get_border()
-                    
-                    ws.merge_cells(f'B{row}:L{row}')
-                    ws[f'B{row}'] = value
-                    ws[f'B{row}'].font = self.styler.get_data_font()
-                    ws[f'B{row}'].border = self.styler.get_border()
-                    
-                    row += 1
-                
-                row += 1
-        
-        # Adjust column widths
-        for col in range(1, 13):
-            ws.column_dimensions[get_column_letter(col)].width = 15
-        
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-        return output
-    
-    def export_multiple(self, documents: List[Dict[str, Any]]) -> io.BytesIO:
-        """Export multiple Kosu documents to Excel with separate sheets."""
-        wb = Workbook()
-        wb.remove(wb.active)
-        
-        for idx, doc in enumerate(documents):
-            ws = wb.create_sheet(title=f"Kosu_{idx+1}")
-            
-            # Document Title
-            ws.merge_cells('A1:L1')
-            title_cell = ws['A1']
-            title_cell.value = "Kosu Production Report"
-            title_cell.font = Font(name='Arial', size=16, bold=True, color="1F2937")
-            title_cell.fill = PatternFill(start_color=self.styler.KOSU_HEADER_BG, 
-                                         end_color=self.styler.KOSU_HEADER_BG, 
-                                         fill_type="solid")
-            title_cell.alignment = self.styler.get_center_alignment()
-            
-            row = 3
-            data = doc.get('data', {})
-            header = data.get('header', {})
-            
-            # Quick header
-            ws[f'A{row}'] = f"Date: {header.get('date', 'N/A')}"
-            ws[f'E{row}'] = f"Ligne: {header.get('nom_ligne', 'N/A')}"
-            row += 2
-            
-            # Export data sections
-            for section_key in data.keys():
-                if section_key in ['header', 'document_type']:
-                    continue
-                
-                section_data = data.get(section_key)
-                
-                if isinstance(section_data, list) and section_data:
-                    # Section header
-                    ws.merge_cells(f'A{row}:L{row}')
-                    ws[f'A{row}'] = section_key.replace('_', ' ').title()
-                    ws[f'A{row}'].font = self.styler.get_subheader_font()
-                    ws[f'A{row}'].fill = PatternFill(start_color=self.styler.KOSU_TABLE_BG, 
-                                                     end_color=self.styler.KOSU_TABLE_BG, 
-                                                     fill_type="solid")
-                    ws[f'A{row}'].alignment = self.styler.get_center_alignment()
-                    row += 1
-                    
-                    columns = list(section_data[0].keys())
-                    
-                    # Headers
-                    for col_idx, col_name in enumerate(columns, start=1):
-                        cell = ws.cell(row=row, column=col_idx)
-                        cell.value = col_name.replace('_', ' ').title()
-                        cell.font = self.styler.get_table_header_font()
-                        cell.fill = PatternFill(start_color=self.styler.TABLE_HEADER_BG, 
-                                               end_color=self.styler.TABLE_HEADER_BG, 
-                                               fill_type="solid")
-                        cell.alignment = self.styler.get_center_alignment()
-                        cell.border = self.styler.get_border()
-                    
-                    row += 1
-                    
-                    # Data
-                    for item in section_data:
-                        for col_idx, col_name in enumerate(columns, start=1):
-                            cell = ws.cell(row=row, column=col_idx)
-                            _set_cell_value(cell, item.get(col_name, ''))
-                            cell.font = self.styler.get_data_font()
-                            cell.border = self.styler.get_border()
-                        row += 1
-                    
-                    row += 1
-            
-            # Adjust column widths
-            for col in range(1, 13):
-                ws.column_dimensions[get_column_letter(col)].width = 15
-        
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-        return output
+            merges.append(f'A{row}:{schema.last_col}{row}')
+            yield [(_pretty(section_key), schema.fast_section_style)]
+            yield from _fast_table_rows(section_data, list(section_data[0].keys()))
+            yield None
+            row += len(section_data) + 3
+
+
+EXCEL_EXPORTERS = {
+    schema.name: SectionedExcelExporter(schema)
+    for schema in (REBUT_SCHEMA, NPT_SCHEMA, KOSU_SCHEMA)
+}
+
+# Multi-document exports with at least this many documents render their sheets in worker
+# processes (sheet XML generation is pure-Python and CPU-bound); smaller ones stay in-process
+PARALLEL_SHEETS_MIN_DOCS = 16
+SHEET_PROCESS_WORKERS = min(4, os.cpu_count() or 1)
+_sheet_pool: Optional[ProcessPoolExecutor] = None
+_sheet_pool_lock = threading.Lock()
+
+
+def _render_sheet(schema_name: str, data: Dict[str, Any]) -> bytes:
+    """Worker entry point: one export_multiple sheet as worksheet XML."""
+    rows, layout = EXCEL_EXPORTERS[schema_name]._sheet(data)
+    return render_sheet_xml(rows, **layout)
 
 
-def export_document_to_excel(document: Dict[str, Any], doc_type: str) -> io.BytesIO:
+def _get_sheet_pool() -> ProcessPoolExecutor:
+    global _sheet_pool
+    with _sheet_pool_lock:
+        if _sheet_pool is None:
+            # spawn: forking a threaded server process (MongoDB client, export threads) is unsafe
+            _sheet_pool = ProcessPoolExecutor(
+                max_workers=SHEET_PROCESS_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _sheet_pool
+
+
+def _render_sheets_in_pool(schema_name: str, documents: List[Dict[str, Any]]) -> Optional[List[bytes]]:
+    """Sheet XML for every document rendered across worker processes, or None to render in-process."""
+    global _sheet_pool
+    if len(documents) < PARALLEL_SHEETS_MIN_DOCS or SHEET_PROCESS_WORKERS < 2:
+        return None
+    try:
+        pool = _get_sheet_pool()
+        return list(pool.map(
+            partial(_render_sheet, schema_name),
+            [doc.get('data') or {} for doc in documents],
+            chunksize=4,
+        ))
+    except BrokenProcessPool as e:
+        logger.warning("Excel sheet worker pool failed, rendering in-process: %s", e)
+        with _sheet_pool_lock:
+            _sheet_pool = None
+        return None
+
+
+def _get_exporter(doc_type: str) -> SectionedExcelExporter:
+    exporter = EXCEL_EXPORTERS.get(doc_type)
+    if exporter is None:
+        raise ValueError(f"Unsupported document type: {doc_type}")
+    return exporter
+
+
+def export_document_to_excel(document: Dict[str, Any], doc_type: str,
+                             sink: Optional[BinaryIO] = None) -> Optional[io.BytesIO]:
     """
     Main function to export a single document to Excel based on type.
     
     Args:
         document: The document data dictionary
         doc_type: The document type ('Rebut', 'NPT', 'Kosu')
+        sink: Optional writable file object (e.g. an HttpResponse) receiving the file
     
     Returns:
-        BytesIO object containing the Excel file
+        BytesIO object containing the Excel file, or None when written into `sink`
     """
-    if doc_type == 'Rebut':
-        exporter = RebutExcelExporter()
-        return exporter.export_single(document)
-    elif doc_type == 'NPT':
-        exporter = NPTExcelExporter()
-        return exporter.export_single(document)
-    elif doc_type == 'Kosu':
-        exporter = KosuExcelExporter()
-        return exporter.export_single(document)
-    else:
-        raise ValueError(f"Unsupported document type: {doc_type}")
+    return _get_exporter(doc_type).export_single(document, sink)
 
 
-def export_documents_to_excel(documents: List[Dict[str, Any]], doc_type: str) -> io.BytesIO:
+def export_documents_to_excel(documents: List[Dict[str, Any]], doc_type: str,
+                              sink: Optional[BinaryIO] = None) -> Optional[io.BytesIO]:
     """
     Main function to export multiple documents to Excel based on type.
     
     Args:
         documents: List of document data dictionaries
         doc_type: The document type ('Rebut', 'NPT', 'Kosu')
+        sink: Optional writable file object (e.g. an HttpResponse) receiving the file
     
     Returns:
-        BytesIO object containing the Excel file with multiple sheets
+        BytesIO object containing the Excel file with multiple sheets, or None when written into `sink`
     """
-    if doc_type == 'Rebut':
-        exporter = RebutExcelExporter()
-        return exporter.export_multiple(documents)
-    elif doc_type == 'NPT':
-        exporter = NPTExcelExporter()
-        return exporter.export_multiple(documents)
-    elif doc_type == 'Kosu':
-        exporter = KosuExcelExporter()
-        return exporter.export_multiple(documents)
-    else:
-        raise ValueError(f"Unsupported document type: {doc_type}")
-
-
-
-
+    return _get_exporter(doc_type).export_multiple(documents, sink)
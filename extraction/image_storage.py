@@ -1,11 +1,42 @@
 import os
+import tempfile
 import uuid
 from django.conf import settings
-from django.core.files.storage import default_storage
+from django.core.files.storage import FileSystemStorage, default_storage
 from django.core.files.base import ContentFile
 from typing import Optional
 import hashlib
 
+def _short_hash(data: bytes) -> str:
+    """8 hex chars identifying the content in generated filenames (not a security hash)."""
+    return hashlib.blake2b(data, digest_size=4).hexdigest()
+
+def _save_media_file(relative_path: str, content: bytes) -> str:
+    """
+    Store `content` under `relative_path` and return its media URL.
+    Names are already unique (uuid4 + content hash), so on local disk the file is written
+    directly (temp file + atomic rename) without Storage.save's name-availability probing;
+    other storage backends go through the storage API.
+    """
+    if isinstance(default_storage, FileSystemStorage):
+        abs_path = default_storage.path(relative_path)
+        directory = os.path.dirname(abs_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                tmp.write(content)
+            if default_storage.file_permissions_mode is not None:
+                os.chmod(tmp_path, default_storage.file_permissions_mode)
+            os.replace(tmp_path, abs_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        saved_path = relative_path.replace(os.sep, '/')
+    else:
+        saved_path = default_storage.save(relative_path, ContentFile(content))
+    return f"{settings.MEDIA_URL.rstrip('/')}/{saved_path}"
+
 def save_uploaded_image(file_content: bytes, original_filename: str) -> str:
     """
     Save uploaded image to media directory and return the URL path.
@@ -19,7 +50,7 @@ def save_uploaded_image(file_content: bytes, original_filename: str) -> str:
     """
     try:
         # Generate unique filename to avoid conflicts
-        file_hash = hashlib.md5(file_content).hexdigest()[:8]
+        file_hash = _short_hash(file_content)
         file_extension = os.path.splitext(original_filename)[1].lower()
         
         # Fallback to .jpg if no extension
@@ -31,13 +62,8 @@ def save_uploaded_image(file_content: bytes, original_filename: str) -> str:
         # Create relative path for storage
         relative_path = os.path.join('images', unique_filename)
         
-        # Save file using Django's storage system
-        content_file = ContentFile(file_content)
-        saved_path = default_storage.save(relative_path, content_file)
-        
-        # Return URL path that can be accessed via /media/
-        # Ensure no double slash by using settings.MEDIA_URL
-        return f"{settings.MEDIA_URL}{saved_path}".replace('//', '/')
+        # Save the file and return the URL path that can be accessed via /media/
+        return _save_media_file(relative_path, file_content)
         
     except Exception as e:
         print(f"[ERROR] Failed to save image: {str(e)}")
@@ -56,19 +82,29 @@ def save_image_from_bytes(image_bytes: bytes, filename_prefix: str = "extracted"
     """
     try:
         # Generate unique filename
-        file_hash = hashlib.md5(image_bytes).hexdigest()[:8]
+        file_hash = _short_hash(image_bytes)
         unique_filename = f"{filename_prefix}_{uuid.uuid4().hex}_{file_hash}.jpg"
         
         # Create relative path for storage
         relative_path = os.path.join('images', unique_filename)
         
-        # Save file
-        content_file = ContentFile(image_bytes)
-        saved_path = default_storage.save(relative_path, content_file)
-        
-        # Return URL path
-        return f"{settings.MEDIA_URL}{saved_path}".replace('//', '/')
+        # Save file and return its URL path
+        return _save_media_file(relative_path, image_bytes)
         
     except Exception as e:
         print(f"[ERROR] Failed to save image bytes: {str(e)}")
-        return None
\ No newline at end of file
+        return None
+
+def open_saved_image(image_url: str):
+    """
+    Open an image previously stored by `save_image_from_bytes` / `save_uploaded_image`.
+    
+    Args:
+        image_url: The URL path those functions returned (MEDIA_URL + storage name)
+        
+    Returns:
+        A binary file object from the storage backend (use as a context manager)
+    """
+    media_url = f"{settings.MEDIA_URL.rstrip('/')}/"
+    name = image_url[len(media_url):] if image_url.startswith(media_url) else image_url.lstrip('/')
+    return default_storage.open(name, 'rb')
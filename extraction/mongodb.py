@@ -3,7 +3,9 @@ MongoDB connection and utilities for document storage.
 All database operations should go through this module.
 """
 import os
-from typing import Optional
+from typing import Dict, Optional
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
 from pymongo import MongoClient
 from pymongo.database import Database
 from pymongo.collection import Collection
@@ -11,6 +13,12 @@ from django.conf import settings
 
 _client: Optional[MongoClient] = None
 _db: Optional[Database] = None
+# Collection objects by name, reused across requests; cleared with the client
+_collections: Dict[str, Collection] = {}
+_raw_collections: Dict[str, Collection] = {}
+
+# Read-only handles return RawBSONDocument: fields are decoded only when accessed
+RAW_CODEC_OPTIONS = CodecOptions(document_class=RawBSONDocument)
 
 
 def get_mongodb_client() -> MongoClient:
@@ -21,9 +29,17 @@ def get_mongodb_client() -> MongoClient:
         if not mongodb_uri:
             raise ValueError("MONGODB_URI is not configured in settings")
         
-        # Use simple connection - pymongo handles SSL/TLS automatically for mongodb+srv://
-        # This worked before, keeping it simple
-        _client = MongoClient(mongodb_uri)
+        # pymongo handles SSL/TLS automatically for mongodb+srv://; these keywords override URI options
+        _client = MongoClient(
+            mongodb_uri,
+            maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+            minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+            maxIdleTimeMS=settings.MONGODB_MAX_IDLE_TIME_MS,
+            compressors=settings.MONGODB_COMPRESSORS,
+            zlibCompressionLevel=1,
+            retryReads=True,
+            retryWrites=True,
+        )
     
     return _client
 
@@ -39,9 +55,21 @@ def get_database() -> Database:
 
 
 def get_collection(collection_name: str) -> Collection:
-    """Get a MongoDB collection by name."""
-    db = get_database()
-    return db[collection_name]
+    """Get a MongoDB collection by name (resolved once per connection)."""
+    collection = _collections.get(collection_name)
+    if collection is None:
+        collection = _collections[collection_name] = get_database()[collection_name]
+    return collection
+
+
+def get_raw_collection(collection_name: str) -> Collection:
+    """Get a read-only handle on a collection that yields lazily decoded RawBSONDocuments."""
+    collection = _raw_collections.get(collection_name)
+    if collection is None:
+        collection = _raw_collections[collection_name] = get_collection(collection_name).with_options(
+            codec_options=RAW_CODEC_OPTIONS
+        )
+    return collection
 
 
 def close_connection():
@@ -51,6 +79,8 @@ def close_connection():
         _client.close()
         _client = None
         _db = None
+        _collections.clear()
+        _raw_collections.clear()
 
 
 def reset_connection():
@@ -60,3 +90,21 @@ def reset_connection():
         _client.close()
     _client = None
     _db = None
+    _collections.clear()
+    _raw_collections.clear()
+
+
+def _forget_connection_after_fork():
+    """
+    A forked child must not reuse the parent's client (its pool sockets and monitor threads
+    belong to the parent): drop the references without closing them, the next call reconnects.
+    """
+    global _client, _db
+    _client = None
+    _db = None
+    _collections.clear()
+    _raw_collections.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_connection_after_fork)
@@ -1,10 +1,15 @@
 """PDF processing utilities for splitting and converting PDFs to images."""
 
 import io
+import multiprocessing
 import os
+import shutil
 import tempfile
-from typing import List, Tuple, BinaryIO
-from PIL import Image
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple, BinaryIO, Union
 import logging
 
 try:
@@ -13,82 +18,284 @@ try:
 except ImportError:
     PDF_LIBS_AVAILABLE = False
 
+# libvips is optional (needs the system library); when present, uniform-size PDFs are
+# rendered in one native pass and sliced into pages
+try:
+    import pyvips  # type: ignore
+    VIPS_AVAILABLE = True
+except Exception:
+    VIPS_AVAILABLE = False
+
+# PyTurboJPEG is optional (needs the system libturbojpeg); it encodes straight from the
+# pixel buffer with libjpeg-turbo's SIMD paths instead of going through a PIL save
+try:
+    import numpy as np
+    from turbojpeg import TurboJPEG, TJPF_RGB, TJSAMP_420  # type: ignore
+    _TURBOJPEG = TurboJPEG()
+except Exception:
+    _TURBOJPEG = None
+
 logger = logging.getLogger(__name__)
 
+# A PDF is either raw bytes or the path of an upload Django already spooled to disk
+PdfSource = Union[bytes, str]
+
+# split_pdf_to_images renders on-disk PDFs with at least this many pages across worker processes,
+# each opening the PDF itself and rendering a contiguous page range (PyMuPDF is not thread-safe, so
+# pages cannot be spread over threads sharing one document)
+PARALLEL_PAGES_MIN = 8
+PAGE_RENDER_WORKERS = min(4, os.cpu_count() or 1)
+_page_pool: Optional[ProcessPoolExecutor] = None
+_page_pool_lock = threading.Lock()
+
 def is_pdf_file(file_content: bytes) -> bool:
     """Check if the file content is a PDF."""
     return file_content.startswith(b'%PDF-')
 
-def split_pdf_to_images(file_content: bytes, dpi: int = 150, format: str = 'JPEG') -> List[Tuple[int, bytes]]:
+def encode_jpeg(image, quality: int = 85) -> bytes:
+    """Encode an RGB PIL image as JPEG (4:2:0), via libjpeg-turbo directly when available."""
+    if _TURBOJPEG is not None:
+        return _TURBOJPEG.encode(np.asarray(image), quality=quality, pixel_format=TJPF_RGB, jpeg_subsample=TJSAMP_420)
+    # Baseline, standard Huffman tables: optimize/progressive cost encode time for a few % of size
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=quality, subsampling=2, optimize=False, progressive=False)
+    return buffer.getvalue()
+
+# Formats PyMuPDF encodes natively (Pixmap.tobytes); others go through PIL
+_PIXMAP_FORMATS = frozenset({'png', 'pnm', 'pgm', 'ppm', 'pbm', 'pam', 'psd', 'ps'})
+
+def _pixmap_to_jpeg(pix, quality: int = 85) -> bytes:
+    """Encode an RGB PyMuPDF pixmap as JPEG without building a PIL image."""
+    if _TURBOJPEG is not None:
+        pixels = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+        return _TURBOJPEG.encode(pixels, quality=quality, pixel_format=TJPF_RGB, jpeg_subsample=TJSAMP_420)
+    return pix.tobytes("jpeg", jpg_quality=quality)
+
+def read_upload_header(uploaded_file, size: int = 5) -> bytes:
+    """Read the first bytes of an upload (enough for `is_pdf_file`) and rewind it."""
+    header = uploaded_file.read(size)
+    uploaded_file.seek(0)
+    return header
+
+def get_pdf_source(uploaded_file) -> str:
     """
-    Split a PDF into individual page images using PyMuPDF (cloud-ready, no system dependencies).
+    Return the temp-file path of an upload so PyMuPDF can open it directly
+    (uploads are always streamed to disk, see FILE_UPLOAD_HANDLERS).
+    """
+    return uploaded_file.temporary_file_path()
+
+def detach_pdf_source(uploaded_file) -> str:
+    """
+    Like `get_pdf_source`, but the result stays valid after the request ends
+    (Django deletes its upload temp file on close). The upload gets a hard link in the
+    system temp directory (a copy if linking fails, e.g. across filesystems); remove it
+    with `cleanup_temp_file`.
+    """
+    src = uploaded_file.temporary_file_path()
+    fd, path = tempfile.mkstemp(suffix='.pdf')
+    os.close(fd)
+    try:
+        os.remove(path)
+        os.link(src, path)
+    except OSError:
+        shutil.copyfile(src, path)
+    return path
+
+def _open_pdf(source: PdfSource):
+    """Open a PDF from a file path or from bytes."""
+    if isinstance(source, str):
+        return fitz.open(source, filetype="pdf")
+    return fitz.open(stream=source, filetype="pdf")
+
+@contextmanager
+def open_pdf(source: PdfSource):
+    """Open a PDF (see `_open_pdf`) for the duration of a `with` block."""
+    pdf_document = _open_pdf(source)
+    try:
+        yield pdf_document
+    finally:
+        pdf_document.close()
+
+def _load_pdf_strip(file_content: PdfSource, dpi: int):
+    """
+    Load every page as one tall libvips image (lazily, sequential access).
+    
+    Returns:
+        (strip, page_count, page_height), or None when page sizes differ and the
+        strip cannot be sliced evenly
+    """
+    options = {'n': -1, 'dpi': dpi, 'access': 'sequential'}
+    if isinstance(file_content, str):
+        strip = pyvips.Image.pdfload(file_content, **options)
+    else:
+        strip = pyvips.Image.pdfload_buffer(file_content, **options)
+    page_count = strip.get('n-pages')
+    page_height = strip.get('page-height') if strip.get_typeof('page-height') else 0
+    if not page_height or page_height * page_count != strip.height:
+        return None
+    return strip, page_count, page_height
+
+def _iter_pdf_strip_pages(strip, page_count: int, page_height: int, format: str) -> Iterator[Tuple[int, bytes]]:
+    """Slice a `_load_pdf_strip` image into per-page encoded images, top to bottom."""
+    for page_num in range(page_count):
+        tile = strip.crop(0, page_num * page_height, strip.width, page_height)
+        if tile.hasalpha():
+            tile = tile.flatten(background=[255, 255, 255])
+        if format.upper() == 'JPEG':
+            image_bytes = tile.jpegsave_buffer(Q=85)
+        else:
+            image_bytes = tile.write_to_buffer(f'.{format.lower()}')
+        logger.info(f"Converted page {page_num + 1} to {format}, size: {len(image_bytes)} bytes")
+        yield page_num + 1, image_bytes
+
+def iter_pdf_pages(file_content: PdfSource, dpi: int = 150, format: str = 'JPEG') -> Iterator[Tuple[int, bytes]]:
+    """
+    Render PDF pages one at a time, yielding each page as soon as it is encoded.
+    Uses a single libvips pass when pyvips is installed and all pages share one size,
+    PyMuPDF otherwise.
     
     Args:
-        file_content: PDF file content as bytes
+        file_content: PDF file content as bytes, or a path to the PDF on disk
         dpi: Resolution for the converted images (default: 150)
         format: Output image format (default: 'JPEG')
     
-    Returns:
-        List of tuples (page_number, image_bytes)
+    Yields:
+        Tuples (page_number, image_bytes), 1-indexed
     """
+    if VIPS_AVAILABLE:
+        try:
+            loaded = _load_pdf_strip(file_content, dpi)
+        except Exception as e:
+            logger.warning(f"libvips could not load PDF, falling back to PyMuPDF: {str(e)}")
+            loaded = None
+        if loaded:
+            yield from _iter_pdf_strip_pages(*loaded, format=format)
+            return
+    
     if not PDF_LIBS_AVAILABLE:
         raise ImportError("PyMuPDF (fitz) library not available")
     
-    pages = []
+    try:
+        # Open PDF from bytes or path using PyMuPDF
+        pdf_document = _open_pdf(file_content)
+    except Exception as e:
+        logger.error(f"Error opening PDF: {str(e)}")
+        raise Exception(f"Failed to split PDF: {str(e)}")
     
     try:
-        # Open PDF from bytes using PyMuPDF
-        pdf_document = fitz.open(stream=file_content, filetype="pdf")
-        
-        logger.info(f"PDF has {pdf_document.page_count} pages")
-        
-        for page_num in range(pdf_document.page_count):
-            # Get the page
-            page = pdf_document[page_num]
-            
-            # Create transformation matrix for DPI scaling
-            # PyMuPDF default is 72 DPI, so we scale accordingly
-            scale_factor = dpi / 72.0
-            mat = fitz.Matrix(scale_factor, scale_factor)
-            
-            # Render page to pixmap (image)
-            pix = page.get_pixmap(matrix=mat)
-            
-            # Convert to PIL Image
-            img_data = pix.tobytes("ppm")
-            img = Image.open(io.BytesIO(img_data))
-            
-            # Convert to target format
-            output_buffer = io.BytesIO()
-            
-            if format.upper() == 'JPEG':
-                # Convert to RGB if necessary (remove alpha channel)
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    img = img.convert('RGB')
-                img.save(output_buffer, format='JPEG', quality=85, optimize=True)
-            else:
-                img.save(output_buffer, format=format)
-            
-            image_bytes = output_buffer.getvalue()
-            pages.append((page_num + 1, image_bytes))  # 1-indexed page numbers
-            
-            logger.info(f"Converted page {page_num + 1} to {format}, size: {len(image_bytes)} bytes")
-            
-        # Close the PDF document
+        yield from _iter_document_pages(pdf_document, dpi, format)
+    finally:
         pdf_document.close()
-            
+
+def _iter_document_pages(pdf_document, dpi: int, format: str) -> Iterator[Tuple[int, bytes]]:
+    """Render every page of an open PyMuPDF document, in order (see `iter_pdf_pages`)."""
+    logger.info(f"PDF has {pdf_document.page_count} pages")
+    
+    # PyMuPDF default is 72 DPI, so we scale accordingly
+    scale_factor = dpi / 72.0
+    mat = fitz.Matrix(scale_factor, scale_factor)
+    
+    for page_num in range(pdf_document.page_count):
+        try:
+            image_bytes = _render_page(pdf_document[page_num], mat, format)
+        except Exception as e:
+            logger.error(f"Error rendering PDF page {page_num + 1}: {str(e)}")
+            raise Exception(f"Failed to split PDF: {str(e)}")
+        
+        logger.info(f"Converted page {page_num + 1} to {format}, size: {len(image_bytes)} bytes")
+        yield page_num + 1, image_bytes
+
+def _render_page(page, mat, format: str) -> bytes:
+    """Render one PyMuPDF page and encode it in `format`."""
+    # Render page to an RGB pixmap (no alpha) and encode it straight from the
+    # pixmap, without the intermediate PPM buffer and decode
+    pix = page.get_pixmap(matrix=mat, alpha=False)
+    if format.upper() == 'JPEG':
+        return _pixmap_to_jpeg(pix, quality=85)
+    if format.lower() in _PIXMAP_FORMATS:
+        return pix.tobytes(format.lower())
+    return pix.pil_tobytes(format=format)
+
+def _render_page_range(path: str, first: int, last: int, dpi: int, format: str) -> List[Tuple[int, bytes]]:
+    """Worker entry point: pages first..last-1 (0-indexed) as (page_number, image_bytes), 1-indexed."""
+    with open_pdf(path) as pdf_document:
+        scale_factor = dpi / 72.0
+        mat = fitz.Matrix(scale_factor, scale_factor)
+        return [(page_num + 1, _render_page(pdf_document[page_num], mat, format)) for page_num in range(first, last)]
+
+def _get_page_pool() -> ProcessPoolExecutor:
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is None:
+            # spawn: forking a threaded server process (MongoDB client, worker threads) is unsafe
+            _page_pool = ProcessPoolExecutor(
+                max_workers=PAGE_RENDER_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _page_pool
+
+def _split_pdf_in_pool(path: str, page_count: int, dpi: int, format: str) -> Optional[List[Tuple[int, bytes]]]:
+    """Page images rendered across worker processes, or None when the pool is unusable."""
+    global _page_pool
+    step = -(-page_count // PAGE_RENDER_WORKERS)
+    ranges = [(first, min(first + step, page_count)) for first in range(0, page_count, step)]
+    try:
+        pool = _get_page_pool()
+        futures = [pool.submit(_render_page_range, path, first, last, dpi, format) for first, last in ranges]
+        pages = [page for future in futures for page in future.result()]
+    except BrokenProcessPool as e:
+        logger.warning(f"PDF page worker pool failed, rendering in-process: {str(e)}")
+        with _page_pool_lock:
+            _page_pool = None
+        return None
     except Exception as e:
-        logger.error(f"Error splitting PDF to images: {str(e)}")
+        logger.error(f"Error rendering PDF pages: {str(e)}")
         raise Exception(f"Failed to split PDF: {str(e)}")
-        
+    
+    logger.info(f"Converted {len(pages)} pages to {format} in {len(ranges)} worker processes")
     return pages
 
-def convert_single_page_pdf_to_image(file_content: bytes, dpi: int = 150) -> bytes:
+def split_pdf_to_images(file_content: PdfSource, dpi: int = 150, format: str = 'JPEG') -> List[Tuple[int, bytes]]:
+    """
+    Split a PDF into individual page images using PyMuPDF (cloud-ready, no system dependencies).
+    
+    Args:
+        file_content: PDF file content as bytes, or a path to the PDF on disk
+        dpi: Resolution for the converted images (default: 150)
+        format: Output image format (default: 'JPEG')
+    
+    Returns:
+        List of tuples (page_number, image_bytes)
+    """
+    # Only paths go to the worker pool (each worker opens the file itself); pickling bytes
+    # once per page range would cost more than the parallel rendering saves
+    if VIPS_AVAILABLE or not PDF_LIBS_AVAILABLE or PAGE_RENDER_WORKERS < 2 or not isinstance(file_content, str):
+        return list(iter_pdf_pages(file_content, dpi=dpi, format=format))
+    
+    # One open gives the page count and renders small PDFs in-process
+    try:
+        pdf_document = _open_pdf(file_content)
+    except Exception as e:
+        logger.error(f"Error opening PDF: {str(e)}")
+        raise Exception(f"Failed to split PDF: {str(e)}")
+    try:
+        page_count = pdf_document.page_count
+        if page_count < PARALLEL_PAGES_MIN:
+            return list(_iter_document_pages(pdf_document, dpi, format))
+    finally:
+        pdf_document.close()
+    
+    pages = _split_pdf_in_pool(file_content, page_count, dpi, format)
+    if pages is not None:
+        return pages
+    return list(iter_pdf_pages(file_content, dpi=dpi, format=format))
+
+def convert_single_page_pdf_to_image(file_content: PdfSource, dpi: int = 150) -> bytes:
     """
     Convert a single-page PDF to an image.
     
     Args:
-        file_content: PDF file content as bytes
+        file_content: PDF file content as bytes, or a path to the PDF on disk
         dpi: Resolution for the converted image
     
     Returns:
@@ -120,19 +327,25 @@ def save_image_to_temp_file(image_bytes: bytes, suffix: str = '.jpg') -> str:
         Path to the temporary file
     """
     try:
-        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
-            tmp.write(image_bytes)
-            return tmp.name
+        # mkstemp + a plain file object: no NamedTemporaryFile wrapper or finalizer
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                tmp.write(image_bytes)
+        except BaseException:
+            os.unlink(path)
+            raise
+        return path
     except Exception as e:
         logger.error(f"Error saving image to temp file: {str(e)}")
         raise Exception(f"Failed to save image to temp file: {str(e)}")
 
-def get_pdf_page_count(file_content: bytes) -> int:
+def get_pdf_page_count(file_content: PdfSource) -> int:
     """
     Get the number of pages in a PDF using PyMuPDF (cloud-ready).
     
     Args:
-        file_content: PDF file content as bytes
+        file_content: PDF file content as bytes, or a path to the PDF on disk
     
     Returns:
         Number of pages in the PDF
@@ -142,10 +355,8 @@ def get_pdf_page_count(file_content: bytes) -> int:
     
     try:
         # Use PyMuPDF to get page count (very fast and lightweight)
-        pdf_document = fitz.open(stream=file_content, filetype="pdf")
-        page_count = pdf_document.page_count
-        pdf_document.close()
-        return page_count
+        with open_pdf(file_content) as pdf_document:
+            return pdf_document.page_count
     except Exception as e:
         logger.error(f"Error getting PDF page count: {str(e)}")
         raise Exception(f"Failed to get PDF page count: {str(e)}")
@@ -3,6 +3,7 @@ PDF Processing views - Complete PDF processing pipeline in backend.
 Handles: PDF upload → Split → Extract → Save to database
 Frontend just uploads PDF and gets results.
 """
+import logging
 import os
 import uuid
 import tempfile
@@ -20,6 +21,8 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from .document_models import get_model_by_type
 from .document_views import serialize_document
 
+logger = logging.getLogger(__name__)
+
 
 # In-memory session storage (use Redis/database in production)
 PROCESSING_SESSIONS = {}
@@ -90,30 +93,27 @@ def split_pdf(request):
         
         # Use the same PDF processing logic as the working SplitPDFView
         try:
-            from .pdf_utils import split_pdf_to_images, get_pdf_page_count, is_pdf_file
+            from .pdf_utils import (
+                split_pdf_to_images, is_pdf_file,
+                read_upload_header, get_pdf_source,
+            )
         except ImportError:
             return JsonResponse({
                 'error': 'PDF processing utilities not available.'
             }, status=500)
         
-        # Read PDF content
-        pdf_content = pdf_file.read()
-        
-        # Check if it's actually a PDF
-        if not is_pdf_file(pdf_content):
+        # Check if it's actually a PDF (only the header is read)
+        if not is_pdf_file(read_upload_header(pdf_file)):
             return JsonResponse({'error': 'File is not a valid PDF'}, status=400)
         
+        # Read PDF content (or its temp-file path for uploads spooled to disk)
+        pdf_content = get_pdf_source(pdf_file)
+        
         # Convert PDF to images using the working method
         try:
-            page_count = get_pdf_page_count(pdf_content)
-            print(f"[DEBUG] PDF has {page_count} pages")
-            
-            if page_count == 1:
-                from .pdf_utils import convert_single_page_pdf_to_image
-                image_bytes = convert_single_page_pdf_to_image(pdf_content)
-                pages_data = [(1, image_bytes)]
-            else:
-                pages_data = split_pdf_to_images(pdf_content)
+            # One render pass for single- and multi-page PDFs; no separate page-count open
+            pages_data = split_pdf_to_images(pdf_content)
+            print(f"[DEBUG] PDF has {len(pages_data)} pages")
                 
         except Exception as e:
             print(f"[ERROR] PDF processing failed: {str(e)}")
@@ -150,9 +150,7 @@ def split_pdf(request):
         })
         
     except Exception as e:
-        print(f"[ERROR] PDF split failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("PDF split failed")
         return JsonResponse({
             'error': f'Failed to split PDF: {str(e)}'
         }, status=500)
@@ -258,9 +256,7 @@ def process_page(request):
             raise
             
     except Exception as e:
-        print(f"[ERROR] Page processing failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Page processing failed")
         return JsonResponse({
             'error': f'Failed to process page: {str(e)}'
         }, status=500)
@@ -304,6 +300,7 @@ def process_full_pdf(request):
         # Step 1: Split PDF
         try:
             from pdf2image import convert_from_bytes
+            from .pdf_utils import encode_jpeg
             pdf_content = pdf_file.read()
             images = convert_from_bytes(pdf_content, dpi=200)
         except Exception as e:
@@ -328,11 +325,8 @@ def process_full_pdf(request):
             try:
                 # Save image
                 filename = f"pdf_pages/{session_id}/page_{page_num}.jpg"
-                import io
-                img_byte_arr = io.BytesIO()
-                image.save(img_byte_arr, format='JPEG', quality=95)
-                img_byte_arr.seek(0)
-                path = default_storage.save(filename, ContentFile(img_byte_arr.read()))
+                image_bytes = encode_jpeg(image, quality=95)
+                path = default_storage.save(filename, ContentFile(image_bytes))
                 image_url = default_storage.url(path)
                 
                 # TODO: Extract data using AI here
@@ -350,7 +344,7 @@ def process_full_pdf(request):
                         'filename': f'{pdf_file.name}_page_{page_num}',
                         'document_type': document_type,
                         'processed_at': datetime.utcnow().isoformat(),
-                        'file_size': len(img_byte_arr.getvalue()),
+                        'file_size': len(image_bytes),
                         'page_number': page_num,
                         'session_id': session_id,
                     },
@@ -377,9 +371,7 @@ def process_full_pdf(request):
         })
         
     except Exception as e:
-        print(f"[ERROR] Full PDF processing failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Full PDF processing failed")
         return JsonResponse({
             'error': f'Failed to process PDF: {str(e)}'
         }, status=500)
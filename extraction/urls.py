@@ -9,7 +9,8 @@ from .document_views import (
     DocumentDetailView,
     DocumentExportView,
     BulkDocumentExportView,
-    EnhancedExcelExportView
+    EnhancedExcelExportView,
+    ExportJobView
 )
 print("[DEBUG] DocumentExportView imported successfully in extraction/urls.py")
 from .processing_views import (
@@ -21,6 +22,7 @@ from .processing_views import (
 from .batch_processing_views import (
     start_batch_processing,
     get_batch_status,
+    stream_batch_status,
     cancel_batch_processing,
     list_batch_sessions,
     cleanup_batch_sessions
@@ -38,6 +40,7 @@ urlpatterns = [
         path('export-documents/', DocumentExportView.as_view(), name='export-documents'),
     path('test-export/', test_export_view, name='test-export'),
     path('documents/export-bulk/', BulkDocumentExportView.as_view(), name='document-export-bulk'),
+    path('documents/export-jobs/<str:token>/', ExportJobView.as_view(), name='export-job'),
     path('documents/export-excel/', EnhancedExcelExportView.as_view(), name='document-export-excel'),
     path('documents/<str:doc_id>/', DocumentDetailView.as_view(), name='document-detail'),
     
@@ -50,6 +53,7 @@ urlpatterns = [
     # Batch processing endpoints (recommended)
     path('batch/start/', start_batch_processing, name='batch-start'),
     path('batch/status/<str:session_id>/', get_batch_status, name='batch-status'),
+    path('batch/stream/<str:session_id>/', stream_batch_status, name='batch-stream'),
     path('batch/cancel/<str:session_id>/', cancel_batch_processing, name='batch-cancel'),
     path('batch/sessions/', list_batch_sessions, name='batch-sessions'),
     path('batch/cleanup/', cleanup_batch_sessions, name='batch-cleanup'),
@@ -1,14 +1,15 @@
 import io
 import os
-import tempfile
 import base64
 import mimetypes
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 from django.http import HttpResponse, Http404
 from django.conf import settings
-import google.generativeai as genai
+
+from core.gemini_config import CONFIG, configure_genai
 
 from rest_framework.views import APIView
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 from rest_framework import status
 from django.views.decorators.csrf import csrf_exempt
@@ -24,27 +25,30 @@ from .serializers import ExtractionRequestSerializer
 from .utils import post_process_payload
 from .image_storage import save_uploaded_image, save_image_from_bytes
 from .pdf_utils import (
+    PdfSource,
     is_pdf_file, 
+    read_upload_header,
+    get_pdf_source,
     split_pdf_to_images, 
-    convert_single_page_pdf_to_image, 
-    save_image_to_temp_file,
-    get_pdf_page_count,
     cleanup_temp_file
 )
 
-MODEL_NAME = os.getenv('GEMINI_MODEL', 'gemini-2.5-pro')
+MODEL_NAME = CONFIG.model
+_HEALTH_PAYLOAD = {'status': 'ok', 'model': MODEL_NAME}
 
 class HealthView(APIView):
     authentication_classes: list = []
     permission_classes: list = []
 
     def get(self, request):
-        return Response({'status': 'ok', 'model': MODEL_NAME})
+        return Response(_HEALTH_PAYLOAD)
 
 @method_decorator(csrf_exempt, name='dispatch')
 class ExtractView(APIView):
     authentication_classes: list = []
     permission_classes: list = []
+    # Multipart is only accepted on the upload endpoints; the global default is JSON
+    parser_classes = (MultiPartParser, FormParser)
 
     def post(self, request, *args, **kwargs):
         print(f"[DEBUG] Received request with data keys: {list(request.data.keys())}")
@@ -73,10 +77,9 @@ class ExtractView(APIView):
         up_file = serializer.validated_data['file']
         print(f"[DEBUG] File info: name='{up_file.name}', size={up_file.size}, content_type='{up_file.content_type}'")
 
-        # Read file content
+        # Peek at the header only; large uploads are spooled to disk and PDFs are opened from there
         try:
-            file_content = up_file.read()
-            up_file.seek(0)  # Reset file pointer
+            header = read_upload_header(up_file)
         except Exception as e:
             return Response({
                 'status': 'error', 
@@ -84,11 +87,11 @@ class ExtractView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         # Check if it's a PDF file
-        is_pdf = is_pdf_file(file_content)
+        is_pdf = is_pdf_file(header)
         print(f"[DEBUG] Is PDF file: {is_pdf}")
 
         # Configure API key
-        api_key = os.getenv('GOOGLE_API_KEY') or os.getenv('GEMINI_API_KEY')
+        api_key = CONFIG.api_key
         print(f"[DEBUG] API key status: {'found' if api_key else 'missing'}")
         if not api_key:
             print("[ERROR] Google API key not configured")
@@ -98,8 +101,8 @@ class ExtractView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
         try:
-            genai.configure(api_key=api_key)
-            print("[DEBUG] Google AI configured successfully")
+            # No-op after the first successful call (normally done in AppConfig.ready)
+            configure_genai()
         except Exception as config_error:
             print(f"[ERROR] Failed to configure Google AI: {config_error}")
             return Response({
@@ -107,6 +110,14 @@ class ExtractView(APIView):
                 'message': f'Failed to configure Google AI: {str(config_error)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+        try:
+            file_content = get_pdf_source(up_file) if is_pdf else up_file.read()
+        except Exception as e:
+            return Response({
+                'status': 'error', 
+                'message': f'Failed to read uploaded file: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
         if is_pdf:
             return self._handle_pdf_extraction(file_content, document_type, up_file.name)
         else:
@@ -114,28 +125,21 @@ class ExtractView(APIView):
 
     def _handle_image_extraction(self, file_content: bytes, document_type: str, filename: str):
         """Handle extraction from a single image file."""
-        tmp_path = None
         try:
             # Save the uploaded image to media directory
             image_url = save_uploaded_image(file_content, filename)
             if not image_url:
                 print("[WARNING] Failed to save uploaded image")
             
-            # Save to temp file for existing extraction function
-            with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp:
-                tmp.write(file_content)
-                tmp_path = tmp.name
-            
-            # Verify the file was written correctly
-            if not os.path.exists(tmp_path) or os.path.getsize(tmp_path) == 0:
+            if not file_content:
                 return Response({
                     'status': 'error', 
-                    'message': 'Failed to create temporary file'
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                    'message': 'Uploaded image is empty'
+                }, status=status.HTTP_400_BAD_REQUEST)
 
-            # Call extraction
-            print(f"[DEBUG] Starting extraction for {document_type} with file {tmp_path}")
-            wrapper: Dict[str, Any] = extract_data_from_image(tmp_path, doc_type=document_type)
+            # Call extraction (decoded in memory, no temp file)
+            print(f"[DEBUG] Starting extraction for {document_type} with {len(file_content)} bytes")
+            wrapper: Dict[str, Any] = extract_data_from_image(file_content, doc_type=document_type)
             print(f"[DEBUG] Extraction completed. Result: {wrapper}")
             
             if not wrapper:
@@ -160,33 +164,23 @@ class ExtractView(APIView):
         except Exception as e:
             print(f"[ERROR] Exception in extraction: {type(e).__name__}: {str(e)}")
             return Response({'status': 'error', 'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            
-        except Exception as e:
-            print(f"[ERROR] Exception in extraction: {type(e).__name__}: {str(e)}")
-            return Response({'status': 'error', 'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        finally:
-            if tmp_path:
-                try:
-                    os.remove(tmp_path)
-                except OSError:
-                    pass
 
-    def _handle_pdf_extraction(self, file_content: bytes, document_type: str, filename: str):
+    def _handle_pdf_extraction(self, file_content: PdfSource, document_type: str, filename: str):
         """Handle extraction from PDF file (single or multi-page)."""
         try:
-            # Get page count first
-            page_count = get_pdf_page_count(file_content)
-            print(f"[DEBUG] PDF has {page_count} pages")
+            # Render every page in one pass; the page count comes from the result instead of
+            # opening the PDF a second time
+            pages = split_pdf_to_images(file_content)
+            print(f"[DEBUG] PDF has {len(pages)} pages")
             
-            if page_count == 1:
-                # Single page PDF - convert to image and process normally
+            if len(pages) == 1:
+                # Single page PDF - process the page image normally
                 print("[DEBUG] Processing single-page PDF")
-                image_bytes = convert_single_page_pdf_to_image(file_content)
-                return self._handle_image_extraction(image_bytes, document_type, filename)
+                return self._handle_image_extraction(pages[0][1], document_type, filename)
             else:
-                # Multi-page PDF - split and process each page
-                print(f"[DEBUG] Processing multi-page PDF with {page_count} pages")
-                return self._handle_multipage_pdf_extraction(file_content, document_type, filename, page_count)
+                # Multi-page PDF - process each page
+                print(f"[DEBUG] Processing multi-page PDF with {len(pages)} pages")
+                return self._handle_multipage_pdf_extraction(pages, document_type, filename)
                 
         except Exception as e:
             print(f"[ERROR] Exception in PDF processing: {type(e).__name__}: {str(e)}")
@@ -195,30 +189,24 @@ class ExtractView(APIView):
                 'message': f'Failed to process PDF: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def _handle_multipage_pdf_extraction(self, file_content: bytes, document_type: str, filename: str, page_count: int):
-        """Handle extraction from multi-page PDF."""
+    def _handle_multipage_pdf_extraction(self, pages: List[Tuple[int, bytes]], document_type: str, filename: str):
+        """Handle extraction from the rendered pages of a multi-page PDF."""
+        page_count = len(pages)
         try:
-            # Split PDF into individual page images
-            pages = split_pdf_to_images(file_content)
-            
             results = []
             errors = []
             
             for page_num, image_bytes in pages:
                 print(f"[DEBUG] Processing page {page_num}/{page_count}")
                 
-                tmp_path = None
                 try:
                     # Save the page image to media directory
                     page_image_url = save_image_from_bytes(image_bytes, f"{filename}_page_{page_num}")
                     if not page_image_url:
                         print(f"[WARNING] Failed to save image for page {page_num}")
                     
-                    # Save page image to temp file
-                    tmp_path = save_image_to_temp_file(image_bytes, suffix='.jpg')
-                    
-                    # Extract data from this page
-                    wrapper: Dict[str, Any] = extract_data_from_image(tmp_path, doc_type=document_type)
+                    # Extract data from this page straight from the rendered bytes
+                    wrapper: Dict[str, Any] = extract_data_from_image(image_bytes, doc_type=document_type)
                     
                     if wrapper:
                         # Process result
@@ -265,12 +253,6 @@ class ExtractView(APIView):
                     }
                     errors.append(error)
                     print(f"[ERROR] Failed to process page {page_num}: {str(e)}")
-                finally:
-                    if tmp_path:
-                        try:
-                            os.remove(tmp_path)
-                        except OSError:
-                            pass
 
             # Return comprehensive results
             response = {
@@ -305,6 +287,7 @@ class SplitPDFView(APIView):
     Updated: 2025-09-13 - Using PyMuPDF for cloud-ready PDF processing."""
     authentication_classes: list = []
     permission_classes: list = []
+    parser_classes = (MultiPartParser, FormParser)
 
     def post(self, request, *args, **kwargs):
         print(f"[DEBUG] PDF Split request received with data keys: {list(request.data.keys())}")
@@ -319,54 +302,36 @@ class SplitPDFView(APIView):
         print(f"[DEBUG] File info: name='{uploaded_file.name}', size={uploaded_file.size}, content_type='{uploaded_file.content_type}'")
 
         try:
-            # Read file content
-            file_content = uploaded_file.read()
-            uploaded_file.seek(0)  # Reset file pointer
-            
-            # Check if it's a PDF file
-            if not is_pdf_file(file_content):
+            # Check the signature before reading anything else; non-PDFs are rejected unread
+            if not is_pdf_file(read_upload_header(uploaded_file)):
                 return Response({
                     'error': 'File is not a PDF'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Get page count
-            page_count = get_pdf_page_count(file_content)
+            # Spooled uploads are opened from their temp file instead of being copied into memory
+            file_content = get_pdf_source(uploaded_file)
+            
+            # Render every page in one pass (single- and multi-page PDFs alike); the page
+            # count comes from the result instead of opening the PDF a second time
+            pages = split_pdf_to_images(file_content)
+            page_count = len(pages)
             print(f"[DEBUG] PDF has {page_count} pages")
+            page_data = []
             
-            if page_count == 1:
-                # Single page PDF - convert to image
-                image_bytes = convert_single_page_pdf_to_image(file_content)
+            for page_num, image_bytes in pages:
                 base64_image = base64.b64encode(image_bytes).decode('utf-8')
-                
-                page_data = [{
-                    'pageNumber': 1,
-                    'fileName': f"{uploaded_file.name.rsplit('.', 1)[0]}-page-1.jpg",
+                page_info = {
+                    'pageNumber': page_num,
+                    'fileName': f"{uploaded_file.name.rsplit('.', 1)[0]}-page-{page_num}.jpg",
                     'mimeType': 'image/jpeg',
                     'imageDataUrl': f"data:image/jpeg;base64,{base64_image}",
                     'bufferSize': len(image_bytes),
                     'status': 'pending',
                     'extractedData': None,
                     'error': None
-                }]
-            else:
-                # Multi-page PDF - split into images
-                pages = split_pdf_to_images(file_content)
-                page_data = []
-                
-                for page_num, image_bytes in pages:
-                    base64_image = base64.b64encode(image_bytes).decode('utf-8')
-                    page_info = {
-                        'pageNumber': page_num,
-                        'fileName': f"{uploaded_file.name.rsplit('.', 1)[0]}-page-{page_num}.jpg",
-                        'mimeType': 'image/jpeg',
-                        'imageDataUrl': f"data:image/jpeg;base64,{base64_image}",
-                        'bufferSize': len(image_bytes),
-                        'status': 'pending',
-                        'extractedData': None,
-                        'error': None
-                    }
-                    page_data.append(page_info)
-                    print(f"[DEBUG] Processed page {page_num}, image size: {len(image_bytes)} bytes")
+                }
+                page_data.append(page_info)
+                print(f"[DEBUG] Processed page {page_num}, image size: {len(image_bytes)} bytes")
             
             response = {
                 'success': True,
@@ -0,0 +1,315 @@
+"""
+Streaming .xlsx writer for the fixed-layout Excel exports.
+Sheet XML is written straight into the ZIP container row by row, without an openpyxl object model;
+only the handful of cell formats the exporters use are available (see the STYLE_* ids).
+"""
+
+import zipfile
+from math import isfinite
+from functools import lru_cache
+from itertools import groupby
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Cell format ids (index into <cellXfs> of STYLES_XML)
+STYLE_DEFAULT = 0
+STYLE_REBUT_TITLE = 1
+STYLE_NPT_TITLE = 2
+STYLE_TABLE_HEADER = 3
+STYLE_DATA = 4
+STYLE_DATA_INT = 5      # '#,##0'
+STYLE_DATA_DECIMAL = 6  # '#,##0.00'
+STYLE_KOSU_TITLE = 7
+STYLE_KOSU_SECTION = 8
+
+# A cell is (value, style id); None leaves the position empty. A None row is left blank.
+Cell = Optional[Tuple[object, int]]
+
+_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_XML_DECL = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+_ROOT_RELS_XML = (
+    _XML_DECL
+    + f'<Relationships xmlns="{_PKG_REL_NS}">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+).encode('utf-8')
+
+# Colours and fonts mirror ExcelStyler in excel_export.py
+_THIN = '<left style="thin"><color rgb="FFD1D5DB"/></left><right style="thin"><color rgb="FFD1D5DB"/></right>' \
+        '<top style="thin"><color rgb="FFD1D5DB"/></top><bottom style="thin"><color rgb="FFD1D5DB"/></bottom>'
+_CENTER = '<alignment horizontal="center" vertical="center" wrapText="1"/>'
+
+STYLES_XML = (
+    _XML_DECL
+    + f'<styleSheet xmlns="{_MAIN_NS}">'
+    '<fonts count="6">'
+    '<font><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+    '<font><b/><sz val="16"/><color rgb="FFFFFFFF"/><name val="Arial"/></font>'
+    '<font><b/><sz val="10"/><color rgb="FF1E40AF"/><name val="Arial"/></font>'
+    '<font><sz val="10"/><color rgb="FF1F2937"/><name val="Arial"/></font>'
+    '<font><b/><sz val="16"/><color rgb="FF1F2937"/><name val="Arial"/></font>'
+    '<font><b/><sz val="12"/><color rgb="FFFFFFFF"/><name val="Arial"/></font>'
+    '</fonts>'
+    '<fills count="7">'
+    '<fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="FF4F46E5"/><bgColor rgb="FF4F46E5"/></patternFill></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="FF7C3AED"/><bgColor rgb="FF7C3AED"/></patternFill></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="FFDBEAFE"/><bgColor rgb="FFDBEAFE"/></patternFill></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="FFF59E0B"/><bgColor rgb="FFF59E0B"/></patternFill></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="FFFBBF24"/><bgColor rgb="FFFBBF24"/></patternFill></fill>'
+    '</fills>'
+    '<borders count="2">'
+    '<border><left/><right/><top/><bottom/><diagonal/></border>'
+    f'<border>{_THIN}<diagonal/></border>'
+    '</borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="9">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    f'<xf numFmtId="0" fontId="1" fillId="2" borderId="0" xfId="0" applyFont="1" applyFill="1" applyAlignment="1">{_CENTER}</xf>'
+    f'<xf numFmtId="0" fontId="1" fillId="3" borderId="0" xfId="0" applyFont="1" applyFill="1" applyAlignment="1">{_CENTER}</xf>'
+    f'<xf numFmtId="0" fontId="2" fillId="4" borderId="1" xfId="0" applyFont="1" applyFill="1" applyBorder="1" applyAlignment="1">{_CENTER}</xf>'
+    '<xf numFmtId="0" fontId="3" fillId="0" borderId="1" xfId="0" applyFont="1" applyBorder="1"/>'
+    '<xf numFmtId="3" fontId="3" fillId="0" borderId="1" xfId="0" applyNumberFormat="1" applyFont="1" applyBorder="1"/>'
+    '<xf numFmtId="4" fontId="3" fillId="0" borderId="1" xfId="0" applyNumberFormat="1" applyFont="1" applyBorder="1"/>'
+    f'<xf numFmtId="0" fontId="4" fillId="5" borderId="0" xfId="0" applyFont="1" applyFill="1" applyAlignment="1">{_CENTER}</xf>'
+    f'<xf numFmtId="0" fontId="5" fillId="6" borderId="0" xfId="0" applyFont="1" applyFill="1" applyAlignment="1">{_CENTER}</xf>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+).encode('utf-8')
+
+# Fixed start of [Content_Types].xml; sharedStrings and sheet overrides are appended per workbook
+_CONTENT_TYPES_HEAD = (
+    f'{_XML_DECL}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+)
+
+# Text escaping in one str.translate pass (no intermediate strings per replaced character);
+# control characters XML 1.0 cannot carry are dropped
+_TEXT_ESCAPES = {ord('&'): '&amp;', ord('<'): '&lt;', ord('>'): '&gt;'}
+_TEXT_ESCAPES.update({code: None for code in range(32) if code not in (9, 10, 13)})
+_ATTR_ESCAPES = {**_TEXT_ESCAPES, ord('"'): '&quot;'}
+
+# Sheet XML is flushed to the ZIP stream every this many fragments (roughly cells)
+FLUSH_PARTS = 2000
+
+
+def xml_escape(text: str) -> str:
+    return text.translate(_TEXT_ESCAPES)
+
+
+@lru_cache(maxsize=None)
+def column_letter(index: int) -> str:
+    """1 -> 'A', 27 -> 'AA'."""
+    letters = ''
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _text_xml(text: str) -> str:
+    """<t> element for a string (whitespace-preserving when it has leading/trailing spaces)."""
+    space = ' xml:space="preserve"' if text[:1].isspace() or text[-1:].isspace() else ''
+    return f'<t{space}>{text.translate(_TEXT_ESCAPES)}</t>'
+
+
+def _str_xml(ref: str, style_attr: str, text: str, shared: Optional[Dict[str, int]]) -> str:
+    """String cell: an index into `shared` (the workbook's shared strings) or an inline string."""
+    if shared is None:
+        return f'<c r="{ref}"{style_attr} t="inlineStr"><is>{_text_xml(text)}</is></c>'
+    index = shared.get(text)
+    if index is None:
+        index = shared[text] = len(shared)
+    return f'<c r="{ref}"{style_attr} t="s"><v>{index}</v></c>'
+
+
+def _cell_xml(ref: str, value, style: int, shared: Optional[Dict[str, int]] = None) -> str:
+    style_attr = f' s="{style}"' if style else ''
+    # Exact-type checks first for the common cases; subclasses fall through to isinstance below
+    value_type = type(value)
+    if value_type is str:
+        if value:
+            return _str_xml(ref, style_attr, value, shared)
+    elif value_type is int:
+        return f'<c r="{ref}"{style_attr}><v>{value}</v></c>'
+    elif value_type is float and isfinite(value):
+        return f'<c r="{ref}"{style_attr}><v>{value!r}</v></c>'
+    elif value_type is bool:
+        return f'<c r="{ref}"{style_attr} t="b"><v>{int(value)}</v></c>'
+    elif value is not None and value != '':
+        if isinstance(value, bool):
+            return f'<c r="{ref}"{style_attr} t="b"><v>{int(value)}</v></c>'
+        if isinstance(value, (int, float)) and isfinite(value):
+            return f'<c r="{ref}"{style_attr}><v>{value!r}</v></c>'
+        return _str_xml(ref, style_attr, str(value), shared)
+    # Empty: only a styled placeholder is written
+    return f'<c r="{ref}"{style_attr}/>' if style else ''
+
+
+def sheet_xml_chunks(rows: Iterable[Optional[Sequence[Cell]]], column_widths: Sequence[float] = (),
+                     merges: Sequence[str] = (), row_heights: Optional[Dict[int, float]] = None,
+                     shared: Optional[Dict[str, int]] = None) -> Iterator[bytes]:
+    """
+    Worksheet XML as UTF-8 chunks. `rows` start at row 1; merges are ranges like 'A1:K1' and are
+    written after the rows, so a row generator may still append to the list.
+    Strings are indexed into `shared` (text -> index, extended as needed) when given, else inlined.
+    """
+    row_heights = row_heights or {}
+    parts = [_XML_DECL, f'<worksheet xmlns="{_MAIN_NS}">']
+    if column_widths:
+        # One <col> element per run of equal widths (every sheet uses a single width today)
+        parts.append('<cols>')
+        col = 1
+        for width, run in groupby(column_widths):
+            last = col + len(list(run)) - 1
+            parts.append(f'<col min="{col}" max="{last}" width="{width}" customWidth="1"/>')
+            col = last + 1
+        parts.append('</cols>')
+    parts.append('<sheetData>')
+
+    for row_idx, cells in enumerate(rows, start=1):
+        if not cells:
+            continue
+        height = row_heights.get(row_idx)
+        height_attr = f' ht="{height}" customHeight="1"' if height else ''
+        parts.append(f'<row r="{row_idx}"{height_attr}>')
+        for col_idx, cell in enumerate(cells, start=1):
+            if cell is not None:
+                parts.append(_cell_xml(f'{column_letter(col_idx)}{row_idx}', cell[0], cell[1], shared))
+        parts.append('</row>')
+        if len(parts) >= FLUSH_PARTS:
+            yield ''.join(parts).encode('utf-8')
+            parts.clear()
+
+    parts.append('</sheetData>')
+    if merges:
+        parts.append(f'<mergeCells count="{len(merges)}">')
+        parts.extend(f'<mergeCell ref="{ref}"/>' for ref in merges)
+        parts.append('</mergeCells>')
+    parts.append('</worksheet>')
+    yield ''.join(parts).encode('utf-8')
+
+
+def render_sheet_xml(rows: Iterable[Optional[Sequence[Cell]]], column_widths: Sequence[float] = (),
+                     merges: Sequence[str] = (), row_heights: Optional[Dict[int, float]] = None) -> bytes:
+    """
+    Whole worksheet XML with inline strings, for sheets rendered apart from the workbook
+    (e.g. in another process) that cannot share its string table.
+    """
+    return b''.join(sheet_xml_chunks(rows, column_widths, merges, row_heights))
+
+
+class FastXlsxWriter:
+    """
+    Write an .xlsx workbook sheet by sheet into a binary file object.
+    Strings of streamed sheets go to one shared string table, so the labels, headers and
+    defaults repeated on every sheet are stored once.
+    Use as a context manager (or call close()) so the workbook parts are written.
+    """
+
+    def __init__(self, output: BinaryIO):
+        self._zip = zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED)
+        self._sheet_titles: List[str] = []
+        self._shared_strings: Dict[str, int] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._zip.close()
+
+    def add_sheet(self, title: str, rows: Iterable[Optional[Sequence[Cell]]],
+                  column_widths: Sequence[float] = (), merges: Sequence[str] = (),
+                  row_heights: Optional[Dict[int, float]] = None):
+        """Stream one worksheet (see sheet_xml_chunks)."""
+        with self._zip.open(self._next_sheet_path(title), 'w') as sheet:
+            for chunk in sheet_xml_chunks(rows, column_widths, merges, row_heights, self._shared_strings):
+                sheet.write(chunk)
+
+    def add_sheet_xml(self, title: str, xml: bytes):
+        """Add a worksheet rendered beforehand by render_sheet_xml."""
+        self._zip.writestr(self._next_sheet_path(title), xml)
+
+    def _next_sheet_path(self, title: str) -> str:
+        self._sheet_titles.append(title)
+        return f'xl/worksheets/sheet{len(self._sheet_titles)}.xml'
+
+    def _write_shared_strings(self):
+        # dicts keep insertion order, which is index order
+        with self._zip.open('xl/sharedStrings.xml', 'w') as sst:
+            parts = [_XML_DECL, f'<sst xmlns="{_MAIN_NS}" uniqueCount="{len(self._shared_strings)}">']
+            for text in self._shared_strings:
+                parts.append(f'<si>{_text_xml(text)}</si>')
+                if len(parts) >= FLUSH_PARTS:
+                    sst.write(''.join(parts).encode('utf-8'))
+                    parts.clear()
+            parts.append('</sst>')
+            sst.write(''.join(parts).encode('utf-8'))
+
+    def close(self):
+        """Write the workbook, relationship, style and content-type parts and close the ZIP."""
+        if not self._sheet_titles:
+            # A workbook needs at least one sheet
+            self.add_sheet('Sheet1', ())
+        count = len(self._sheet_titles)
+        has_shared_strings = bool(self._shared_strings)
+        if has_shared_strings:
+            self._write_shared_strings()
+
+        sheets = ''.join(
+            f'<sheet name="{title.translate(_ATTR_ESCAPES)}" sheetId="{idx}" r:id="rId{idx}"/>'
+            for idx, title in enumerate(self._sheet_titles, start=1)
+        )
+        self._zip.writestr(
+            'xl/workbook.xml',
+            f'{_XML_DECL}<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}"><sheets>{sheets}</sheets></workbook>'
+        )
+
+        sheet_rels = ''.join(
+            f'<Relationship Id="rId{idx}" '
+            f'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{idx}.xml"/>'
+            for idx in range(1, count + 1)
+        )
+        self._zip.writestr(
+            'xl/_rels/workbook.xml.rels',
+            f'{_XML_DECL}<Relationships xmlns="{_PKG_REL_NS}">{sheet_rels}'
+            f'<Relationship Id="rId{count + 1}" '
+            f'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+            f'Target="styles.xml"/>'
+            + (f'<Relationship Id="rId{count + 2}" '
+               f'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" '
+               f'Target="sharedStrings.xml"/>' if has_shared_strings else '')
+            + '</Relationships>'
+        )
+        self._zip.writestr('xl/styles.xml', STYLES_XML)
+        self._zip.writestr('_rels/.rels', _ROOT_RELS_XML)
+
+        sheet_overrides = ''.join(
+            f'<Override PartName="/xl/worksheets/sheet{idx}.xml" '
+            f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for idx in range(1, count + 1)
+        )
+        self._zip.writestr(
+            '[Content_Types].xml',
+            _CONTENT_TYPES_HEAD
+            + ('<Override PartName="/xl/sharedStrings.xml" '
+               'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+               if has_shared_strings else '')
+            + f'{sheet_overrides}</Types>'
+        )
+        self._zip.close()
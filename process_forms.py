@@ -1,13 +1,15 @@
 """Clean functional extraction script (multi‑image Rebut strategy)."""
 
-import os, json, re
+import io, os, json, re, threading
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Union
 from datetime import datetime
 import pandas as pd
 import PIL.Image
 import google.generativeai as genai
 
+from core.gemini_config import CONFIG
+
 try:
   import cv2  # type: ignore
   import numpy as np  # type: ignore
@@ -15,11 +17,40 @@ except ImportError:  # optional
   cv2 = None  # type: ignore
   np = None  # type: ignore
 
-GEMINI_PRO_MODEL = os.environ.get("GEMINI_MODEL", "gemini-2.5-pro")
+GEMINI_PRO_MODEL = CONFIG.model
 JSON_FENCE = "```json"
 JSON_FENCE_BLOCK_PATTERN = r"```json\s*([\s\S]*?)\s*```"
 DEFAUTS_DOC_TYPE = 'Défauts'
 
+# One GenerativeModel per model name, shared by every request/page thread
+_MODEL_CACHE: Dict[str, Any] = {}
+_MODEL_CACHE_LOCK = threading.Lock()
+
+def get_model(model_name: str = GEMINI_PRO_MODEL):
+  """Return the shared GenerativeModel for `model_name` (created on first use)."""
+  model = _MODEL_CACHE.get(model_name)
+  if model is None:
+    with _MODEL_CACHE_LOCK:
+      model = _MODEL_CACHE.get(model_name)
+      if model is None:
+        model = _MODEL_CACHE[model_name] = genai.GenerativeModel(model_name)
+  return model
+
+# Extraction input: a file path, encoded image bytes / BytesIO, or an already opened PIL image
+ImageSource = Union[str, bytes, io.BytesIO, PIL.Image.Image]
+
+def load_image_source(src: ImageSource) -> Tuple[PIL.Image.Image, Optional[str]]:
+  """Open an extraction input without touching disk for in-memory sources.
+  Returns (image, path); path is None for in-memory inputs, which have no crop side files."""
+  if isinstance(src, PIL.Image.Image):
+    return src, None
+  if isinstance(src, (bytes, bytearray, memoryview)):
+    src = io.BytesIO(src)
+  if isinstance(src, io.BytesIO):
+    img = PIL.Image.open(src); img.load()
+    return img, None
+  return PIL.Image.open(src), str(src)
+
 # ---------------- Date Normalization -----------------
 def normalize_date_value(date_value: Any, field_name: str = "date") -> Optional[str]:
   """
@@ -797,9 +828,9 @@ def create_field_focused_crops(img: PIL.Image.Image, doc_type: str) -> List[PIL.
     
   return crops
 
-def gather_kosu_images_with_preprocessing(base_image_path: str) -> List[PIL.Image.Image]:
+def gather_kosu_images_with_preprocessing(base_image: Union[str, PIL.Image.Image]) -> List[PIL.Image.Image]:
   try:
-    base = PIL.Image.open(base_image_path)
+    base = base_image if isinstance(base_image, PIL.Image.Image) else PIL.Image.open(base_image)
   except Exception as e:
     print(f"[Kosu] open fail: {e}")
     return []
@@ -990,13 +1021,13 @@ def recover_defauts_missing_marks(base_img: PIL.Image.Image, crops: List[PIL.Ima
     print(f"[Défauts] recovery pass fail: {e}")
   return data
 
-def extract_defauts_multi(image_path: str, model) -> Dict[str, Any]:
+def extract_defauts_multi(image: ImageSource, model) -> Dict[str, Any]:
   try:
-    base = PIL.Image.open(image_path)
+    base, image_path = load_image_source(image)
   except FileNotFoundError:
     print('[Défauts] image not found')
     return {}
-  crops = gather_defauts_images_with_preprocessing(image_path)
+  crops = gather_defauts_images_with_preprocessing(image_path) if image_path else []
   try:
     resp = model.generate_content([DEFAUTS_PRIMARY_PROMPT, base] + crops if crops else [DEFAUTS_PRIMARY_PROMPT, base])
     txt = resp.text or '{}'
@@ -1357,23 +1388,25 @@ def final_sanity_check(data: dict, doc_type: str) -> dict:
 
 PROMPT_MAP = {'Rebut': REBUT_MULTI_PROMPT, 'Kosu': KOSU_PROMPT, 'NPT': NPT_PROMPT, DEFAUTS_DOC_TYPE: DEFAUTS_PRIMARY_PROMPT, 'Defauts': DEFAUTS_PRIMARY_PROMPT}
 
-def extract_data_from_image(image_path: str, doc_type: str) -> Dict[str, Any]:
-  """Main extraction orchestrator with comprehensive error handling."""
+def extract_data_from_image(image: ImageSource, doc_type: str, model=None) -> Dict[str, Any]:
+  """Main extraction orchestrator with comprehensive error handling.
+  `image` may be a path, image bytes / BytesIO or a PIL image (see load_image_source).
+  `model` defaults to the shared instance from get_model()."""
   try:
-    if not image_path or not doc_type:
+    if image is None or (isinstance(image, (str, bytes)) and not image) or not doc_type:
       print("[extract_data_from_image] Missing required parameters")
-      return {"error": "Missing image_path or doc_type"}
+      return {"error": "Missing image or doc_type"}
     
-    model = genai.GenerativeModel(GEMINI_PRO_MODEL)
+    model = model or get_model()
     
     if doc_type in ['Défauts','Defauts']:
-      return extract_defauts_multi(image_path, model)
+      return extract_defauts_multi(image, model)
     
     # Safe image loading
     try:
-      base = PIL.Image.open(image_path)
+      base, image_path = load_image_source(image)
     except FileNotFoundError:
-      print(f"[extract_data_from_image] Image not found: {image_path}")
+      print(f"[extract_data_from_image] Image not found: {image}")
       return {"error": "Image not found"}
     except Exception as e:
       print(f"[extract_data_from_image] Image loading error: {e}")
@@ -1388,10 +1421,10 @@ def extract_data_from_image(image_path: str, doc_type: str) -> Dict[str, Any]:
     # Gather images with error handling
     crops: List[PIL.Image.Image] = []
     try:
-      if doc_type == 'Rebut':
+      if doc_type == 'Rebut' and image_path:
         crops = gather_rebut_images_with_preprocessing(image_path)
       elif doc_type == 'Kosu':
-        crops = gather_kosu_images_with_preprocessing(image_path)
+        crops = gather_kosu_images_with_preprocessing(base)
     except Exception as e:
       print(f"[extract_data_from_image] Image preprocessing error: {e}")
       # Continue with base image only